@@ -0,0 +1,96 @@
+"""
+Micro-benchmark des fonctions géographiques : boucle scalaire vs NumPy
+
+Usage (depuis backend/) :
+    python benchmarks/bench_geo_helpers.py [nombre_de_points]
+"""
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.geo_helpers import (
+    haversine_distance,
+    calculate_total_distance,
+    calculate_bearing,
+    destination_point,
+    calculate_bearings,
+    cumulative_distances,
+    destination_points
+)
+
+
+def make_route(num_points: int):
+    """Parcours aléatoire d'environ 10 m entre points autour de Paris"""
+    lat, lon = 48.8566, 2.3522
+    coords = [(lat, lon)]
+    for _ in range(num_points - 1):
+        lat, lon = destination_point(lat, lon, 0.01, random.uniform(0, 360))
+        coords.append((lat, lon))
+    return coords
+
+
+def scalar_total_distance(coords):
+    """Ancienne implémentation : boucle Python sur haversine_distance"""
+    total = 0.0
+    for i in range(len(coords) - 1):
+        total += haversine_distance(*coords[i], *coords[i + 1])
+    return total
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<40} {seconds * 1000:8.3f} ms")
+    return seconds
+
+
+def main():
+    num_points = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    coords = make_route(num_points)
+    lats = [lat for lat, _ in coords]
+    lons = [lon for _, lon in coords]
+
+    assert math.isclose(scalar_total_distance(coords), calculate_total_distance(coords), rel_tol=1e-9)
+
+    print(f"Parcours de {num_points} points")
+
+    print("Distance totale")
+    scalar = bench("scalaire (boucle haversine_distance)", lambda: scalar_total_distance(coords), 20)
+    vector = bench("NumPy (calculate_total_distance)", lambda: calculate_total_distance(coords), 20)
+    print(f"  -> x{scalar / vector:.1f}")
+
+    print("Distances cumulées")
+    bench("NumPy (cumulative_distances)", lambda: cumulative_distances(coords), 20)
+
+    print("Caps")
+    scalar = bench(
+        "scalaire (calculate_bearing)",
+        lambda: [calculate_bearing(*coords[i], *coords[i + 1]) for i in range(num_points - 1)],
+        20
+    )
+    vector = bench(
+        "NumPy (calculate_bearings)",
+        lambda: calculate_bearings(lats[:-1], lons[:-1], lats[1:], lons[1:]),
+        20
+    )
+    print(f"  -> x{scalar / vector:.1f}")
+
+    print("Points de destination")
+    scalar = bench(
+        "scalaire (destination_point)",
+        lambda: [destination_point(lat, lon, 1.0, 45.0) for lat, lon in coords],
+        20
+    )
+    vector = bench(
+        "NumPy (destination_points)",
+        lambda: destination_points(lats, lons, 1.0, 45.0),
+        20
+    )
+    print(f"  -> x{scalar / vector:.1f}")
+
+
+if __name__ == "__main__":
+    main()
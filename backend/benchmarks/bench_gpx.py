@@ -0,0 +1,83 @@
+"""
+Benchmark de l'export GPX : gpxpy vs écriture directe (utils/gpx_writer)
+
+Usage (depuis backend/) :
+    python benchmarks/bench_gpx.py [nombre_de_points]
+"""
+import os
+import random
+import sys
+import timeit
+
+import gpxpy
+import gpxpy.gpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.geo_helpers import destination_point
+from utils.gpx_writer import write_gpx
+
+
+def make_route(num_points: int):
+    """Parcours aléatoire d'environ 10 m entre points, avec élévations"""
+    lat, lon = 48.8566, 2.3522
+    coords = [(lat, lon)]
+    for _ in range(num_points - 1):
+        lat, lon = destination_point(lat, lon, 0.01, random.uniform(0, 360))
+        coords.append((lat, lon))
+    elevations = [35 + random.uniform(-5, 5) for _ in coords]
+    return coords, elevations
+
+
+def gpxpy_export(coords, elevations=None):
+    """Ancienne implémentation : un GPXTrackPoint par coordonnée puis to_xml()"""
+    gpx = gpxpy.gpx.GPX()
+    gpx.name = "Parcours endurance - 10.0km"
+    gpx.description = "Généré par Strava+Coach - Dénivelé: plat"
+    gpx.creator = "Strava+Coach POC"
+    track = gpxpy.gpx.GPXTrack()
+    gpx.tracks.append(track)
+    segment = gpxpy.gpx.GPXTrackSegment()
+    track.segments.append(segment)
+    for i, (lat, lon) in enumerate(coords):
+        elevation = elevations[i] if elevations else None
+        segment.points.append(gpxpy.gpx.GPXTrackPoint(lat, lon, elevation=elevation))
+    return gpx.to_xml()
+
+
+def writer_export(coords, elevations=None):
+    return write_gpx(
+        coords,
+        name="Parcours endurance - 10.0km",
+        description="Généré par Strava+Coach - Dénivelé: plat",
+        creator="Strava+Coach POC",
+        elevations=elevations
+    )
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    print(f"  {label:<32} {seconds * 1000:9.2f} ms")
+    return seconds
+
+
+def main():
+    num_points = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    coords, elevations = make_route(num_points)
+
+    # Le fichier produit doit être relu à l'identique par gpxpy
+    parsed = gpxpy.parse(writer_export(coords, elevations))
+    points = parsed.tracks[0].segments[0].points
+    assert len(points) == num_points
+    assert (points[0].latitude, points[0].longitude) == coords[0]
+
+    print(f"Parcours de {num_points} points")
+    for label, ele in (("sans élévation", None), ("avec élévation", elevations)):
+        print(label)
+        old = bench("gpxpy", lambda: gpxpy_export(coords, ele), 3)
+        new = bench("gpx_writer", lambda: writer_export(coords, ele), 3)
+        print(f"  -> x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
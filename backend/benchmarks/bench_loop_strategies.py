@@ -0,0 +1,112 @@
+"""
+Benchmark des stratégies de boucle sur le backend de routing local :
+triangle (3 points de passage + solveur) vs cycles du graphe (find_loops)
+
+Le graphe est une grille synthétique irrégulière (aucun extrait OSM requis).
+
+Usage (depuis backend/) :
+    python benchmarks/bench_loop_strategies.py [distance_km ...]
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import RouteRequest, RouteType
+from services.elevation import ElevationService
+from services.road_graph import CLASS_NAMES, RoadGraph
+from services.route_generator import RouteGenerator
+from services.routing import LocalRoutingBackend
+
+START = (48.8566, 2.3522)
+BEARINGS = list(range(0, 360, 45))
+
+
+def make_graph(size: int = 120, spacing_deg: float = 0.001, drop_ratio: float = 0.15) -> RoadGraph:
+    """Grille de size x size nœuds (~100 m), positions bruitées, 15% de rues supprimées"""
+    random.seed(42)
+    lat0 = START[0] - size / 2 * spacing_deg
+    lon0 = START[1] - size / 2 * spacing_deg * 1.5
+    nodes = {
+        i * size + j: (
+            lat0 + (i + random.uniform(-0.3, 0.3)) * spacing_deg,
+            lon0 + (j + random.uniform(-0.3, 0.3)) * spacing_deg * 1.5
+        )
+        for i in range(size) for j in range(size)
+    }
+    residential = CLASS_NAMES.index("residential")
+    ways = []
+    for i in range(size):
+        for j in range(size):
+            node = i * size + j
+            if j + 1 < size and random.random() > drop_ratio:
+                ways.append(([node, node + 1], residential, 0))
+            if i + 1 < size and random.random() > drop_ratio:
+                ways.append(([node, node + size], residential, 0))
+    return RoadGraph.from_ways(nodes, ways)
+
+
+async def run_strategy(generator, method, distance_km):
+    request = RouteRequest(start_location="bench", distance_km=distance_km, route_type=RouteType.LOOP)
+    latencies, errors = [], []
+    for bearing in BEARINGS:
+        generator.segment_cache.memory.clear()
+        start = time.perf_counter()
+        routed = await method(START[0], START[1], distance_km, bearing, request)
+        latencies.append(time.perf_counter() - start)
+        if routed:
+            _, routed_km = routed
+            errors.append(abs(routed_km - distance_km) / distance_km)
+    return latencies, errors
+
+
+def report(label, latencies, errors, routing_calls=None):
+    calls = f"{routing_calls / len(latencies):6.1f}" if routing_calls is not None else "     -"
+    mean_error = sum(errors) / len(errors) * 100 if errors else float("nan")
+    max_error = max(errors) * 100 if errors else float("nan")
+    print(f"  {label:<10} {sum(latencies) / len(latencies) * 1000:9.1f} ms "
+          f"{calls} appels  {len(errors)}/{len(latencies)} boucles  "
+          f"écart moyen {mean_error:5.2f}%  max {max_error:5.2f}%")
+
+
+async def main():
+    distances = [float(value) for value in sys.argv[1:]] or [5.0, 10.0]
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.graph")
+        graph = make_graph()
+        graph.save(path)
+        print(f"Graphe synthétique : {graph.stats()}")
+
+        backend = LocalRoutingBackend(graph_path=path)
+        generator = RouteGenerator(ElevationService(), routing_backend=backend)
+
+        calls = 0
+        route = backend.route
+
+        async def counted_route(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return await route(*args, **kwargs)
+
+        backend.route = counted_route
+
+        for distance_km in distances:
+            print(f"Boucle de {distance_km} km ({len(BEARINGS)} directions)")
+            calls = 0
+            latencies, errors = await run_strategy(generator, generator._generate_loop_route, distance_km)
+            report("triangle", latencies, errors, calls)
+
+            backend.loop_cache.clear()
+            latencies, errors = await run_strategy(generator, generator._generate_graph_loop_route, distance_km)
+            report("graph", latencies, errors)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
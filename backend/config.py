@@ -0,0 +1,185 @@
+"""
+Configuration de l'application
+
+Toutes les valeurs peuvent être surchargées par variables d'environnement.
+"""
+import os
+import tempfile
+from typing import Optional
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lit un entier depuis l'environnement"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Lit un réel depuis l'environnement"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_optional_float(name: str) -> Optional[float]:
+    """Lit un réel optionnel depuis l'environnement (vide = None, 0 compris)"""
+    value = os.getenv(name, "").strip()
+    return float(value) if value else None
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lit un booléen depuis l'environnement (1/true/yes/on)"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Nombre maximum d'appels simultanés par service externe
+OSRM_MAX_CONCURRENCY = _env_int("OSRM_MAX_CONCURRENCY", 8)
+ELEVATION_MAX_CONCURRENCY = _env_int("ELEVATION_MAX_CONCURRENCY", 2)
+
+# Pool de clients HTTP partagés
+HTTP_MAX_CONNECTIONS_PER_HOST = _env_int("HTTP_MAX_CONNECTIONS_PER_HOST", 20)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _env_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 10)
+HTTP_KEEPALIVE_EXPIRY = _env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+HTTP2_ENABLED = _env_bool("HTTP2_ENABLED", False)
+HTTP_CONNECT_TIMEOUT = _env_float("HTTP_CONNECT_TIMEOUT", 5.0)
+HTTP_DEFAULT_TIMEOUT = _env_float("HTTP_DEFAULT_TIMEOUT", 15.0)
+HTTP_TIMEOUTS = {
+    "nominatim": _env_float("NOMINATIM_TIMEOUT", 10.0),
+    "osrm": _env_float("OSRM_TIMEOUT", 15.0),
+    "elevation": _env_float("ELEVATION_TIMEOUT", 30.0),
+}
+
+# Nouvelles tentatives par service externe (erreurs réseau, 429 et 5xx),
+# espacées par un backoff exponentiel avec gigue. Pas de relance Nominatim :
+# la limite de débit est appliquée par le service de géocodage.
+HTTP_RETRIES = {
+    "nominatim": _env_int("NOMINATIM_RETRIES", 0),
+    "osrm": _env_int("OSRM_RETRIES", 1),
+    "elevation": _env_int("ELEVATION_RETRIES", 1),
+}
+HTTP_RETRY_BACKOFF_BASE = _env_float("HTTP_RETRY_BACKOFF_BASE", 0.2)
+HTTP_RETRY_BACKOFF_MAX = _env_float("HTTP_RETRY_BACKOFF_MAX", 2.0)
+
+# Requêtes GET doublées (hedging) : si la réponse tarde au-delà du quantile
+# de latence observé, une seconde requête identique est envoyée et la
+# première réponse reçue l'emporte
+HTTP_HEDGE_UPSTREAMS = [
+    name.strip() for name in os.getenv("HTTP_HEDGE_UPSTREAMS", "osrm").split(",") if name.strip()
+]
+HTTP_HEDGE_QUANTILE = _env_float("HTTP_HEDGE_QUANTILE", 0.95)
+HTTP_HEDGE_MIN_DELAY = _env_float("HTTP_HEDGE_MIN_DELAY", 0.05)
+
+# Disjoncteurs par service externe : ouverture quand le taux d'échec de la
+# fenêtre glissante dépasse le seuil ou après N échecs consécutifs ; les
+# appels plus lents que SLOW_RATIO x timeout du service comptent comme des
+# échecs. Ouvert, le service est court-circuité pendant OPEN_DURATION.
+CIRCUIT_BREAKER_ENABLED = _env_bool("CIRCUIT_BREAKER_ENABLED", True)
+CIRCUIT_BREAKER_WINDOW = _env_int("CIRCUIT_BREAKER_WINDOW", 50)
+CIRCUIT_BREAKER_MIN_CALLS = _env_int("CIRCUIT_BREAKER_MIN_CALLS", 10)
+CIRCUIT_BREAKER_ERROR_RATE = _env_float("CIRCUIT_BREAKER_ERROR_RATE", 0.5)
+CIRCUIT_BREAKER_CONSECUTIVE_FAILURES = _env_int("CIRCUIT_BREAKER_CONSECUTIVE_FAILURES", 5)
+CIRCUIT_BREAKER_OPEN_DURATION = _env_float("CIRCUIT_BREAKER_OPEN_DURATION", 30.0)
+CIRCUIT_BREAKER_SLOW_RATIO = _env_float("CIRCUIT_BREAKER_SLOW_RATIO", 0.8)
+
+# Moteur de routing : "osrm" (instance distante) ou "local" (graphe construit
+# à partir d'un extrait OSM, voir services/road_graph.py)
+ROUTING_BACKEND = os.getenv("ROUTING_BACKEND", "osrm")
+OSRM_BASE_URL = os.getenv("OSRM_BASE_URL", "https://router.project-osrm.org")
+ROUTING_GRAPH_PATH = os.getenv("ROUTING_GRAPH_PATH", "data/graph/foot.graph")
+ROUTING_OSM_EXTRACT = os.getenv("ROUTING_OSM_EXTRACT", "")  # .osm ou .osm.pbf
+
+# Stratégie des boucles : "triangle" (3 points de passage ajustés par le
+# solveur) ou "graph" (cycles de l'arbre des plus courts chemins, backend local)
+LOOP_STRATEGY = os.getenv("LOOP_STRATEGY", "triangle")
+LOOP_OVERLAP_PENALTY = _env_float("LOOP_OVERLAP_PENALTY", 1.0)
+
+# Index de joignabilité par cellule de départ (distances routières vers des
+# points répartis sur plusieurs cercles)
+REACHABILITY_INDEX_ENABLED = _env_bool("REACHABILITY_INDEX_ENABLED", True)
+REACHABILITY_RADII_KM = [
+    float(value) for value in
+    os.getenv("REACHABILITY_RADII_KM", "0.5,1,2,3,5,8,12,17,25,35").split(",")
+]
+REACHABILITY_BEARINGS = _env_int("REACHABILITY_BEARINGS", 8)  # 8 x 10 points < limite "table" OSRM
+REACHABILITY_GEOHASH_PRECISION = _env_int("REACHABILITY_GEOHASH_PRECISION", 7)  # ~150 m
+REACHABILITY_CACHE_MAX_CELLS = _env_int("REACHABILITY_CACHE_MAX_CELLS", 2000)
+REACHABILITY_CACHE_TTL = _env_int("REACHABILITY_CACHE_TTL", 7 * 24 * 3600)
+
+# Cache des segments OSRM (extrémités arrondies sur une grille en degrés)
+SEGMENT_CACHE_GRID_DEG = _env_float("SEGMENT_CACHE_GRID_DEG", 0.0002)  # ~20 m
+SEGMENT_CACHE_MAX_ENTRIES = _env_int("SEGMENT_CACHE_MAX_ENTRIES", 5000)
+SEGMENT_CACHE_MAX_POINTS = _env_int("SEGMENT_CACHE_MAX_POINTS", 2_000_000)
+SEGMENT_CACHE_TTL = _env_float("SEGMENT_CACHE_TTL", 24 * 3600)
+SEGMENT_CACHE_PATH = os.getenv("SEGMENT_CACHE_PATH", "")  # vide = pas de persistance
+
+# Cache de géocodage (mémoire + sqlite)
+GEOCODE_CACHE_MAX_ENTRIES = _env_int("GEOCODE_CACHE_MAX_ENTRIES", 10000)
+GEOCODE_CACHE_TTL = _env_float("GEOCODE_CACHE_TTL", 30 * 24 * 3600)
+GEOCODE_NEGATIVE_CACHE_TTL = _env_float("GEOCODE_NEGATIVE_CACHE_TTL", 3600)
+GEOCODE_CACHE_PATH = os.getenv(
+    "GEOCODE_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "stravacoach_geocode.sqlite")
+)  # vide = pas de persistance
+REVERSE_GEOCODE_PRECISION = _env_int("REVERSE_GEOCODE_PRECISION", 4)  # décimales (~11 m)
+
+# Source des élévations : "open-elevation" (API distante) ou "srtm" (tuiles locales)
+ELEVATION_BACKEND = os.getenv("ELEVATION_BACKEND", "open-elevation")
+SRTM_DIRECTORY = os.getenv("SRTM_DIRECTORY", "data/srtm")
+SRTM_MAX_OPEN_TILES = _env_int("SRTM_MAX_OPEN_TILES", 16)
+
+# Cache des élévations par point (grille en degrés)
+ELEVATION_CACHE_GRID_DEG = _env_float("ELEVATION_CACHE_GRID_DEG", 0.0001)  # ~11 m
+ELEVATION_CACHE_MAX_POINTS = _env_int("ELEVATION_CACHE_MAX_POINTS", 200000)
+
+# Échantillonnage des élévations le long du parcours (pas régulier en distance)
+ELEVATION_SAMPLE_SPACING_M = _env_float("ELEVATION_SAMPLE_SPACING_M", 30.0)  # résolution SRTM1
+ELEVATION_MAX_SAMPLES = _env_int("ELEVATION_MAX_SAMPLES", 100)  # points par parcours
+# Points par appel Open-Elevation (1024 au maximum), les lots sont envoyés en parallèle
+ELEVATION_REQUEST_MAX_POINTS = min(_env_int("ELEVATION_REQUEST_MAX_POINTS", 1024), 1024)
+
+# Recherche "anytime" : budget de temps par requête et score jugé suffisant
+ROUTE_TIME_BUDGET_S = _env_float("ROUTE_TIME_BUDGET_S", 25.0)
+# Vide = score correspondant à la tolérance de distance (±2%) sans pénalité de dénivelé
+ROUTE_ACCEPTABLE_SCORE = _env_optional_float("ROUTE_ACCEPTABLE_SCORE")
+
+# Simplification de la géométrie (Douglas-Peucker) avant élévation et réponse,
+# écart maximal en mètres (0 = désactivée)
+SIMPLIFY_TOLERANCE_M = _env_float("SIMPLIFY_TOLERANCE_M", 5.0)
+
+# Réutilisation des parcours générés pour des requêtes quasi identiques
+# (départ à moins de START_RADIUS_M, distance dans la tolérance relative).
+# Le parcours servi part du départ de la requête d'origine : le rayon reste
+# de l'ordre de l'imprécision du géocodage d'une même adresse
+RESULT_CACHE_ENABLED = _env_bool("RESULT_CACHE_ENABLED", True)
+RESULT_CACHE_START_RADIUS_M = _env_float("RESULT_CACHE_START_RADIUS_M", 20.0)
+RESULT_CACHE_DISTANCE_TOLERANCE = _env_float("RESULT_CACHE_DISTANCE_TOLERANCE", 0.03)
+RESULT_CACHE_TTL = _env_int("RESULT_CACHE_TTL", 6 * 3600)
+RESULT_CACHE_MAX_ENTRIES = _env_int("RESULT_CACHE_MAX_ENTRIES", 5000)
+RESULT_CACHE_MAX_POINTS = _env_int("RESULT_CACHE_MAX_POINTS", 1_000_000)
+
+# Cache des réponses complètes (requêtes identiques, ex: séance partagée)
+RESPONSE_CACHE_ENABLED = _env_bool("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_TTL = _env_int("RESPONSE_CACHE_TTL", 300)
+RESPONSE_CACHE_MAX_ENTRIES = _env_int("RESPONSE_CACHE_MAX_ENTRIES", 1000)
+RESPONSE_CACHE_MAX_BYTES = _env_int("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# Génération par lot : nombre de parcours générés simultanément
+BATCH_MAX_CONCURRENCY = _env_int("BATCH_MAX_CONCURRENCY", 4)
+
+# Export GPX : inclure les balises <ele> du profil d'élévation
+GPX_INCLUDE_ELEVATION = _env_bool("GPX_INCLUDE_ELEVATION", True)
+
+# Métriques (/metrics) : période de mesure du retard de la boucle
+# d'événements en secondes (0 = mesure désactivée)
+EVENT_LOOP_LAG_INTERVAL = _env_float("EVENT_LOOP_LAG_INTERVAL", 0.5)
+
+# Traces par étape (spans) : "none", "jsonl" (fichier local, un span par
+# ligne) ou "otlp" (collecteur OpenTelemetry, OTLP/HTTP JSON sur /v1/traces)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "data/traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "strava-coach-route-generator")
+TRACE_SAMPLE_RATIO = _env_float("TRACE_SAMPLE_RATIO", 1.0)  # proportion des requêtes tracées
+TRACE_EXPORT_INTERVAL = _env_float("TRACE_EXPORT_INTERVAL", 2.0)  # secondes entre deux exports
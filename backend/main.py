@@ -1,19 +1,86 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Callable, Iterable, Optional, Set, Tuple
+import asyncio
+import json
 import os
 
-from models import RouteRequest, RouteResponse, ErrorResponse, Coordinates, RouteMetrics
-from services.geocoding import GeocodingService
+import config
+from models import (
+    RouteRequest, RouteResponse, ErrorResponse,
+    BatchRouteRequest, BatchRouteResponse
+)
+from services.geocoding import GeocodingService, normalize_address
 from services.elevation import ElevationService
 from services.route_generator import RouteGenerator
+from services.http_client import HttpClientPool
+from services.response_cache import ResponseCache
+from utils.geo_helpers import coordinates_to_geojson
+from utils.encoding import DEFAULT_FIELDS, build_route_payload, resolve_fields
+from utils.metrics import (
+    CONTENT_TYPE, REGISTRY, MetricsMiddleware, cache_samples, monitor_event_loop_lag
+)
+from utils.tracing import TRACER, create_span_exporter, current_span, span, traced
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Crée le pool HTTP partagé au démarrage et le ferme à l'arrêt"""
+    http_pool = HttpClientPool()
+    app.state.http_pool = http_pool
+
+    # Injecter le pool dans les services
+    geocoding_service.http_pool = http_pool
+    elevation_service.http_pool = http_pool
+    route_generator.routing_backend.http_pool = http_pool
+
+    # Tâches de fond : retard de la boucle d'événements (/metrics), export des traces
+    background_tasks = []
+    if config.EVENT_LOOP_LAG_INTERVAL > 0:
+        background_tasks.append(
+            asyncio.create_task(monitor_event_loop_lag(config.EVENT_LOOP_LAG_INTERVAL))
+        )
+
+    TRACER.configure(
+        create_span_exporter(
+            config.TRACE_EXPORTER,
+            jsonl_path=config.TRACE_JSONL_PATH,
+            otlp_endpoint=config.TRACE_OTLP_ENDPOINT,
+            service_name=config.TRACE_SERVICE_NAME
+        ),
+        sample_ratio=config.TRACE_SAMPLE_RATIO
+    )
+    if TRACER.enabled:
+        background_tasks.append(asyncio.create_task(TRACER.run(config.TRACE_EXPORT_INTERVAL)))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await TRACER.shutdown()
+    await http_pool.aclose()
+
 
 # Initialisation de l'application
 app = FastAPI(
     title="Strava+Coach Route Generator API",
     description="API de génération de parcours d'entraînement personnalisés",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Documentation des paramètres de négociation du format de réponse
+FIELDS_DESCRIPTION = (
+    "Champs à renvoyer, séparés par des virgules : geojson, gpx, metrics, "
+    "waypoints, start_address, polyline, coordinates"
+)
+FORMAT_DESCRIPTION = (
+    "Format de géométrie : geojson (défaut), polyline5, polyline6 "
+    "(polyline encodée) ou flat (tableau [lat, lon, lat, lon, ...])"
 )
 
 # Configuration CORS pour permettre les requêtes depuis le frontend
@@ -25,10 +92,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Durée et taille des réponses par route (/metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Initialisation des services
 geocoding_service = GeocodingService()
 elevation_service = ElevationService()
 route_generator = RouteGenerator(elevation_service)
+response_cache = ResponseCache() if config.RESPONSE_CACHE_ENABLED else None
+
+
+def collect_service_metrics():
+    """
+    Métriques lues dans les statistiques des services à chaque collecte
+
+    Returns:
+        Familles de métriques (voir MetricsRegistry.register_collector)
+    """
+    families = list(cache_samples({
+        "geocoding": geocoding_service.stats()["cache"],
+        "osrm_segment": route_generator.segment_cache.stats(),
+        "elevation_point": elevation_service.point_cache.stats(),
+        "response": response_cache.stats() if response_cache else None,
+        "result": route_generator.result_store.stats() if route_generator.result_store else None,
+        "reachability": route_generator.reachability.stats() if route_generator.reachability else None
+    }))
+
+    http_pool = getattr(app.state, "http_pool", None)
+    upstreams = http_pool.stats()["upstreams"] if http_pool else {}
+    families += [
+        ("upstream_in_flight", "gauge", "Requêtes en cours vers les services externes",
+         [({"upstream": name}, stats["in_flight"]) for name, stats in upstreams.items()]),
+        ("upstream_retries", "counter", "Nouvelles tentatives vers les services externes",
+         [({"upstream": name}, stats["retries"]) for name, stats in upstreams.items()]),
+        ("upstream_hedged", "counter", "Requêtes doublées (hedging)",
+         [({"upstream": name}, stats["hedged"]) for name, stats in upstreams.items()]),
+        ("upstream_circuit_open", "gauge", "Disjoncteur ouvert (1) ou fermé (0)",
+         [({"upstream": name}, int(stats["circuit_breaker"]["state"] != "closed"))
+          for name, stats in upstreams.items() if "circuit_breaker" in stats]),
+    ]
+
+    if response_cache:
+        families.append(("response_cache_coalesced", "counter", "Requêtes identiques partagées en vol",
+                         [({}, response_cache.stats()["coalesced"])]))
+    return families
+
+
+REGISTRY.register_collector(collect_service_metrics)
 
 
 @app.get("/")
@@ -47,6 +157,158 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métriques au format d'exposition texte Prometheus"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/stats")
+async def get_stats():
+    """Statistiques internes (pool HTTP, caches) pour le dimensionnement"""
+    return {
+        "http_pool": app.state.http_pool.stats(),
+        "geocoding": geocoding_service.stats(),
+        "osrm_segment_cache": route_generator.segment_cache.stats(),
+        "distance_solver": route_generator.solver_telemetry.stats(),
+        "elevation_point_cache": elevation_service.point_cache.stats(),
+        "routing_backend": route_generator.routing_backend.stats(),
+        "response_cache": response_cache.stats() if response_cache else None,
+        "result_cache": (
+            route_generator.result_store.stats() if route_generator.result_store else None
+        ),
+        "reachability_index": (
+            route_generator.reachability.stats() if route_generator.reachability else None
+        ),
+        "srtm_tiles": elevation_service.dem.stats() if elevation_service.dem else None,
+        "tracing": TRACER.stats()
+    }
+
+
+def parse_response_fields(fields: Optional[str], output_format: Optional[str]) -> Set[str]:
+    """
+    Valide les paramètres de négociation du format de réponse
+
+    Args:
+        fields: Liste de champs séparés par des virgules
+        output_format: Format de géométrie
+
+    Returns:
+        Ensemble des champs à renvoyer
+
+    Raises:
+        HTTPException: Si un champ ou le format est inconnu
+    """
+    try:
+        return resolve_fields(fields, output_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def generate_route_payload(
+    request: RouteRequest,
+    geocode_result: Tuple[float, float, str],
+    fields: Iterable[str] = DEFAULT_FIELDS,
+    output_format: Optional[str] = None,
+    elevation_memo: Optional[dict] = None,
+    on_candidate: Optional[Callable] = None
+) -> Tuple[dict, str]:
+    """
+    Génère un parcours à partir d'un point de départ déjà géocodé
+
+    Args:
+        request: Paramètres du parcours à générer
+        geocode_result: Tuple (latitude, longitude, adresse résolue)
+        fields: Champs à inclure dans la réponse
+        output_format: Format de géométrie
+        elevation_memo: Mémo des élévations à partager (lots)
+        on_candidate: Appelé à chaque candidat scoré (voir
+            RouteGenerator.generate_route)
+
+    Returns:
+        Tuple (réponse sous forme de dictionnaire avec les champs de
+        RouteResponse, origine du parcours : generated, cached ou fallback)
+
+    Raises:
+        HTTPException: Si la génération échoue
+    """
+    start_lat, start_lon, resolved_address = geocode_result
+
+    coordinates, metrics, elevations, source = await route_generator.generate_route(
+        start_lat, start_lon, request, on_candidate=on_candidate, elevation_memo=elevation_memo
+    )
+
+    if not coordinates:
+        raise HTTPException(
+            status_code=500,
+            detail="Impossible de générer un parcours avec les paramètres fournis"
+        )
+
+    payload = build_route_payload(
+        coordinates,
+        metrics,
+        lambda: route_generator.build_gpx(coordinates, request, elevations),
+        resolved_address,
+        fields,
+        output_format
+    )
+    return payload, source
+
+
+async def route_response_body(
+    request: RouteRequest,
+    geocode_result: Tuple[float, float, str],
+    fields: Set[str],
+    output_format: Optional[str] = None,
+    on_candidate: Optional[Callable] = None
+) -> bytes:
+    """
+    Réponse JSON d'un parcours, partagée entre requêtes identiques
+
+    Les requêtes identiques simultanées partagent une seule génération et
+    la réponse reste en cache (voir ResponseCache), sauf un parcours de
+    repli. on_candidate ne reçoit les candidats que si cet appel lance la
+    génération.
+
+    Args:
+        request: Paramètres du parcours à générer
+        geocode_result: Tuple (latitude, longitude, adresse résolue)
+        fields: Champs à inclure dans la réponse
+        output_format: Format de géométrie
+        on_candidate: Appelé à chaque candidat scoré (diffusion progressive)
+
+    Returns:
+        Corps JSON (champs de RouteResponse)
+
+    Raises:
+        HTTPException: Si la génération échoue
+    """
+    source = None
+
+    # Réponse sérialisée directement, sans reconstruire les modèles pydantic
+    # point par point
+    async def build() -> bytes:
+        nonlocal source
+        current_span().set_attribute("generated", True)
+        payload, source = await generate_route_payload(
+            request, geocode_result, fields, output_format, on_candidate=on_candidate
+        )
+        with span("serialize_json") as serialize_span:
+            body = JSONResponse(payload).body
+            serialize_span.set_attribute("bytes", len(body))
+        return body
+
+    if response_cache is None:
+        return await build()
+    return await response_cache.get_or_create(
+        ResponseCache.make_key(request, *geocode_result, fields, output_format),
+        build,
+        refresh=request.force_refresh,
+        # Pas de mise en cache d'un parcours de repli (aucun candidat routé)
+        cacheable=lambda: source != "fallback"
+    )
+
+
 @app.post(
     "/api/generate-route",
     response_model=RouteResponse,
@@ -55,12 +317,19 @@ async def health_check():
         500: {"model": ErrorResponse}
     }
 )
-async def generate_route(request: RouteRequest):
+@traced("POST /api/generate-route")
+async def generate_route(
+    request: RouteRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    output_format: Optional[str] = Query(None, alias="format", description=FORMAT_DESCRIPTION)
+):
     """
     Génère un parcours d'entraînement personnalisé
 
     Args:
         request: Paramètres du parcours à générer
+        fields: Champs à renvoyer (ex: "metrics,polyline")
+        output_format: Format de géométrie (geojson, polyline5, polyline6, flat)
 
     Returns:
         RouteResponse contenant le parcours généré avec toutes ses métriques
@@ -68,6 +337,13 @@ async def generate_route(request: RouteRequest):
     Raises:
         HTTPException: Si le géocodage échoue ou si la génération échoue
     """
+    selected_fields = parse_response_fields(fields, output_format)
+    current_span().set_attributes(
+        distance_km=request.distance_km,
+        route_type=request.route_type.value,
+        fields=",".join(sorted(selected_fields))
+    )
+
     try:
         # 1. Géocoder l'adresse de départ
         geocode_result = await geocoding_service.geocode(request.start_location)
@@ -78,39 +354,10 @@ async def generate_route(request: RouteRequest):
                 detail=f"Impossible de géocoder l'adresse: {request.start_location}"
             )
 
-        start_lat, start_lon, resolved_address = geocode_result
-
-        # 2. Générer le parcours
-        coordinates, metrics, gpx = await route_generator.generate_route(
-            start_lat, start_lon, request
-        )
-
-        if not coordinates:
-            raise HTTPException(
-                status_code=500,
-                detail="Impossible de générer un parcours avec les paramètres fournis"
-            )
-
-        # 3. Créer le GeoJSON
-        from utils.geo_helpers import coordinates_to_geojson
-        geojson = coordinates_to_geojson(coordinates)
-
-        # 4. Créer la liste des waypoints
-        waypoints = [
-            Coordinates(lat=lat, lon=lon)
-            for lat, lon in coordinates
-        ]
-
-        # 5. Construire la réponse
-        response = RouteResponse(
-            geojson=geojson,
-            gpx=gpx,
-            metrics=RouteMetrics(**metrics),
-            waypoints=waypoints,
-            start_address=resolved_address
-        )
-
-        return response
+        # 2. Générer le parcours (ou réponse partagée par une requête identique)
+        body = await route_response_body(request, geocode_result, selected_fields, output_format)
+        current_span().set_attribute("response_bytes", len(body))
+        return Response(body, media_type="application/json")
 
     except HTTPException:
         raise
@@ -121,6 +368,176 @@ async def generate_route(request: RouteRequest):
         )
 
 
+@app.post("/api/generate-routes", response_model=BatchRouteResponse)
+async def generate_routes(
+    batch: BatchRouteRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    output_format: Optional[str] = Query(None, alias="format", description=FORMAT_DESCRIPTION)
+):
+    """
+    Génère plusieurs parcours en une requête (ex: plan d'entraînement)
+
+    Chaque adresse distincte n'est géocodée qu'une fois ; les parcours sont
+    générés en parallèle (dans les limites globales par service externe) et
+    partagent les caches de segments et d'élévations. Un échec n'interrompt
+    pas le lot : il est reporté sur le parcours concerné.
+
+    Args:
+        batch: Liste des parcours à générer
+        fields: Champs à renvoyer pour chaque parcours
+        output_format: Format de géométrie
+
+    Returns:
+        BatchRouteResponse avec un résultat par parcours, dans l'ordre
+    """
+    selected_fields = parse_response_fields(fields, output_format)
+
+    # 1. Géocoder chaque adresse distincte une seule fois
+    addresses = {}
+    for route_request in batch.routes:
+        addresses.setdefault(normalize_address(route_request.start_location), route_request.start_location)
+
+    geocoded = dict(zip(
+        addresses.keys(),
+        await asyncio.gather(*[geocoding_service.geocode(address) for address in addresses.values()])
+    ))
+
+    # 2. Générer les parcours en parallèle
+    semaphore = asyncio.Semaphore(config.BATCH_MAX_CONCURRENCY)
+    elevation_memo = {}
+
+    async def generate_item(index: int, route_request: RouteRequest) -> dict:
+        geocode_result = geocoded[normalize_address(route_request.start_location)]
+        if not geocode_result:
+            return {
+                "index": index,
+                "route": None,
+                "error": f"Impossible de géocoder l'adresse: {route_request.start_location}"
+            }
+
+        async with semaphore:
+            try:
+                route, _ = await generate_route_payload(
+                    route_request, geocode_result, selected_fields, output_format, elevation_memo
+                )
+                return {"index": index, "route": route, "error": None}
+            except HTTPException as e:
+                return {"index": index, "route": None, "error": e.detail}
+            except Exception as e:
+                return {
+                    "index": index,
+                    "route": None,
+                    "error": f"Erreur lors de la génération du parcours: {str(e)}"
+                }
+
+    results = await asyncio.gather(*[
+        generate_item(index, route_request)
+        for index, route_request in enumerate(batch.routes)
+    ])
+
+    succeeded = sum(1 for item in results if item["route"] is not None)
+    return JSONResponse({
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    })
+
+
+@app.post("/api/generate-route/stream")
+async def generate_route_stream(
+    request: RouteRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    output_format: Optional[str] = Query(None, alias="format", description=FORMAT_DESCRIPTION)
+):
+    """
+    Génère un parcours en diffusant les résultats au fil de l'eau (NDJSON)
+
+    Une ligne JSON par événement :
+    - {"event": "geocode", ...} : point de départ résolu
+    - {"event": "candidate", ...} : chaque candidat scoré (GeoJSON + score)
+    - {"event": "result", "route": RouteResponse} : parcours retenu
+    - {"event": "error", "detail": ...} : échec
+
+    La génération passe par le cache de réponses : une réponse en cache est
+    envoyée immédiatement, et les requêtes identiques simultanées attendent
+    la génération en cours (sans ses événements "candidate").
+
+    Args:
+        request: Paramètres du parcours à générer
+        fields: Champs à renvoyer dans l'événement "result"
+        output_format: Format de géométrie de l'événement "result"
+
+    Returns:
+        StreamingResponse au format application/x-ndjson
+    """
+    selected_fields = parse_response_fields(fields, output_format)
+
+    async def events():
+        geocode_result = await geocoding_service.geocode(request.start_location)
+        if not geocode_result:
+            yield _ndjson({
+                "event": "error",
+                "detail": f"Impossible de géocoder l'adresse: {request.start_location}"
+            })
+            return
+
+        start_lat, start_lon, resolved_address = geocode_result
+        yield _ndjson({
+            "event": "geocode",
+            "lat": start_lat,
+            "lon": start_lon,
+            "start_address": resolved_address
+        })
+
+        # Les candidats sont transmis par le générateur via une file
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def on_candidate(bearing, coordinates, score, distance_km):
+            queue.put_nowait({
+                "event": "candidate",
+                "bearing": bearing,
+                "score": round(score, 3),
+                "distance_km": round(distance_km, 2),
+                "geojson": coordinates_to_geojson(coordinates)
+            })
+
+        task = asyncio.create_task(
+            route_response_body(request, geocode_result, selected_fields, output_format, on_candidate)
+        )
+        get_event = None
+        try:
+            while not task.done() or not queue.empty():
+                get_event = asyncio.ensure_future(queue.get())
+                await asyncio.wait({get_event, task}, return_when=asyncio.FIRST_COMPLETED)
+                if get_event.done():
+                    yield _ndjson(get_event.result())
+                else:
+                    get_event.cancel()
+
+            # Corps déjà sérialisé, inséré tel quel dans l'événement
+            yield b'{"event": "result", "route": ' + task.result() + b'}\n'
+
+        except HTTPException as e:
+            yield _ndjson({"event": "error", "detail": e.detail})
+        except Exception as e:
+            yield _ndjson({
+                "event": "error",
+                "detail": f"Erreur lors de la génération du parcours: {str(e)}"
+            })
+        finally:
+            # Client déconnecté : arrêter la génération
+            task.cancel()
+            if get_event is not None:
+                get_event.cancel()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _ndjson(event: dict) -> str:
+    """Sérialise un événement en une ligne NDJSON"""
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
 # Servir le frontend (désactivé en production Vercel)
 # Vercel sert les fichiers statiques directement
 if not os.getenv("VERCEL"):
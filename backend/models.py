@@ -68,6 +68,16 @@ class RouteRequest(BaseModel):
     surface_preferences: Optional[SurfacePreferences] = Field(default=None, description="Préférences détaillées de type de route")
     surface_types: Optional[SurfaceTypes] = Field(default=None, description="Préférences de revêtement de surface")
 
+    # Recherche bornée dans le temps
+    time_budget_s: Optional[float] = Field(default=None, gt=0, le=120, description="Temps maximum de génération en secondes (défaut serveur si absent)")
+    acceptable_score: Optional[float] = Field(default=None, ge=0, description="Score à partir duquel le premier candidat satisfaisant est retenu")
+
+    # Simplification de la géométrie renvoyée
+    simplify_tolerance_m: Optional[float] = Field(default=None, ge=0, le=100, description="Écart maximal (m) de la géométrie simplifiée, 0 pour la géométrie complète (défaut serveur si absent)")
+
+    # Réutilisation des parcours déjà générés à proximité
+    force_refresh: bool = Field(default=False, description="Ignorer les parcours déjà générés pour une requête similaire et forcer une nouvelle génération")
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -109,18 +119,46 @@ class Coordinates(BaseModel):
 class RouteMetrics(BaseModel):
     """Métriques du parcours"""
     distance_km: float = Field(..., description="Distance réelle du parcours")
-    elevation_gain_m: float = Field(..., description="Dénivelé positif en mètres")
-    elevation_loss_m: float = Field(..., description="Dénivelé négatif en mètres")
+    elevation_gain_m: Optional[float] = Field(..., description="Dénivelé positif en mètres (null si inconnu)")
+    elevation_loss_m: Optional[float] = Field(..., description="Dénivelé négatif en mètres (null si inconnu)")
     estimated_duration_min: Optional[int] = Field(None, description="Durée estimée en minutes")
 
 
 class RouteResponse(BaseModel):
-    """Réponse contenant le parcours généré"""
-    geojson: dict = Field(..., description="Parcours au format GeoJSON")
-    gpx: str = Field(..., description="Parcours au format GPX")
-    metrics: RouteMetrics = Field(..., description="Métriques du parcours")
-    waypoints: List[Coordinates] = Field(..., description="Points de passage du parcours")
-    start_address: str = Field(..., description="Adresse de départ résolue")
+    """
+    Réponse contenant le parcours généré
+
+    Par défaut : geojson, gpx, metrics, waypoints et start_address. Les
+    paramètres ?fields= et ?format= permettent de ne demander que certains
+    champs ou une géométrie compacte (polyline, coordinates).
+    """
+    geojson: Optional[dict] = Field(None, description="Parcours au format GeoJSON")
+    gpx: Optional[str] = Field(None, description="Parcours au format GPX")
+    metrics: Optional[RouteMetrics] = Field(None, description="Métriques du parcours")
+    waypoints: Optional[List[Coordinates]] = Field(None, description="Points de passage du parcours")
+    start_address: Optional[str] = Field(None, description="Adresse de départ résolue")
+    polyline: Optional[str] = Field(None, description="Géométrie au format Encoded Polyline (lat, lon)")
+    polyline_precision: Optional[int] = Field(None, description="Précision de la polyline (5 ou 6 décimales)")
+    coordinates: Optional[List[float]] = Field(None, description="Géométrie aplatie [lat0, lon0, lat1, lon1, ...]")
+
+
+class BatchRouteRequest(BaseModel):
+    """Requête de génération de plusieurs parcours (ex: une semaine d'entraînement)"""
+    routes: List[RouteRequest] = Field(..., min_length=1, max_length=20, description="Parcours à générer")
+
+
+class BatchRouteItem(BaseModel):
+    """Résultat d'un parcours d'un lot"""
+    index: int = Field(..., description="Position du parcours dans la requête")
+    route: Optional[RouteResponse] = Field(None, description="Parcours généré (absent en cas d'échec)")
+    error: Optional[str] = Field(None, description="Cause de l'échec")
+
+
+class BatchRouteResponse(BaseModel):
+    """Réponse de génération de plusieurs parcours"""
+    results: List[BatchRouteItem] = Field(..., description="Résultats dans l'ordre de la requête")
+    succeeded: int = Field(..., description="Nombre de parcours générés")
+    failed: int = Field(..., description="Nombre de parcours en échec")
 
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,144 @@
+import math
+import os
+import logging
+import numpy as np
+from typing import List, Optional, Tuple
+
+from utils.cache import LRUCache
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+# Valeur "pas de donnée" des fichiers SRTM
+SRTM_VOID = -32768
+
+
+class SRTMTileStore:
+    """
+    Modèle numérique de terrain local à partir de tuiles SRTM (.hgt)
+
+    Chaque tuile couvre 1°x1° et est nommée d'après son coin sud-ouest
+    (ex: N48E002.hgt). Les tuiles sont ouvertes en mémoire mappée (seules les
+    pages lues sont chargées) et conservées dans un LRU. Les résolutions
+    SRTM1 (3601x3601) et SRTM3 (1201x1201) sont détectées automatiquement.
+    """
+
+    def __init__(self, directory: str, max_open_tiles: int = 16):
+        self.directory = directory
+        # clé (lat, lon) du coin sud-ouest -> tableau mappé, ou False si absente
+        self.tiles = LRUCache(max_entries=max_open_tiles)
+
+    def lookup(self, coordinates: List[Tuple[float, float]]) -> List[Optional[float]]:
+        """
+        Élévations interpolées (bilinéaire) pour une liste de coordonnées
+
+        Args:
+            coordinates: Liste de tuples (lat, lon)
+
+        Returns:
+            Liste des élévations en mètres (None si tuile absente ou vide)
+        """
+        if not coordinates:
+            return []
+
+        points = np.asarray(coordinates, dtype=np.float64)
+        elevations = self.lookup_arrays(points[:, 0], points[:, 1])
+        return [None if math.isnan(e) else float(e) for e in elevations]
+
+    def lookup_arrays(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Version vectorisée : élévations pour des tableaux de latitudes/longitudes
+
+        Args:
+            lats: Tableau des latitudes
+            lons: Tableau des longitudes
+
+        Returns:
+            Tableau des élévations en mètres (NaN si pas de donnée)
+        """
+        result = np.full(lats.shape, np.nan)
+
+        tile_lats = np.floor(lats).astype(np.int64)
+        tile_lons = np.floor(lons).astype(np.int64)
+        tile_keys = np.stack([tile_lats, tile_lons], axis=1)
+
+        # Traiter les points tuile par tuile
+        for tile_lat, tile_lon in np.unique(tile_keys, axis=0):
+            mask = (tile_lats == tile_lat) & (tile_lons == tile_lon)
+            tile = self._get_tile(int(tile_lat), int(tile_lon))
+            if tile is None:
+                continue
+            result[mask] = self._interpolate(
+                tile, lats[mask] - tile_lat, lons[mask] - tile_lon
+            )
+
+        return result
+
+    def _interpolate(self, tile: np.ndarray, dlat: np.ndarray, dlon: np.ndarray) -> np.ndarray:
+        """
+        Interpolation bilinéaire dans une tuile
+
+        Args:
+            tile: Grille d'élévations (ligne 0 = bord nord)
+            dlat, dlon: Position relative dans la tuile (0..1)
+
+        Returns:
+            Élévations interpolées (NaN si un voisin est vide)
+        """
+        size = tile.shape[0] - 1
+        rows = (1.0 - dlat) * size
+        cols = dlon * size
+
+        r0 = np.clip(np.floor(rows).astype(np.int64), 0, size - 1)
+        c0 = np.clip(np.floor(cols).astype(np.int64), 0, size - 1)
+        fr = rows - r0
+        fc = cols - c0
+
+        # Lecture des 4 voisins (accès aléatoire dans le fichier mappé)
+        z00 = tile[r0, c0].astype(np.float64)
+        z01 = tile[r0, c0 + 1].astype(np.float64)
+        z10 = tile[r0 + 1, c0].astype(np.float64)
+        z11 = tile[r0 + 1, c0 + 1].astype(np.float64)
+
+        values = (
+            z00 * (1 - fr) * (1 - fc)
+            + z01 * (1 - fr) * fc
+            + z10 * fr * (1 - fc)
+            + z11 * fr * fc
+        )
+
+        void = (z00 == SRTM_VOID) | (z01 == SRTM_VOID) | (z10 == SRTM_VOID) | (z11 == SRTM_VOID)
+        values[void] = np.nan
+        return values
+
+    def _get_tile(self, tile_lat: int, tile_lon: int) -> Optional[np.ndarray]:
+        """Retourne la tuile mappée en mémoire (ou None si absente)"""
+        key = (tile_lat, tile_lon)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self._open_tile(tile_lat, tile_lon)
+            self.tiles.set(key, tile if tile is not None else False)
+        return tile if tile is not False else None
+
+    def _open_tile(self, tile_lat: int, tile_lon: int) -> Optional[np.ndarray]:
+        """Ouvre un fichier .hgt en mémoire mappée"""
+        name = "{}{:02d}{}{:03d}.hgt".format(
+            "N" if tile_lat >= 0 else "S", abs(tile_lat),
+            "E" if tile_lon >= 0 else "W", abs(tile_lon)
+        )
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            logger.warning(f"Tuile SRTM absente: {path}")
+            return None
+
+        # Entiers 16 bits signés big-endian, grille carrée
+        data = np.memmap(path, dtype=">i2", mode="r")
+        size = int(math.isqrt(data.size))
+        if size * size != data.size:
+            logger.warning(f"Tuile SRTM invalide: {path}")
+            return None
+        return data.reshape((size, size))
+
+    def stats(self) -> dict:
+        """Statistiques du LRU de tuiles ouvertes"""
+        return self.tiles.stats()
@@ -0,0 +1,184 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+from utils.cache import LRUCache
+
+
+class DetourPrior:
+    """
+    Ratio de détour observé par zone (distance routière / distance à vol d'oiseau)
+
+    Le ratio est moyenné (moyenne exponentielle) par cellule géographique et
+    par type de parcours, à partir des requêtes précédentes. Il sert de
+    point de départ au solveur de distance.
+    """
+
+    def __init__(
+        self,
+        default_ratio: float = 1.3,
+        cell_deg: float = 0.05,
+        smoothing: float = 0.3,
+        max_cells: int = 10000
+    ):
+        self.default_ratio = default_ratio
+        self.cell_deg = cell_deg
+        self.smoothing = smoothing
+        self.ratios = LRUCache(max_entries=max_cells)
+
+    def get(self, lat: float, lon: float, kind: str) -> float:
+        """
+        Ratio de détour attendu autour d'un point
+
+        Args:
+            lat, lon: Point de départ
+            kind: Type de parcours ("loop" ou "out_and_back")
+
+        Returns:
+            Ratio de détour (>= 1 en pratique)
+        """
+        return self.ratios.get(self._key(lat, lon, kind), self.default_ratio)
+
+    def update(self, lat: float, lon: float, kind: str, ratio: float):
+        """
+        Intègre un ratio observé
+
+        Args:
+            lat, lon: Point de départ
+            kind: Type de parcours
+            ratio: Ratio de détour observé
+        """
+        if not math.isfinite(ratio) or ratio <= 0:
+            return
+        key = self._key(lat, lon, kind)
+        previous = self.ratios.get(key)
+        if previous is not None:
+            ratio = previous + self.smoothing * (ratio - previous)
+        self.ratios.set(key, ratio)
+
+    def _key(self, lat: float, lon: float, kind: str) -> Tuple[str, int, int]:
+        return kind, math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+
+class DistanceSolver:
+    """
+    Solveur du facteur d'ajustement pour atteindre une distance cible
+
+    Modèle : distance réelle ≈ ratio_de_détour × cible × facteur.
+    - 1er essai : facteur = 1 / ratio attendu (prior de la zone)
+    - 2e essai : correction proportionnelle avec le ratio observé
+    - ensuite : méthode de la sécante, bornée par l'encadrement
+      (un essai trop court, un essai trop long) dès qu'il existe
+    """
+
+    def __init__(
+        self,
+        target_distance: float,
+        initial_factor: float,
+        min_factor: float = 0.3,
+        max_factor: float = 1.2
+    ):
+        self.target_distance = target_distance
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.factor = self._clamp(initial_factor)
+        self.observations: List[Tuple[float, float]] = []  # (facteur, distance)
+
+    @property
+    def iterations(self) -> int:
+        """Nombre d'essais (appels de routing) effectués"""
+        return len(self.observations)
+
+    @property
+    def detour_ratio(self) -> Optional[float]:
+        """Dernier ratio de détour observé"""
+        if not self.observations:
+            return None
+        factor, actual = self.observations[-1]
+        return actual / (self.target_distance * factor)
+
+    def observe(self, actual_distance: float) -> bool:
+        """
+        Enregistre la distance obtenue avec le facteur courant et calcule le suivant
+
+        Args:
+            actual_distance: Distance réelle du parcours obtenu (km)
+
+        Returns:
+            False si le facteur ne peut plus évoluer (borne atteinte)
+        """
+        self.observations.append((self.factor, actual_distance))
+        next_factor = self._clamp(self._next_factor())
+        progressed = not math.isclose(next_factor, self.factor, rel_tol=1e-4)
+        self.factor = next_factor
+        return progressed
+
+    def _next_factor(self) -> float:
+        factor, actual = self.observations[-1]
+        if actual <= 0:
+            return factor * 1.5
+
+        # Correction proportionnelle (ratio de détour observé)
+        proportional = factor * self.target_distance / actual
+        if len(self.observations) < 2:
+            return proportional
+
+        # Sécante sur les deux derniers essais
+        prev_factor, prev_actual = self.observations[-2]
+        candidate = proportional
+        if factor != prev_factor and actual != prev_actual:
+            slope = (actual - prev_actual) / (factor - prev_factor)
+            if slope > 0:
+                candidate = factor + (self.target_distance - actual) / slope
+
+        # Rester dans l'encadrement s'il existe (fausse position sinon)
+        bracket = self._bracket()
+        if bracket:
+            (low_factor, low_actual), (high_factor, high_actual) = bracket
+            if not min(low_factor, high_factor) < candidate < max(low_factor, high_factor):
+                candidate = low_factor + (self.target_distance - low_actual) * \
+                    (high_factor - low_factor) / (high_actual - low_actual)
+
+        return candidate
+
+    def _bracket(self) -> Optional[Tuple[Tuple[float, float], Tuple[float, float]]]:
+        """Meilleurs essais de part et d'autre de la cible"""
+        below = [o for o in self.observations if o[1] < self.target_distance]
+        above = [o for o in self.observations if o[1] > self.target_distance]
+        if not below or not above:
+            return None
+        return max(below, key=lambda o: o[1]), min(above, key=lambda o: o[1])
+
+    def _clamp(self, factor: float) -> float:
+        return max(self.min_factor, min(self.max_factor, factor))
+
+
+class SolverTelemetry:
+    """Statistiques de convergence du solveur (nombre d'appels de routing)"""
+
+    def __init__(self):
+        self.runs = 0
+        self.converged = 0
+        self.total_iterations = 0
+        self.histogram: Dict[int, int] = {}
+
+    def record(self, iterations: int, converged: bool):
+        """
+        Enregistre le résultat d'un candidat
+
+        Args:
+            iterations: Nombre d'appels de routing effectués
+            converged: True si la tolérance a été atteinte
+        """
+        self.runs += 1
+        self.converged += int(converged)
+        self.total_iterations += iterations
+        self.histogram[iterations] = self.histogram.get(iterations, 0) + 1
+
+    def stats(self) -> dict:
+        """Résumé des itérations par candidat"""
+        return {
+            "candidates": self.runs,
+            "converged": self.converged,
+            "avg_iterations": round(self.total_iterations / self.runs, 2) if self.runs else 0.0,
+            "iterations_histogram": dict(sorted(self.histogram.items()))
+        }
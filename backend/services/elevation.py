@@ -1,102 +1,259 @@
-import httpx
-from typing import List, Tuple
+import asyncio
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+import config
+from services.http_client import HttpClientPool
+from services.dem import SRTMTileStore
+from utils.cache import LRUCache
+from utils.circuit_breaker import CircuitOpenError
+from utils.geo_helpers import cumulative_distances, mirror_index, snap_to_grid
+from utils.tracing import current_span, traced
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
 
 
 class ElevationService:
-    """Service de calcul d'élévation utilisant Open-Elevation API"""
+    """
+    Service de calcul d'élévation
 
-    def __init__(self):
+    Utilise Open-Elevation API, ou des tuiles SRTM locales si
+    ELEVATION_BACKEND = "srtm" (repli sur l'API pour les zones non couvertes)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = config.ELEVATION_MAX_CONCURRENCY,
+        http_pool: Optional[HttpClientPool] = None,
+        backend: str = config.ELEVATION_BACKEND
+    ):
+        self.http_pool = http_pool or HttpClientPool()
         self.base_url = "https://api.open-elevation.com/api/v1/lookup"
+        # Limite le nombre d'appels simultanés à Open-Elevation
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Cache des élévations par point, partagé entre requêtes
+        self.point_grid_deg = config.ELEVATION_CACHE_GRID_DEG
+        self.point_cache = LRUCache(max_entries=config.ELEVATION_CACHE_MAX_POINTS)
+
+        # Échantillonnage le long du parcours et taille des appels à l'API
+        self.sample_spacing_m = config.ELEVATION_SAMPLE_SPACING_M
+        self.max_samples = max(2, config.ELEVATION_MAX_SAMPLES)
+        self.request_max_points = max(1, config.ELEVATION_REQUEST_MAX_POINTS)
+
+        # Modèle de terrain local (optionnel)
+        self.dem = None
+        if backend == "srtm":
+            self.dem = SRTMTileStore(config.SRTM_DIRECTORY, config.SRTM_MAX_OPEN_TILES)
+        elif backend != "open-elevation":
+            raise ValueError(f"Backend d'élévation inconnu: {backend}")
 
-    async def get_elevations(self, coordinates: List[Tuple[float, float]]) -> List[float]:
+    async def get_elevations(
+        self,
+        coordinates: List[Tuple[float, float]],
+        memo: Optional[Dict[Tuple[float, float], float]] = None
+    ) -> Optional[List[float]]:
         """
         Récupère les élévations pour une liste de coordonnées
 
         Args:
             coordinates: Liste de tuples (lat, lon)
+            memo: Mémo de la requête en cours (point arrondi -> élévation),
+                partagé entre le scoring et le calcul des métriques
 
         Returns:
-            Liste des élévations en mètres
+            Liste des élévations en mètres, ou None si elles sont inconnues
+            (tuile absente et API en échec) : jamais de profil plat inventé
         """
         if not coordinates:
             return []
 
-        # Limiter le nombre de points pour éviter les timeouts
-        # Open-Elevation peut gérer jusqu'à 1024 points
-        max_points = 100
-        if len(coordinates) > max_points:
-            # Échantillonner les coordonnées
-            step = len(coordinates) // max_points
-            sampled_coords = coordinates[::step]
+        # Aller-retour : la moitié retour est le miroir de l'aller
+        half = mirror_index(coordinates)
+        if half is not None:
+            outbound = await self.get_elevations(coordinates[:half + 1], memo)
+            if outbound is None:
+                return None
+            return outbound + outbound[-2::-1]
+
+        # Les points OSRM sont très irréguliers (denses dans les virages,
+        # rares dans les lignes droites, encore plus après simplification) :
+        # échantillonner à pas constant le long de la distance cumulée, puis
+        # interpoler selon la distance
+        points = np.asarray(coordinates, dtype=np.float64)
+        distances = cumulative_distances(points) * 1000
+
+        # Tuiles locales : pas de limite du nombre d'échantillons
+        if self.dem is not None:
+            samples = self._sample_distances(distances[-1], max_samples=None)
+            elevations = self.dem.lookup(self._sample_points(points, distances, samples))
+            if None not in elevations:
+                return np.interp(distances, samples, elevations).tolist()
+
+        samples = self._sample_distances(distances[-1], self.max_samples)
+        elevations = await self._lookup_points(self._sample_points(points, distances, samples), memo)
+        if elevations is None:
+            return None
+
+        return np.interp(distances, samples, elevations).tolist()
+
+    @staticmethod
+    def _sample_points(points: np.ndarray, distances: np.ndarray, samples: np.ndarray) -> List[Tuple[float, float]]:
+        """Coordonnées des positions d'échantillonnage (interpolées selon la distance)"""
+        return list(zip(
+            np.interp(samples, distances, points[:, 0]).tolist(),
+            np.interp(samples, distances, points[:, 1]).tolist()
+        ))
+
+    def _sample_distances(self, total_m: float, max_samples: Optional[int]) -> np.ndarray:
+        """
+        Positions d'échantillonnage le long du parcours
+
+        Le pas vaut sample_spacing_m, élargi si nécessaire pour ne pas dépasser
+        max_samples points ; le départ et l'arrivée sont toujours inclus.
+
+        Args:
+            total_m: Longueur du parcours en mètres
+            max_samples: Nombre maximum d'échantillons (None : pas de limite
+                si sample_spacing_m est défini)
+
+        Returns:
+            Distances depuis le départ (mètres), croissantes
+        """
+        if total_m <= 0:
+            return np.zeros(1)
+        if self.sample_spacing_m <= 0:
+            count = max_samples or self.max_samples
         else:
-            sampled_coords = coordinates
+            count = int(np.ceil(total_m / self.sample_spacing_m)) + 1
+            if max_samples is not None:
+                count = min(count, max_samples)
+        return np.linspace(0.0, total_m, count)
 
-        locations = [{"latitude": lat, "longitude": lon} for lat, lon in sampled_coords]
+    async def _lookup_points(
+        self,
+        points: List[Tuple[float, float]],
+        memo: Optional[Dict[Tuple[float, float], float]] = None
+    ) -> Optional[List[float]]:
+        """
+        Élévations de points, en ne demandant à l'API que les points inconnus
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json={"locations": locations},
-                    timeout=30.0
-                )
-                response.raise_for_status()
+        Chaque point est arrondi sur une grille ; la valeur est cherchée dans
+        le mémo de la requête, puis dans le cache partagé entre requêtes. Un
+        point inconnu est demandé à l'API avec ses coordonnées arrondies :
+        la valeur d'une case ne dépend pas du premier parcours qui l'a
+        rencontrée.
 
-                data = response.json()
-                elevations = [result["elevation"] for result in data["results"]]
+        Args:
+            points: Liste de tuples (lat, lon)
+            memo: Mémo de la requête en cours
 
-                # Si on a échantillonné, interpoler les valeurs manquantes
-                if len(coordinates) > max_points:
-                    elevations = self._interpolate_elevations(elevations, len(coordinates))
+        Returns:
+            Liste des élévations ou None si l'API a échoué
+        """
+        if memo is None:
+            memo = {}
 
-                return elevations
+        keys = [snap_to_grid(lat, lon, self.point_grid_deg) for lat, lon in points]
 
-            except Exception as e:
-                print(f"Erreur lors de la récupération des élévations: {e}")
-                # Retourner des élévations nulles en cas d'erreur
-                return [0.0] * len(coordinates)
+        # Points de grille à demander (dédupliqués, dans l'ordre)
+        missing = {}
+        for key in keys:
+            if key in memo or key in missing:
+                continue
+            elevation = self.point_cache.get(key)
+            if elevation is not None:
+                memo[key] = elevation
+            else:
+                missing[key] = None
 
-    def _interpolate_elevations(self, elevations: List[float], target_length: int) -> List[float]:
+        if missing:
+            fetched = await self._fetch_elevations(list(missing))
+            if fetched is None:
+                return None
+            for key, elevation in zip(missing, fetched):
+                memo[key] = elevation
+                self.point_cache.set(key, elevation)
+
+        return [memo[key] for key in keys]
+
+    @traced("elevation_fetch")
+    async def _fetch_elevations(self, points: List[Tuple[float, float]]) -> Optional[List[float]]:
         """
-        Interpole linéairement les élévations pour atteindre la longueur cible
+        Appelle Open-Elevation pour une liste de points
+
+        Au-delà de request_max_points, les points sont découpés en lots
+        envoyés en parallèle (bornés par le sémaphore).
 
         Args:
-            elevations: Liste d'élévations échantillonnées
-            target_length: Longueur cible
+            points: Liste de tuples (lat, lon)
 
         Returns:
-            Liste d'élévations interpolées
+            Liste des élévations ou None en cas d'erreur
         """
-        if not elevations or target_length <= len(elevations):
-            return elevations
+        size = self.request_max_points
+        chunks = await asyncio.gather(*(
+            self._fetch_chunk(points[start:start + size])
+            for start in range(0, len(points), size)
+        ))
+        current_span().set_attributes(point_count=len(points), chunks=len(chunks))
+        if any(chunk is None for chunk in chunks):
+            current_span().set_attribute("failed", True)
+            return None
+        return [elevation for chunk in chunks for elevation in chunk]
 
-        result = []
-        step = (len(elevations) - 1) / (target_length - 1)
+    async def _fetch_chunk(self, points: List[Tuple[float, float]]) -> Optional[List[float]]:
+        """
+        Un appel à Open-Elevation
 
-        for i in range(target_length):
-            pos = i * step
-            idx = int(pos)
-            frac = pos - idx
+        Args:
+            points: Liste de tuples (lat, lon), au plus request_max_points
 
-            if idx >= len(elevations) - 1:
-                result.append(elevations[-1])
-            else:
-                # Interpolation linéaire
-                value = elevations[idx] * (1 - frac) + elevations[idx + 1] * frac
-                result.append(value)
+        Returns:
+            Liste des élévations ou None en cas d'erreur
+        """
+        # Service indisponible : inutile d'attendre le sémaphore
+        if not self.http_pool.is_available("elevation"):
+            return None
+
+        locations = [{"latitude": lat, "longitude": lon} for lat, lon in points]
+
+        async with self.semaphore:
+            try:
+                response = await self.http_pool.post(
+                    "elevation",
+                    self.base_url,
+                    json={"locations": locations}
+                )
+                response.raise_for_status()
+
+                data = response.json()
+                return [result["elevation"] for result in data["results"]]
 
-        return result
+            except CircuitOpenError:
+                return None
+            except Exception as e:
+                logger.warning(f"Erreur lors de la récupération des élévations: {e}")
+                return None
 
-    def calculate_elevation_metrics(self, elevations: List[float]) -> Tuple[float, float]:
+    def calculate_elevation_metrics(
+        self,
+        elevations: Optional[List[float]]
+    ) -> Tuple[Optional[float], Optional[float]]:
         """
         Calcule le dénivelé positif et négatif
 
         Args:
-            elevations: Liste des élévations en mètres
+            elevations: Liste des élévations en mètres, None si inconnues
 
         Returns:
-            Tuple (dénivelé_positif, dénivelé_négatif)
+            Tuple (dénivelé_positif, dénivelé_négatif), (None, None) si les
+            élévations sont inconnues
         """
+        if elevations is None:
+            return None, None
         if len(elevations) < 2:
             return 0.0, 0.0
 
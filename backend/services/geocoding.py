@@ -1,19 +1,62 @@
-import httpx
 from typing import Optional, Tuple
-import time
+import logging
+import re
+import unicodedata
+
+import config
+from services.http_client import HttpClientPool
+from utils.cache import LRUCache, SqliteCache, TieredCache
+from utils.concurrency import AsyncTokenBucket, SingleFlight
+from utils.tracing import current_span, traced
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalise une adresse pour servir de clé de cache
+
+    Casse, accents, ponctuation et espaces sont uniformisés :
+    "Place de la République,  PARIS" -> "place de la republique paris"
+
+    Args:
+        address: Adresse saisie
+
+    Returns:
+        Adresse normalisée
+    """
+    text = unicodedata.normalize("NFKD", address)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.casefold())
+    return " ".join(text.split())
 
 
 class GeocodingService:
     """Service de géocodage utilisant Nominatim (OpenStreetMap)"""
 
-    def __init__(self):
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        self.http_pool = http_pool or HttpClientPool()
         self.base_url = "https://nominatim.openstreetmap.org"
         self.headers = {
             "User-Agent": "StravaCoachPOC/1.0"
         }
-        self.last_request_time = 0
         self.min_request_interval = 1.0  # Respecter la limite de 1 req/sec de Nominatim
-
+        self.rate_limiter = AsyncTokenBucket(rate=1.0 / self.min_request_interval)
+        # Regroupe les requêtes identiques simultanées en un seul appel Nominatim
+        self.single_flight = SingleFlight()
+
+        # Cache des résultats (mémoire + sqlite), y compris les échecs
+        self.positive_ttl = config.GEOCODE_CACHE_TTL
+        self.negative_ttl = config.GEOCODE_NEGATIVE_CACHE_TTL
+        self.reverse_precision = config.REVERSE_GEOCODE_PRECISION
+        self.cache = TieredCache(
+            LRUCache(max_entries=config.GEOCODE_CACHE_MAX_ENTRIES, ttl=self.positive_ttl),
+            SqliteCache(config.GEOCODE_CACHE_PATH, table="geocode")
+            if config.GEOCODE_CACHE_PATH else None
+        )
+
+    @traced("geocode")
     async def geocode(self, address: str) -> Optional[Tuple[float, float, str]]:
         """
         Convertit une adresse en coordonnées GPS
@@ -24,37 +67,79 @@ class GeocodingService:
         Returns:
             Tuple (latitude, longitude, adresse_formatée) ou None si échec
         """
-        # Respecter le rate limit
-        await self._wait_for_rate_limit()
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/search",
-                    params={
-                        "q": address,
-                        "format": "json",
-                        "limit": 1
-                    },
-                    headers=self.headers,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                if not data:
-                    return None
-
-                result = data[0]
-                lat = float(result["lat"])
-                lon = float(result["lon"])
-                display_name = result["display_name"]
-
-                return lat, lon, display_name
-
-            except Exception as e:
-                print(f"Erreur de géocodage: {e}")
+        cache_key = f"search:{normalize_address(address)}"
+        cached = await self.cache.get(cache_key)
+        current_span().set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            if not cached["found"]:
                 return None
+            return cached["lat"], cached["lon"], cached["display_name"]
+
+        return await self.single_flight.do(
+            cache_key, lambda: self._geocode_uncached(address, cache_key)
+        )
+
+    async def _geocode_uncached(
+        self,
+        address: str,
+        cache_key: str
+    ) -> Optional[Tuple[float, float, str]]:
+        """Interroge Nominatim et met le résultat en cache"""
+        result = await self._search(address)
+
+        if result:
+            lat, lon, display_name = result
+            await self.cache.set(
+                cache_key,
+                {"found": True, "lat": lat, "lon": lon, "display_name": display_name},
+                ttl=self.positive_ttl
+            )
+        elif result is not None:
+            await self.cache.set(cache_key, {"found": False}, ttl=self.negative_ttl)
+
+        return result or None
+
+    async def _search(self, address: str) -> Optional[tuple]:
+        """
+        Interroge Nominatim pour une adresse
+
+        Args:
+            address: Adresse à géocoder
+
+        Returns:
+            Tuple (latitude, longitude, adresse_formatée), () si l'adresse est
+            inconnue ou None en cas d'erreur (non mise en cache)
+        """
+        # Respecter le rate limit
+        await self.rate_limiter.acquire()
+
+        try:
+            response = await self.http_pool.get(
+                "nominatim",
+                f"{self.base_url}/search",
+                params={
+                    "q": address,
+                    "format": "json",
+                    "limit": 1
+                },
+                headers=self.headers
+            )
+            response.raise_for_status()
+
+            data = response.json()
+            if not data:
+                return ()
+
+            result = data[0]
+            lat = float(result["lat"])
+            lon = float(result["lon"])
+            display_name = result["display_name"]
+
+            return lat, lon, display_name
+
+        except Exception as e:
+            logger.warning(f"Erreur de géocodage: {e}")
+            return None
 
     async def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
         """
@@ -67,37 +152,76 @@ class GeocodingService:
         Returns:
             Adresse formatée ou None si échec
         """
-        # Respecter le rate limit
-        await self._wait_for_rate_limit()
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/reverse",
-                    params={
-                        "lat": lat,
-                        "lon": lon,
-                        "format": "json"
-                    },
-                    headers=self.headers,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                return data.get("display_name")
-
-            except Exception as e:
-                print(f"Erreur de géocodage inverse: {e}")
-                return None
-
-    async def _wait_for_rate_limit(self):
-        """Attend pour respecter le rate limit de Nominatim"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+        cache_key = (
+            f"reverse:{round(lat, self.reverse_precision)},"
+            f"{round(lon, self.reverse_precision)}"
+        )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached["display_name"] if cached["found"] else None
+
+        return await self.single_flight.do(
+            cache_key, lambda: self._reverse_geocode_uncached(lat, lon, cache_key)
+        )
+
+    async def _reverse_geocode_uncached(
+        self,
+        lat: float,
+        lon: float,
+        cache_key: str
+    ) -> Optional[str]:
+        """Interroge Nominatim et met le résultat en cache"""
+        display_name = await self._reverse(lat, lon)
+
+        if display_name is not None:
+            found = bool(display_name)
+            await self.cache.set(
+                cache_key,
+                {"found": found, "display_name": display_name or None},
+                ttl=self.positive_ttl if found else self.negative_ttl
+            )
+
+        return display_name or None
+
+    async def _reverse(self, lat: float, lon: float) -> Optional[str]:
+        """
+        Interroge Nominatim pour des coordonnées
 
-        if time_since_last_request < self.min_request_interval:
-            wait_time = self.min_request_interval - time_since_last_request
-            time.sleep(wait_time)
+        Args:
+            lat: Latitude
+            lon: Longitude
 
-        self.last_request_time = time.time()
+        Returns:
+            Adresse formatée, "" si aucune adresse ou None en cas d'erreur
+            (non mise en cache)
+        """
+        # Respecter le rate limit
+        await self.rate_limiter.acquire()
+
+        try:
+            response = await self.http_pool.get(
+                "nominatim",
+                f"{self.base_url}/reverse",
+                params={
+                    "lat": lat,
+                    "lon": lon,
+                    "format": "json"
+                },
+                headers=self.headers
+            )
+            response.raise_for_status()
+
+            data = response.json()
+            return data.get("display_name") or ""
+
+        except Exception as e:
+            logger.warning(f"Erreur de géocodage inverse: {e}")
+            return None
+
+    def stats(self) -> dict:
+        """Statistiques du cache, du rate limit et du regroupement des requêtes"""
+        return {
+            "cache": self.cache.stats(),
+            "rate_limiter": self.rate_limiter.stats(),
+            "single_flight": self.single_flight.stats()
+        }
@@ -0,0 +1,307 @@
+import asyncio
+import time
+import httpx
+import logging
+from typing import Dict, Optional
+
+import config
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, backoff_delay
+from utils.metrics import REGISTRY
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+# Métriques par service externe (une observation par tentative)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "upstream_request_duration_seconds", "Durée des requêtes vers les services externes", ["upstream"]
+)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "upstream_requests", "Requêtes vers les services externes par résultat", ["upstream", "outcome"]
+)
+
+
+class HttpClientPool:
+    """
+    Pool de clients HTTP partagés entre les services
+
+    Un client httpx est créé par service externe (nominatim, osrm, elevation)
+    afin que les limites de connexions s'appliquent par hôte. Les connexions
+    sont conservées (keep-alive) entre les requêtes.
+
+    Chaque service a son disjoncteur : quand il est ouvert, les requêtes
+    échouent immédiatement (CircuitOpenError) au lieu d'attendre le timeout.
+    Les erreurs réseau et les réponses 429/5xx sont relancées avec un
+    backoff à gigue, et les GET des services listés dans
+    HTTP_HEDGE_UPSTREAMS sont doublés quand la réponse tarde.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = config.HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections: int = config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = config.HTTP_KEEPALIVE_EXPIRY,
+        connect_timeout: float = config.HTTP_CONNECT_TIMEOUT,
+        timeouts: Optional[Dict[str, float]] = None,
+        http2: bool = config.HTTP2_ENABLED,
+        retries: Optional[Dict[str, int]] = None,
+        circuit_breakers: bool = config.CIRCUIT_BREAKER_ENABLED
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.connect_timeout = connect_timeout
+        self.timeouts = dict(config.HTTP_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        # HTTP/2 nécessite le paquet optionnel "h2" (pip install httpx[http2])
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 demandé mais le paquet 'h2' est absent, utilisation de HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+
+        self.retries = dict(config.HTTP_RETRIES)
+        if retries:
+            self.retries.update(retries)
+        self.hedge_upstreams = set(config.HTTP_HEDGE_UPSTREAMS)
+        self.circuit_breakers = circuit_breakers
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, dict] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get_client(self, name: str) -> httpx.AsyncClient:
+        """
+        Retourne le client partagé d'un service externe (créé à la demande)
+
+        Args:
+            name: Nom du service externe (nominatim, osrm, elevation)
+
+        Returns:
+            Client httpx partagé
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            timeout = httpx.Timeout(
+                self.timeouts.get(name, config.HTTP_DEFAULT_TIMEOUT),
+                connect=self.connect_timeout
+            )
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=timeout,
+                http2=self.http2
+            )
+            self._clients[name] = client
+            self._stats.setdefault(name, {
+                "requests": 0,
+                "errors": 0,
+                "in_flight": 0,
+                "peak_in_flight": 0,
+                "retries": 0,
+                "hedged": 0,
+                "hedge_wins": 0,
+                "rejected": 0
+            })
+        return client
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        """
+        Disjoncteur d'un service externe (créé à la demande)
+
+        Args:
+            name: Nom du service externe
+
+        Returns:
+            Disjoncteur du service
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            timeout = self.timeouts.get(name, config.HTTP_DEFAULT_TIMEOUT)
+            breaker = CircuitBreaker(
+                name,
+                window=config.CIRCUIT_BREAKER_WINDOW,
+                min_calls=config.CIRCUIT_BREAKER_MIN_CALLS,
+                error_rate_threshold=config.CIRCUIT_BREAKER_ERROR_RATE,
+                consecutive_failures=config.CIRCUIT_BREAKER_CONSECUTIVE_FAILURES,
+                open_duration=config.CIRCUIT_BREAKER_OPEN_DURATION,
+                slow_call_s=timeout * config.CIRCUIT_BREAKER_SLOW_RATIO
+            )
+            self._breakers[name] = breaker
+        return breaker
+
+    def is_available(self, name: str) -> bool:
+        """
+        Indique si une requête vers un service serait envoyée maintenant
+
+        Args:
+            name: Nom du service externe
+
+        Returns:
+            False si le disjoncteur du service est ouvert
+        """
+        return not (self.circuit_breakers and self.breaker(name).is_open)
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Exécute une requête HTTP avec le client partagé d'un service
+
+        Args:
+            name: Nom du service externe
+            method: Méthode HTTP
+            url: URL de la requête
+            **kwargs: Arguments transmis à httpx
+
+        Returns:
+            Réponse httpx
+        """
+        client = self.get_client(name)
+        stats = self._stats[name]
+        breaker = self.breaker(name)
+        retries = self.retries.get(name, 0)
+        hedge = method == "GET" and name in self.hedge_upstreams
+
+        attempt = 0
+        while True:
+            if self.circuit_breakers and not breaker.allow_request():
+                stats["rejected"] += 1
+                UPSTREAM_REQUESTS.inc(upstream=name, outcome="rejected")
+                raise CircuitOpenError(name, breaker.retry_after())
+
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+            start = time.monotonic()
+            try:
+                if hedge:
+                    response = await self._send_hedged(client, stats, breaker, method, url, **kwargs)
+                else:
+                    response = await client.request(method, url, **kwargs)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except httpx.TransportError:
+                # Erreur réseau ou timeout : relancée tant qu'il reste des tentatives
+                self._record(name, breaker, False, start, "error")
+                if attempt >= retries:
+                    raise
+            except Exception:
+                self._record(name, breaker, False, start, "error")
+                raise
+            else:
+                # Service saturé ou en erreur : relancé, la dernière réponse
+                # est renvoyée telle quelle (l'appelant vérifie le statut)
+                failed = response.status_code == 429 or response.status_code >= 500
+                self._record(name, breaker, not failed, start, "error" if failed else "ok")
+                if not failed or attempt >= retries:
+                    return response
+            finally:
+                stats["in_flight"] -= 1
+
+            attempt += 1
+            stats["retries"] += 1
+            await asyncio.sleep(
+                backoff_delay(attempt, config.HTTP_RETRY_BACKOFF_BASE, config.HTTP_RETRY_BACKOFF_MAX)
+            )
+
+    def _record(self, name: str, breaker: CircuitBreaker, success: bool, start: float, outcome: str):
+        """Enregistre une tentative (disjoncteur, statistiques, métriques)"""
+        elapsed = time.monotonic() - start
+        breaker.record(success, elapsed)
+        if not success:
+            self._stats[name]["errors"] += 1
+        UPSTREAM_LATENCY.observe(elapsed, upstream=name)
+        UPSTREAM_REQUESTS.inc(upstream=name, outcome=outcome)
+
+    async def _send_hedged(
+        self,
+        client: httpx.AsyncClient,
+        stats: dict,
+        breaker: CircuitBreaker,
+        method: str,
+        url: str,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Envoie une requête, doublée si elle tarde
+
+        Le délai avant la seconde requête est le quantile HTTP_HEDGE_QUANTILE
+        des latences observées : seule la traîne des requêtes lentes est
+        doublée. Tant que la fenêtre du disjoncteur n'a pas assez d'appels,
+        la requête n'est pas doublée.
+        """
+        delay = breaker.latency_quantile(config.HTTP_HEDGE_QUANTILE)
+        primary = asyncio.ensure_future(client.request(method, url, **kwargs))
+        if delay is None:
+            return await primary
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=max(delay, config.HTTP_HEDGE_MIN_DELAY))
+            if done:
+                return primary.result()
+
+            stats["hedged"] += 1
+            secondary = asyncio.ensure_future(client.request(method, url, **kwargs))
+            tasks.add(secondary)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            stats["hedge_wins"] += 1
+                        return task.result()
+
+            # Les deux requêtes ont échoué : l'erreur de la première est propagée
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def get(self, name: str, url: str, **kwargs) -> httpx.Response:
+        """Requête GET via le client partagé d'un service"""
+        return await self.request(name, "GET", url, **kwargs)
+
+    async def post(self, name: str, url: str, **kwargs) -> httpx.Response:
+        """Requête POST via le client partagé d'un service"""
+        return await self.request(name, "POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        """
+        Statistiques d'utilisation du pool, pour dimensionner les limites
+
+        Returns:
+            Dictionnaire de statistiques par service externe
+        """
+        result = {
+            "http2": self.http2,
+            "max_connections_per_host": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "upstreams": {}
+        }
+
+        for name, client in self._clients.items():
+            upstream = dict(self._stats[name])
+            if self.circuit_breakers:
+                upstream["circuit_breaker"] = self.breaker(name).stats()
+            # Les connexions ouvertes sont lues sur le pool httpcore (best effort)
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = getattr(pool, "connections", None)
+            if connections is not None:
+                upstream["open_connections"] = len(connections)
+                upstream["idle_connections"] = sum(1 for c in connections if c.is_idle())
+            result["upstreams"][name] = upstream
+
+        return result
+
+    async def aclose(self):
+        """Ferme toutes les connexions du pool"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
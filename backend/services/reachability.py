@@ -0,0 +1,182 @@
+import math
+import logging
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+import config
+from services.routing import RoutingBackend
+from utils.cache import LRUCache
+from utils.concurrency import SingleFlight
+from utils.geo_helpers import destination_points, geohash_decode, geohash_encode
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+
+class ReachabilityCell:
+    """
+    Distances routières depuis le centre d'une cellule vers des points
+    répartis sur des cercles (plusieurs rayons, plusieurs directions)
+    """
+
+    def __init__(self, bearings: Sequence[float], radii_km: Sequence[float], road_km: np.ndarray):
+        self.bearings = np.asarray(bearings, dtype=np.float64)
+        self.radii_km = np.asarray(radii_km, dtype=np.float64)
+        # road_km[i, j] : distance routière vers le rayon j dans la direction i
+        # (NaN si le point n'est pas atteignable)
+        self.road_km = road_km
+
+    def turnaround_radius(self, bearing: float, road_km: float) -> Optional[float]:
+        """
+        Distance à vol d'oiseau du point de demi-tour atteint après road_km de route
+
+        Interpolation linéaire entre les rayons encadrant road_km dans la
+        direction indexée la plus proche ; au-delà des rayons indexés, le
+        ratio de détour du rayon extrême est extrapolé.
+
+        Args:
+            bearing: Direction en degrés
+            road_km: Distance routière souhaitée jusqu'au point
+
+        Returns:
+            Rayon en km, ou None si la direction n'a aucun point atteignable
+        """
+        row = self.road_km[self._nearest_bearing(bearing)]
+        known = np.isfinite(row) & (row > 0)
+        if not known.any():
+            return None
+        radii, roads = self.radii_km[known], row[known]
+
+        if road_km <= roads[0]:
+            return road_km * radii[0] / roads[0]
+        above = np.flatnonzero(roads >= road_km)
+        if len(above) == 0:
+            return road_km * radii[-1] / roads[-1]
+
+        j = int(above[0])
+        return float(np.interp(road_km, [roads[j - 1], roads[j]], [radii[j - 1], radii[j]]))
+
+    def detour_ratio(self, bearings: Sequence[float], max_radius_km: float) -> Optional[float]:
+        """
+        Ratio de détour moyen (distance routière / vol d'oiseau) autour du départ
+
+        Args:
+            bearings: Directions prises en compte
+            max_radius_km: Rayons au-delà de celui-ci ignorés (le plus petit
+                rayon est toujours pris en compte)
+
+        Returns:
+            Ratio moyen, ou None si aucun point n'est atteignable
+        """
+        columns = self.radii_km <= max(max_radius_km, self.radii_km[0])
+        rows = sorted({self._nearest_bearing(bearing) for bearing in bearings})
+        ratios = self.road_km[np.ix_(rows, np.flatnonzero(columns))] / self.radii_km[columns]
+        ratios = ratios[np.isfinite(ratios) & (ratios > 0)]
+        if len(ratios) == 0:
+            return None
+        return float(np.mean(ratios))
+
+    def _nearest_bearing(self, bearing: float) -> int:
+        differences = np.abs((self.bearings - bearing + 180) % 360 - 180)
+        return int(np.argmin(differences))
+
+
+class ReachabilityIndex:
+    """
+    Index de joignabilité par point de départ, réutilisé entre requêtes
+
+    Pour chaque cellule geohash (et profil / filtre de voies), les distances
+    routières vers des points de demi-tour candidats sont calculées une fois
+    (un seul appel "table" au backend de routing) puis conservées dans un
+    LRU. Les générateurs y choisissent directement la distance du point de
+    demi-tour au lieu d'itérer sur des appels de routing.
+    """
+
+    def __init__(
+        self,
+        routing_backend: RoutingBackend,
+        radii_km: Sequence[float] = config.REACHABILITY_RADII_KM,
+        bearing_count: int = config.REACHABILITY_BEARINGS,
+        precision: int = config.REACHABILITY_GEOHASH_PRECISION
+    ):
+        self.routing_backend = routing_backend
+        self.radii_km = sorted(radii_km)
+        self.bearings = [i * 360 / bearing_count for i in range(bearing_count)]
+        self.precision = precision
+        self.cells = LRUCache(
+            max_entries=config.REACHABILITY_CACHE_MAX_CELLS,
+            ttl=config.REACHABILITY_CACHE_TTL
+        )
+        # Un calcul lancé va à son terme même si la requête qui l'a demandé
+        # abandonne (budget de temps) : la cellule servira aux suivantes
+        self.single_flight = SingleFlight(detached=True)
+
+    async def get(
+        self,
+        lat: float,
+        lon: float,
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[ReachabilityCell]:
+        """
+        Index de la cellule contenant le point (calculé au premier appel)
+
+        Args:
+            lat, lon: Point de départ
+            profile: Profil de routing
+            edge_filter: Classes de voies à éviter
+
+        Returns:
+            Index de la cellule, ou None si le backend ne sait pas calculer
+            les distances
+        """
+        key = (geohash_encode(lat, lon, self.precision), profile, *edge_filter)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = await self.single_flight.do(key, lambda: self._build_and_store(key, profile, edge_filter))
+        return cell or None
+
+    async def _build_and_store(
+        self,
+        key: tuple,
+        profile: str,
+        edge_filter: Tuple[str, ...]
+    ) -> Optional[ReachabilityCell]:
+        """Calcule l'index d'une cellule et le conserve (même sans appelant)"""
+        cell = await self._build(key[0], profile, edge_filter)
+        if cell is not None:
+            self.cells.set(key, cell)
+        elif self.routing_backend.available():
+            # Échec mémorisé brièvement pour ne pas relancer à chaque requête
+            # (pas pendant une indisponibilité du backend : la cellule sera
+            # calculée dès son retour)
+            self.cells.set(key, False, ttl=300)
+        return cell
+
+    async def _build(
+        self,
+        geohash: str,
+        profile: str,
+        edge_filter: Tuple[str, ...]
+    ) -> Optional[ReachabilityCell]:
+        """Calcule l'index d'une cellule depuis son centre"""
+        center = geohash_decode(geohash)
+
+        bearings = np.repeat(self.bearings, len(self.radii_km))
+        radii = np.tile(self.radii_km, len(self.bearings))
+        lats, lons = destination_points(center[0], center[1], radii, bearings)
+        destinations: List[Tuple[float, float]] = list(zip(lats.tolist(), lons.tolist()))
+
+        distances = await self.routing_backend.distances(center, destinations, profile, edge_filter)
+        if distances is None:
+            return None
+
+        road_km = np.array(
+            [math.nan if value is None else value for value in distances], dtype=np.float64
+        ).reshape(len(self.bearings), len(self.radii_km))
+        logger.info(f"Index de joignabilité calculé pour la cellule {geohash} ({profile})")
+        return ReachabilityCell(self.bearings, self.radii_km, road_km)
+
+    def stats(self) -> dict:
+        """Statistiques du cache de cellules"""
+        return {**self.cells.stats(), "single_flight": self.single_flight.stats()}
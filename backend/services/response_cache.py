@@ -0,0 +1,116 @@
+import json
+from typing import Awaitable, Callable, Iterable, Optional
+
+import config
+from models import RouteRequest
+from utils.cache import LRUCache
+from utils.concurrency import SingleFlight
+
+
+class ResponseCache:
+    """
+    Cache des réponses complètes (JSON déjà sérialisé) de /api/generate-route
+
+    La clé est la requête normalisée et le point de départ résolu : deux
+    athlètes qui soumettent la même requête partagée reçoivent la même
+    réponse. Les requêtes identiques simultanées partagent une seule
+    génération (SingleFlight). Le cache est borné en nombre d'entrées et en
+    octets, avec une durée de vie courte.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = config.RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = config.RESPONSE_CACHE_MAX_BYTES,
+        ttl: float = config.RESPONSE_CACHE_TTL
+    ):
+        self.cache = LRUCache(max_entries=max_entries, ttl=ttl, max_weight=max_bytes, weigher=len)
+        self.single_flight = SingleFlight()
+
+    @staticmethod
+    def make_key(
+        request: RouteRequest,
+        start_lat: float,
+        start_lon: float,
+        start_address: str,
+        fields: Iterable[str],
+        output_format: Optional[str]
+    ) -> str:
+        """
+        Clé d'une réponse
+
+        L'adresse saisie est remplacée par le point de départ résolu ; les
+        options qui ne changent pas la réponse (force_refresh) sont ignorées.
+
+        Args:
+            request: Paramètres de la requête
+            start_lat, start_lon: Point de départ résolu
+            start_address: Adresse résolue (renvoyée dans la réponse)
+            fields: Champs demandés
+            output_format: Format de géométrie
+
+        Returns:
+            Clé (JSON canonique)
+        """
+        return json.dumps({
+            "request": request.model_dump(mode="json", exclude={"start_location", "force_refresh"}),
+            "start": [round(start_lat, 6), round(start_lon, 6), start_address],
+            "fields": sorted(fields),
+            "format": output_format
+        }, sort_keys=True)
+
+    async def get_or_create(
+        self,
+        key: str,
+        build: Callable[[], Awaitable[bytes]],
+        refresh: bool = False,
+        cacheable: Optional[Callable[[], bool]] = None
+    ) -> bytes:
+        """
+        Réponse en cache, ou générée une seule fois pour tous les appelants
+
+        Args:
+            key: Clé de la réponse (voir make_key)
+            build: Fabrique de la réponse sérialisée
+            refresh: Ignorer l'entrée en cache (la nouvelle réponse la remplace)
+            cacheable: Évalué après la génération ; False pour ne pas conserver
+                la réponse (ex: parcours de repli pendant une panne)
+
+        Returns:
+            Corps de la réponse (JSON)
+        """
+        if refresh:
+            return await self._build(key, build, cacheable)
+
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        return await self.single_flight.do(key, lambda: self._build(key, build, cacheable))
+
+    async def _build(
+        self,
+        key: str,
+        build: Callable[[], Awaitable[bytes]],
+        cacheable: Optional[Callable[[], bool]]
+    ) -> bytes:
+        body = await build()
+        if cacheable is None or cacheable():
+            self.cache.set(key, body)
+        return body
+
+    def stats(self) -> dict:
+        """Taux de succès, requêtes coalescées et occupation (octets)"""
+        stats = self.cache.stats()
+        coalesced = self.single_flight.stats()["coalesced"]
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "entries": stats["entries"],
+            "bytes": stats["weight"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "coalesced": coalesced,
+            "hit_ratio": stats["hit_ratio"],
+            # Réponses non générées : servies depuis le cache ou partagées en vol
+            "shared_ratio": round((stats["hits"] + coalesced) / lookups, 3) if lookups else 0.0,
+            "evictions": stats["evictions"]
+        }
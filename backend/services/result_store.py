@@ -0,0 +1,154 @@
+import math
+import time
+from typing import List, Optional, Tuple
+
+import config
+from models import RouteRequest
+from utils.cache import LRUCache
+from utils.geo_helpers import haversine_distance
+
+# Résultat d'une génération : (coordonnées, métriques, profil d'élévation)
+RouteResult = Tuple[List[Tuple[float, float]], dict, List[float]]
+
+
+class RouteResultStore:
+    """
+    Parcours déjà générés, réutilisables pour des requêtes quasi identiques
+
+    Les parcours sont rangés par variante (type de parcours, dénivelé,
+    préférences de surface, simplification), par cellule de grille du point
+    de départ et par tranche de distance (tranches de largeur relative
+    distance_tolerance, sur une échelle logarithmique). Une requête cherche
+    dans les cellules et tranches voisines un parcours dont le départ est à
+    moins de start_radius_m et dont la distance réelle est dans la tolérance.
+    """
+
+    # Parcours conservés par (variante, cellule, tranche)
+    MAX_PER_SLOT = 4
+
+    def __init__(
+        self,
+        start_radius_m: float = config.RESULT_CACHE_START_RADIUS_M,
+        distance_tolerance: float = config.RESULT_CACHE_DISTANCE_TOLERANCE,
+        ttl: float = config.RESULT_CACHE_TTL
+    ):
+        self.start_radius_m = start_radius_m
+        self.distance_tolerance = distance_tolerance
+        self.ttl = ttl
+        # Cellules d'environ start_radius_m de côté
+        self.cell_deg = start_radius_m / 111_320
+        self.slots = LRUCache(
+            max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+            ttl=ttl,
+            max_weight=config.RESULT_CACHE_MAX_POINTS,
+            weigher=lambda entries: sum(len(entry["coordinates"]) for entry in entries)
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def find(self, start_lat: float, start_lon: float, request: RouteRequest) -> Optional[RouteResult]:
+        """
+        Cherche un parcours compatible avec la requête
+
+        Args:
+            start_lat, start_lon: Point de départ résolu
+            request: Paramètres de la requête
+
+        Returns:
+            Tuple (coordonnées, métriques, profil d'élévation) ou None
+        """
+        variant = self._variant(request)
+        row, col = self._cell(start_lat, start_lon)
+        bucket = self._bucket(request.distance_km)
+        # Une cellule en longitude est plus étroite qu'en latitude (cos(lat))
+        col_span = math.ceil(1 / max(math.cos(math.radians(start_lat)), 0.1))
+        now = time.monotonic()
+
+        best = None
+        best_gap = float("inf")
+        for r in (row - 1, row, row + 1):
+            for c in range(col - col_span, col + col_span + 1):
+                for b in (bucket - 1, bucket, bucket + 1):
+                    for entry in self.slots.get((variant, r, c, b), ()):
+                        if entry["expires_at"] <= now:
+                            continue
+                        start_gap = haversine_distance(start_lat, start_lon, *entry["start"]) * 1000
+                        distance_gap = abs(entry["distance_km"] - request.distance_km) / request.distance_km
+                        if start_gap > self.start_radius_m or distance_gap > self.distance_tolerance:
+                            continue
+                        # Préférer le départ le plus proche puis la distance la plus juste
+                        gap = start_gap / self.start_radius_m + distance_gap / self.distance_tolerance
+                        if gap < best_gap:
+                            best_gap = gap
+                            best = entry
+
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return best["coordinates"], best["metrics"], best["elevations"]
+
+    def add(
+        self,
+        start_lat: float,
+        start_lon: float,
+        request: RouteRequest,
+        result: RouteResult
+    ):
+        """
+        Enregistre un parcours généré
+
+        Args:
+            start_lat, start_lon: Point de départ résolu
+            request: Paramètres de la requête
+            result: Tuple (coordonnées, métriques, profil d'élévation)
+        """
+        coordinates, metrics, elevations = result
+        key = (
+            self._variant(request),
+            *self._cell(start_lat, start_lon),
+            self._bucket(metrics["distance_km"])
+        )
+        now = time.monotonic()
+        entries = [entry for entry in self.slots.get(key, ()) if entry["expires_at"] > now]
+        entries.append({
+            "start": (start_lat, start_lon),
+            "distance_km": metrics["distance_km"],
+            "coordinates": coordinates,
+            "metrics": metrics,
+            "elevations": elevations,
+            "expires_at": now + self.ttl
+        })
+        self.slots.set(key, entries[-self.MAX_PER_SLOT:])
+
+    def stats(self) -> dict:
+        """Taux de réutilisation et occupation du cache"""
+        lookups = self.hits + self.misses
+        slots = self.slots.stats()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "slots": slots["entries"],
+            "points": slots["weight"],
+            "evictions": slots["evictions"]
+        }
+
+    @staticmethod
+    def _variant(request: RouteRequest) -> tuple:
+        """Paramètres qui doivent être identiques pour réutiliser un parcours"""
+        # training_type n'en fait pas partie : il ne change ni le tracé ni les
+        # métriques, seulement le nom du GPX, construit à partir de la requête
+        surfaces = request.surface_preferences
+        return (
+            request.route_type.value,
+            request.elevation_preference.value,
+            tuple(sorted(surfaces.model_dump().items())) if surfaces else None,
+            request.simplify_tolerance_m
+        )
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _bucket(self, distance_km: float) -> int:
+        return math.floor(math.log(max(distance_km, 1e-3)) / math.log1p(self.distance_tolerance))
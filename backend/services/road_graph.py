@@ -0,0 +1,699 @@
+import heapq
+import json
+import math
+import os
+import logging
+import xml.etree.ElementTree as ET
+import numpy as np
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils.geo_helpers import EARTH_RADIUS_KM, calculate_bearing, haversine_distances
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+# Classes d'arêtes (une par champ de SurfacePreferences) et valeurs du tag
+# OSM "highway" correspondantes
+EDGE_CLASSES = {
+    "highway": ("motorway", "motorway_link", "trunk", "trunk_link"),
+    "primary": ("primary", "primary_link"),
+    "secondary": ("secondary", "secondary_link", "tertiary", "tertiary_link"),
+    "residential": ("residential", "living_street", "unclassified", "service", "road"),
+    "cycleway": ("cycleway",),
+    "footway": ("footway", "pedestrian", "steps", "corridor"),
+    "path": ("path",),
+    "track": ("track",),
+    "trail": (),  # sentiers de montagne (path avec sac_scale), voir _edge_class
+    "bridleway": ("bridleway",),
+}
+CLASS_NAMES = list(EDGE_CLASSES)
+_HIGHWAY_CLASS = {
+    value: CLASS_NAMES.index(name)
+    for name, values in EDGE_CLASSES.items()
+    for value in values
+}
+
+# Profil piéton : voies interdites sauf autorisation explicite
+FOOT_FORBIDDEN_HIGHWAYS = {"motorway", "motorway_link"}
+FOOT_ALLOWED_VALUES = {"yes", "designated", "permissive", "official"}
+ACCESS_DENIED_VALUES = {"no", "private"}
+
+# Format du fichier binaire (tableaux alignés, lisibles en mémoire mappée)
+GRAPH_MAGIC = b"SCGRAPH1"
+GRAPH_ALIGNMENT = 64
+
+# Coordonnées stockées en entiers (précision native OSM : 1e-7 degré)
+COORD_SCALE = 1e7
+
+# Taille des cellules de l'index spatial (accrochage des points de passage)
+GRID_CELL_DEG = 0.005
+_GRID_OFFSET = 1 << 20
+
+
+class GraphLoop(NamedTuple):
+    """Boucle trouvée dans le graphe (voir RoadGraph.find_loops)"""
+    coordinates: List[Tuple[float, float]]
+    length_km: float
+    overlap_km: float  # tronçon commun parcouru à l'aller et au retour
+    bearing: float  # direction du point le plus éloigné depuis le départ
+    score: float  # écart relatif à la cible + pénalité de chevauchement
+
+
+class RoadGraph:
+    """
+    Graphe routier compact (CSR) construit à partir d'un extrait OSM
+
+    Les nœuds sont les nœuds OSM des voies praticables ; chaque arête relie
+    deux nœuds consécutifs d'une voie (la géométrie est donc exacte). Les
+    arêtes sortantes d'un nœud u sont targets[indptr[u]:indptr[u + 1]],
+    avec leur longueur en mètres (float32) et leur classe (voir
+    EDGE_CLASSES). Le graphe inverse (arêtes entrantes) sert à la recherche
+    arrière de l'A* bidirectionnel.
+    """
+
+    ARRAYS = (
+        "node_lat", "node_lon",
+        "indptr", "targets", "weights", "classes",
+        "rev_indptr", "rev_sources", "rev_weights", "rev_classes",
+        "grid_keys", "grid_nodes",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray], profile: str = "foot"):
+        self.profile = profile
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_lat)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    # --- Construction ---------------------------------------------------------
+
+    @classmethod
+    def from_osm(cls, path: str, profile: str = "foot") -> "RoadGraph":
+        """
+        Construit le graphe à partir d'un extrait OSM (.osm, .osm.pbf)
+
+        Le format PBF nécessite le paquet optionnel "osmium" (pyosmium).
+
+        Args:
+            path: Chemin de l'extrait
+            profile: Profil de routing (seul "foot" est supporté)
+
+        Returns:
+            Graphe routier
+        """
+        if profile != "foot":
+            raise ValueError(f"Profil de routing non supporté: {profile}")
+
+        if path.endswith(".pbf"):
+            nodes, ways = _read_pbf(path)
+        else:
+            nodes, ways = _read_osm_xml(path)
+        return cls.from_ways(nodes, ways, profile)
+
+    @classmethod
+    def from_ways(
+        cls,
+        nodes: Dict[int, Tuple[float, float]],
+        ways: Iterable[Tuple[Sequence[int], int, int]],
+        profile: str = "foot"
+    ) -> "RoadGraph":
+        """
+        Construit le graphe à partir de voies déjà filtrées
+
+        Args:
+            nodes: Coordonnées (lat, lon) par identifiant de nœud OSM
+            ways: Voies (identifiants des nœuds, classe, sens) où le sens vaut
+                0 (double sens), 1 (sens des nœuds) ou -1 (sens inverse)
+            profile: Profil de routing
+
+        Returns:
+            Graphe routier
+        """
+        sources, targets, classes = [], [], []
+        for refs, edge_class, oneway in ways:
+            for a, b in zip(refs[:-1], refs[1:]):
+                # Nœuds hors de l'extrait : la voie est coupée à cet endroit
+                if a == b or a not in nodes or b not in nodes:
+                    continue
+                if oneway >= 0:
+                    sources.append(a)
+                    targets.append(b)
+                    classes.append(edge_class)
+                if oneway <= 0:
+                    sources.append(b)
+                    targets.append(a)
+                    classes.append(edge_class)
+
+        # Renuméroter les nœuds utilisés (0..n-1)
+        osm_ids = np.unique(np.asarray(sources + targets, dtype=np.int64))
+        node_index = np.searchsorted(osm_ids, np.asarray(sources, dtype=np.int64))
+        target_index = np.searchsorted(osm_ids, np.asarray(targets, dtype=np.int64))
+
+        coords = np.asarray([nodes[int(osm_id)] for osm_id in osm_ids], dtype=np.float64).reshape(-1, 2)
+        weights = haversine_distances(
+            coords[node_index, 0], coords[node_index, 1],
+            coords[target_index, 0], coords[target_index, 1]
+        ) * 1000
+        edge_classes = np.asarray(classes, dtype=np.uint8)
+
+        n = len(osm_ids)
+        indptr, order = _csr(node_index, n)
+        rev_indptr, rev_order = _csr(target_index, n)
+
+        grid_keys = _grid_keys(coords[:, 0], coords[:, 1])
+        grid_nodes = np.argsort(grid_keys, kind="stable").astype(np.int32)
+
+        arrays = {
+            "node_lat": np.round(coords[:, 0] * COORD_SCALE).astype(np.int32),
+            "node_lon": np.round(coords[:, 1] * COORD_SCALE).astype(np.int32),
+            "indptr": indptr,
+            "targets": target_index[order].astype(np.int32),
+            "weights": weights[order].astype(np.float32),
+            "classes": edge_classes[order],
+            "rev_indptr": rev_indptr,
+            "rev_sources": node_index[rev_order].astype(np.int32),
+            "rev_weights": weights[rev_order].astype(np.float32),
+            "rev_classes": edge_classes[rev_order],
+            "grid_keys": grid_keys[grid_nodes],
+            "grid_nodes": grid_nodes,
+        }
+        logger.info(f"Graphe {profile}: {n} nœuds, {len(order)} arêtes")
+        return cls(arrays, profile)
+
+    # --- Sérialisation --------------------------------------------------------
+
+    def save(self, path: str):
+        """
+        Écrit le graphe dans un fichier binaire mappable en mémoire
+
+        Format : GRAPH_MAGIC, longueur de l'en-tête (uint32), en-tête JSON
+        (profil, dtype/forme/position de chaque tableau), puis les tableaux
+        bruts alignés sur GRAPH_ALIGNMENT octets.
+
+        Args:
+            path: Chemin du fichier
+        """
+        layout = {}
+        offset = 0
+        for name in self.ARRAYS:
+            array = np.ascontiguousarray(getattr(self, name))
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += _aligned(array.nbytes)
+
+        header = json.dumps({"profile": self.profile, "arrays": layout}).encode()
+        data_start = _aligned(len(GRAPH_MAGIC) + 4 + len(header))
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(GRAPH_MAGIC)
+            f.write(np.uint32(len(header)).tobytes())
+            f.write(header)
+            for name in self.ARRAYS:
+                array = np.ascontiguousarray(getattr(self, name))
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        """
+        Ouvre un graphe sauvegardé (tableaux en mémoire mappée, démarrage
+        immédiat : seules les pages lues sont chargées)
+
+        Args:
+            path: Chemin du fichier
+
+        Returns:
+            Graphe routier
+        """
+        with open(path, "rb") as f:
+            if f.read(len(GRAPH_MAGIC)) != GRAPH_MAGIC:
+                raise ValueError(f"Fichier de graphe invalide: {path}")
+            header_length = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+            header = json.loads(f.read(header_length))
+
+        data_start = _aligned(len(GRAPH_MAGIC) + 4 + header_length)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+            if shape[0] == 0:
+                arrays[name] = np.zeros(shape, dtype=spec["dtype"])
+                continue
+            # Vue ndarray simple : l'indexation des sous-classes memmap est lente
+            arrays[name] = np.memmap(
+                path, dtype=spec["dtype"], mode="r",
+                offset=data_start + spec["offset"], shape=shape
+            ).view(np.ndarray)
+        return cls(arrays, header["profile"])
+
+    # --- Requêtes -------------------------------------------------------------
+
+    def coordinates(self, node: int) -> Tuple[float, float]:
+        """Coordonnées (lat, lon) d'un nœud"""
+        return int(self.node_lat[node]) / COORD_SCALE, int(self.node_lon[node]) / COORD_SCALE
+
+    def nearest_node(self, lat: float, lon: float) -> Optional[int]:
+        """
+        Nœud le plus proche d'un point (cellule du point et cellules voisines)
+
+        Args:
+            lat, lon: Coordonnées du point
+
+        Returns:
+            Index du nœud, ou None si aucun nœud à proximité
+        """
+        row = math.floor(lat / GRID_CELL_DEG) + _GRID_OFFSET
+        col = math.floor(lon / GRID_CELL_DEG) + _GRID_OFFSET
+
+        candidates = []
+        for r in (row - 1, row, row + 1):
+            low = (r << 32) + col - 1
+            start = np.searchsorted(self.grid_keys, low, side="left")
+            end = np.searchsorted(self.grid_keys, low + 2, side="right")
+            candidates.append(self.grid_nodes[start:end])
+
+        nodes = np.concatenate(candidates)
+        if len(nodes) == 0:
+            return None
+
+        distances = haversine_distances(
+            lat, lon,
+            self.node_lat[nodes] / COORD_SCALE, self.node_lon[nodes] / COORD_SCALE
+        )
+        return int(nodes[int(np.argmin(distances))])
+
+    def shortest_path(
+        self,
+        source: int,
+        target: int,
+        excluded_classes: int = 0
+    ) -> Optional[Tuple[List[int], float]]:
+        """
+        Plus court chemin par A* bidirectionnel
+
+        Les deux recherches (avant depuis la source, arrière depuis la cible)
+        utilisent la distance à vol d'oiseau comme heuristique ; on développe
+        toujours la file de plus petite clé et on s'arrête quand cette clé
+        dépasse la meilleure connexion trouvée.
+
+        Args:
+            source: Nœud de départ
+            target: Nœud d'arrivée
+            excluded_classes: Masque des classes d'arêtes interdites
+                (bit i = CLASS_NAMES[i])
+
+        Returns:
+            Tuple (nœuds du chemin, longueur en mètres) ou None si pas de chemin
+        """
+        if source == target:
+            return [source], 0.0
+
+        searches = (
+            (self.indptr, self.targets, self.weights, self.classes, self._heuristic(target)),
+            (self.rev_indptr, self.rev_sources, self.rev_weights, self.rev_classes, self._heuristic(source)),
+        )
+        distances = ({source: 0.0}, {target: 0.0})
+        parents = ({source: -1}, {target: -1})
+        settled = (set(), set())
+        heaps = ([(searches[0][4](source), source)], [(searches[1][4](target), target)])
+
+        best = math.inf
+        meeting = -1
+
+        while heaps[0] and heaps[1]:
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            key, u = heapq.heappop(heaps[side])
+            if key >= best:
+                break
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+
+            indptr, neighbours, weights, classes, heuristic = searches[side]
+            distance, other = distances[side], distances[1 - side]
+            start, end = int(indptr[u]), int(indptr[u + 1])
+            du = distance[u]
+
+            for v, w, c in zip(
+                neighbours[start:end].tolist(),
+                weights[start:end].tolist(),
+                classes[start:end].tolist()
+            ):
+                if excluded_classes >> c & 1:
+                    continue
+                dv = du + w
+                if dv < distance.get(v, math.inf):
+                    distance[v] = dv
+                    parents[side][v] = u
+                    heapq.heappush(heaps[side], (dv + heuristic(v), v))
+                    if v in other and dv + other[v] < best:
+                        best = dv + other[v]
+                        meeting = v
+
+        if meeting < 0:
+            return None
+
+        path = []
+        node = meeting
+        while node >= 0:
+            path.append(node)
+            node = parents[0][node]
+        path.reverse()
+        node = parents[1][meeting]
+        while node >= 0:
+            path.append(node)
+            node = parents[1][node]
+
+        return path, best
+
+    def shortest_path_tree(
+        self,
+        source: int,
+        max_distance_m: float,
+        excluded_classes: int = 0
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Arbre des plus courts chemins depuis source (Dijkstra borné)
+
+        Args:
+            source: Nœud racine
+            max_distance_m: Distance au-delà de laquelle les nœuds sont ignorés
+            excluded_classes: Masque des classes d'arêtes interdites
+
+        Returns:
+            Tuple (distances en mètres, inf si non atteint ; parent de chaque
+            nœud, -1 pour la racine et les nœuds non atteints ; profondeur)
+        """
+        distance = {source: 0.0}
+        parent = {source: -1}
+        depth = {source: 0}
+        settled = set()
+        heap = [(0.0, source)]
+
+        while heap:
+            du, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+
+            start, end = int(self.indptr[u]), int(self.indptr[u + 1])
+            for v, w, c in zip(
+                self.targets[start:end].tolist(),
+                self.weights[start:end].tolist(),
+                self.classes[start:end].tolist()
+            ):
+                if excluded_classes >> c & 1:
+                    continue
+                dv = du + w
+                if dv <= max_distance_m and dv < distance.get(v, math.inf):
+                    distance[v] = dv
+                    parent[v] = u
+                    depth[v] = depth[u] + 1
+                    heapq.heappush(heap, (dv, v))
+
+        nodes = np.fromiter(distance.keys(), dtype=np.int64, count=len(distance))
+        distances = np.full(self.node_count, np.inf)
+        distances[nodes] = np.fromiter(distance.values(), dtype=np.float64, count=len(nodes))
+        parents = np.full(self.node_count, -1, dtype=np.int64)
+        parents[nodes] = np.fromiter(parent.values(), dtype=np.int64, count=len(nodes))
+        depths = np.zeros(self.node_count, dtype=np.int64)
+        depths[nodes] = np.fromiter(depth.values(), dtype=np.int64, count=len(nodes))
+        return distances, parents, depths
+
+    def find_loops(
+        self,
+        source: int,
+        target_m: float,
+        excluded_classes: int = 0,
+        overlap_penalty: float = 1.0,
+        max_candidates: int = 500,
+        bearing_bins: int = 36
+    ) -> List[GraphLoop]:
+        """
+        Boucles de longueur proche de target_m passant par source
+
+        Chaque arête (u, v) hors de l'arbre des plus courts chemins ferme un
+        cycle : source -> u (arbre), u -> v, v -> source (arbre). Sa longueur
+        d(u) + w(u, v) + d(v) est calculée pour toutes les arêtes en une
+        opération vectorisée ; les plus proches de la cible sont ensuite
+        pénalisées selon le tronçon commun aux deux branches (de la source
+        au plus proche ancêtre commun de u et v), parcouru deux fois.
+
+        Les branches de l'arbre sont parcourues dans les deux sens : adapté
+        au profil piéton (pas de sens unique en pratique).
+
+        Args:
+            source: Nœud de départ
+            target_m: Longueur cible en mètres
+            excluded_classes: Masque des classes d'arêtes interdites
+            overlap_penalty: Poids de la fraction de boucle parcourue deux fois
+            max_candidates: Nombre d'arêtes évaluées (les plus proches de la cible)
+            bearing_bins: Nombre de secteurs de direction ; seule la meilleure
+                boucle de chaque secteur est conservée
+
+        Returns:
+            Boucles triées par score croissant
+        """
+        distances, parents, depths = self.shortest_path_tree(
+            source, target_m * 0.6, excluded_classes
+        )
+
+        sources = self._edge_sources()
+        lengths = distances[sources] + self.weights + distances[self.targets]
+        candidates = (
+            np.isfinite(lengths)
+            & (parents[self.targets] != sources)
+            & (parents[sources] != self.targets)
+            # Une seule fois chaque arête double sens (les sens uniques sont gardés)
+            & ((sources < self.targets) | ~self._has_reverse_edge())
+        )
+        if excluded_classes:
+            candidates &= (excluded_classes >> self.classes.astype(np.int64) & 1) == 0
+
+        errors = np.abs(lengths - target_m)
+        edges = np.flatnonzero(candidates)
+        edges = edges[np.argsort(errors[edges], kind="stable")[:max_candidates]]
+
+        origin = self.coordinates(source)
+        best_per_bin: Dict[int, Tuple[float, int, int, float, float, float]] = {}
+        for edge in edges.tolist():
+            u, v = int(sources[edge]), int(self.targets[edge])
+            ancestor = self._common_ancestor(parents, depths, u, v)
+            length = float(lengths[edge])
+            overlap = float(distances[ancestor])
+            score = float(errors[edge]) / target_m + overlap_penalty * 2 * overlap / length
+
+            far = u if distances[u] >= distances[v] else v
+            bearing = calculate_bearing(*origin, *self.coordinates(far))
+            key = int(bearing * bearing_bins / 360) % bearing_bins
+            if key not in best_per_bin or score < best_per_bin[key][0]:
+                best_per_bin[key] = (score, u, v, length, overlap, bearing)
+
+        loops = []
+        for score, u, v, length, overlap, bearing in sorted(best_per_bin.values()):
+            nodes = self._tree_path(parents, u) + self._tree_path(parents, v)[::-1]
+            loops.append(GraphLoop(
+                coordinates=[self.coordinates(node) for node in nodes],
+                length_km=length / 1000,
+                overlap_km=overlap / 1000,
+                bearing=bearing,
+                score=score
+            ))
+        return loops
+
+    def _edge_sources(self) -> np.ndarray:
+        """Nœud d'origine de chaque arête (calculé une fois)"""
+        if getattr(self, "_sources", None) is None:
+            self._sources = np.repeat(
+                np.arange(self.node_count, dtype=np.int32), np.diff(self.indptr)
+            )
+        return self._sources
+
+    def _has_reverse_edge(self) -> np.ndarray:
+        """Indique pour chaque arête (u, v) si l'arête (v, u) existe (calculé une fois)"""
+        if getattr(self, "_reverse", None) is None:
+            sources = self._edge_sources().astype(np.int64)
+            targets = self.targets.astype(np.int64)
+            keys = sources * self.node_count + targets
+            self._reverse = np.isin(targets * self.node_count + sources, keys)
+        return self._reverse
+
+    @staticmethod
+    def _tree_path(parents: np.ndarray, node: int) -> List[int]:
+        """Chemin de la racine jusqu'à node dans l'arbre"""
+        path = []
+        while node >= 0:
+            path.append(node)
+            node = int(parents[node])
+        path.reverse()
+        return path
+
+    @staticmethod
+    def _common_ancestor(parents: np.ndarray, depths: np.ndarray, u: int, v: int) -> int:
+        """Plus proche ancêtre commun de u et v dans l'arbre"""
+        while depths[u] > depths[v]:
+            u = int(parents[u])
+        while depths[v] > depths[u]:
+            v = int(parents[v])
+        while u != v:
+            u, v = int(parents[u]), int(parents[v])
+        return u
+
+    def _heuristic(self, goal: int):
+        """Distance à vol d'oiseau (m) vers goal, légèrement minorée"""
+        goal_lat, goal_lon = (math.radians(value) for value in self.coordinates(goal))
+        cos_goal = math.cos(goal_lat)
+        scale = EARTH_RADIUS_KM * 1000 * 2 * 0.999  # marge pour l'arrondi float32
+        cache = {}
+
+        def heuristic(node: int) -> float:
+            value = cache.get(node)
+            if value is None:
+                lat, lon = (math.radians(v) for v in self.coordinates(node))
+                a = math.sin((lat - goal_lat) / 2) ** 2 + \
+                    math.cos(lat) * cos_goal * math.sin((lon - goal_lon) / 2) ** 2
+                value = cache[node] = scale * math.asin(math.sqrt(min(a, 1.0)))
+            return value
+
+        return heuristic
+
+    def stats(self) -> dict:
+        """Taille du graphe"""
+        return {
+            "profile": self.profile,
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+        }
+
+
+def excluded_classes_mask(names: Iterable[str]) -> int:
+    """
+    Masque binaire des classes d'arêtes à exclure
+
+    Args:
+        names: Noms de classes (voir EDGE_CLASSES)
+
+    Returns:
+        Masque (bit i = CLASS_NAMES[i])
+    """
+    mask = 0
+    for name in names:
+        mask |= 1 << CLASS_NAMES.index(name)
+    return mask
+
+
+def _edge_class(tags: Dict[str, str]) -> Optional[Tuple[int, int]]:
+    """
+    Classe et sens d'une voie pour le profil piéton
+
+    Args:
+        tags: Tags OSM de la voie
+
+    Returns:
+        Tuple (classe, sens) ou None si la voie n'est pas praticable à pied
+    """
+    highway = tags.get("highway")
+    if highway not in _HIGHWAY_CLASS:
+        return None
+
+    foot = tags.get("foot")
+    if foot == "no":
+        return None
+    if foot not in FOOT_ALLOWED_VALUES:
+        if highway in FOOT_FORBIDDEN_HIGHWAYS:
+            return None
+        if tags.get("access") in ACCESS_DENIED_VALUES:
+            return None
+
+    edge_class = _HIGHWAY_CLASS[highway]
+    if highway == "path" and tags.get("sac_scale", "hiking") != "hiking":
+        edge_class = CLASS_NAMES.index("trail")
+
+    # Le sens unique des véhicules ne s'applique pas aux piétons
+    oneway = {"yes": 1, "-1": -1}.get(tags.get("oneway:foot"), 0)
+    return edge_class, oneway
+
+
+def _read_osm_xml(path: str) -> Tuple[Dict[int, Tuple[float, float]], List[Tuple[List[int], int, int]]]:
+    """Lit un extrait OSM XML (nœuds puis voies praticables)"""
+    nodes = {}
+    ways = []
+    for _, element in ET.iterparse(path, events=("end",)):
+        if element.tag == "node":
+            nodes[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+            element.clear()
+        elif element.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+            way = _edge_class(tags)
+            if way is not None:
+                ways.append(([int(nd.get("ref")) for nd in element.iter("nd")], *way))
+            element.clear()
+    return nodes, ways
+
+
+def _read_pbf(path: str) -> Tuple[Dict[int, Tuple[float, float]], List[Tuple[List[int], int, int]]]:
+    """Lit un extrait OSM PBF (nécessite pyosmium)"""
+    try:
+        import osmium
+    except ImportError:
+        raise ValueError("La lecture des fichiers .pbf nécessite le paquet 'osmium'")
+
+    nodes = {}
+    ways = []
+
+    class Handler(osmium.SimpleHandler):
+        def way(self, way):
+            result = _edge_class(dict(way.tags))
+            if result is None:
+                return
+            refs = []
+            for node in way.nodes:
+                if node.location.valid():
+                    nodes[node.ref] = (node.location.lat, node.location.lon)
+                    refs.append(node.ref)
+            ways.append((refs, *result))
+
+    Handler().apply_file(path, locations=True)
+    return nodes, ways
+
+
+def _csr(rows: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pointeurs CSR et ordre de tri des arêtes par nœud d'origine"""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, order
+
+
+def _grid_keys(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Clé de cellule de l'index spatial (ligne << 32 | colonne)"""
+    rows = np.floor(lats / GRID_CELL_DEG).astype(np.int64) + _GRID_OFFSET
+    cols = np.floor(lons / GRID_CELL_DEG).astype(np.int64) + _GRID_OFFSET
+    return (rows << 32) + cols
+
+
+def _aligned(size: int) -> int:
+    return -(-size // GRAPH_ALIGNMENT) * GRAPH_ALIGNMENT
+
+
+if __name__ == "__main__":
+    # Construction hors ligne : python -m services.road_graph extrait.osm.pbf graphe.bin
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Construit le graphe routier local")
+    parser.add_argument("extract", help="Extrait OSM (.osm ou .osm.pbf)")
+    parser.add_argument("output", help="Fichier de graphe à écrire")
+    parser.add_argument("--profile", default="foot")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    graph = RoadGraph.from_osm(args.extract, args.profile)
+    graph.save(args.output)
+    print(f"Graphe écrit dans {args.output}: {graph.stats()}")
@@ -1,100 +1,449 @@
-import httpx
-import gpxpy
-import gpxpy.gpx
+import asyncio
 import logging
-from typing import List, Tuple, Optional
-from datetime import datetime
+import time
+from typing import Awaitable, Callable, List, Tuple, Optional
 
 from utils.geo_helpers import (
     haversine_distance,
     calculate_total_distance,
-    calculate_bearing,
     destination_point,
-    coordinates_to_geojson
+    snap_to_grid,
+    mirror_index,
+    simplify_coordinates
 )
 from services.elevation import ElevationService
-from models import RouteRequest, ElevationPreference, RouteType
+from services.http_client import HttpClientPool
+from services.routing import RoutingBackend, create_routing_backend
+from services.reachability import ReachabilityIndex
+from services.result_store import RouteResultStore
+from services.distance_solver import DetourPrior, DistanceSolver, SolverTelemetry
+from utils.cache import LRUCache, SqliteCache, TieredCache
+from utils.gpx_writer import write_gpx
+from utils.metrics import REGISTRY
+from utils.tracing import current_span, iteration_spans, traced
+from models import RouteRequest, RouteType
+import config
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
 
+# Parcours calculé par le backend : (coordonnées, distance routée en km)
+RoutedCandidate = Tuple[List[Tuple[float, float]], float]
+
+# Résultat d'un candidat : (coordonnées ou None, score, coordonnées simplifiées
+# ou None, distance routée en km ou None)
+CandidateResult = Tuple[
+    Optional[List[Tuple[float, float]]], float, Optional[List[Tuple[float, float]]], Optional[float]
+]
+
+# Métriques de génération ("source" : generated, cached ou fallback)
+GENERATION_DURATION = REGISTRY.histogram(
+    "route_generation_duration_seconds", "Durée de génération d'un parcours", ["route_type", "source"]
+)
+DISTANCE_ERROR = REGISTRY.histogram(
+    "route_distance_error_ratio", "Écart relatif entre distance obtenue et distance demandée",
+    ["route_type", "source"], buckets=(0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+)
+CANDIDATES = REGISTRY.histogram(
+    "route_candidates", "Candidats terminés avec un parcours, par requête",
+    ["route_type"], buckets=(0, 1, 2, 3, 4, 5, 6, 7, 8)
+)
+SOLVER_ITERATIONS = REGISTRY.histogram(
+    "route_solver_iterations", "Appels de routing par candidat (itérations jusqu'à convergence)",
+    ["kind", "bearing", "converged"], buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+)
+
 
 class RouteGenerator:
     """Service de génération de parcours"""
 
-    def __init__(self, elevation_service: ElevationService):
+    def __init__(
+        self,
+        elevation_service: ElevationService,
+        osrm_max_concurrency: int = config.OSRM_MAX_CONCURRENCY,
+        http_pool: Optional[HttpClientPool] = None,
+        routing_backend: Optional[RoutingBackend] = None
+    ):
         self.elevation_service = elevation_service
-        # OSRM public instance
-        self.osrm_base_url = "https://router.project-osrm.org"
-
+        # Moteur de routing (OSRM distant ou graphe local)
+        self.routing_backend = routing_backend or create_routing_backend(
+            http_pool=http_pool, osrm_max_concurrency=osrm_max_concurrency
+        )
+
+        # Budget de temps et score suffisant par défaut (surchargeables par requête)
+        self.time_budget = config.ROUTE_TIME_BUDGET_S
+        self.acceptable_score = config.ROUTE_ACCEPTABLE_SCORE
+
+        # Ratio de détour appris par zone et statistiques de convergence
+        self.detour_prior = DetourPrior()
+        self.solver_telemetry = SolverTelemetry()
+
+        # Parcours déjà générés, servis aux requêtes quasi identiques
+        self.result_store = RouteResultStore() if config.RESULT_CACHE_ENABLED else None
+
+        # Distances routières précalculées autour des points de départ
+        self.reachability = (
+            ReachabilityIndex(self.routing_backend) if config.REACHABILITY_INDEX_ENABLED else None
+        )
+
+        # Cache des segments OSRM, extrémités arrondies sur une grille
+        self.segment_grid_deg = config.SEGMENT_CACHE_GRID_DEG
+        self.segment_cache = TieredCache(
+            LRUCache(
+                max_entries=config.SEGMENT_CACHE_MAX_ENTRIES,
+                ttl=config.SEGMENT_CACHE_TTL,
+                max_weight=config.SEGMENT_CACHE_MAX_POINTS,
+                weigher=lambda value: len(value["coordinates"])
+            ),
+            SqliteCache(config.SEGMENT_CACHE_PATH, table="osrm_routes")
+            if config.SEGMENT_CACHE_PATH else None
+        )
+
+    @traced("generate_route")
     async def generate_route(
         self,
         start_lat: float,
         start_lon: float,
-        request: RouteRequest
-    ) -> Tuple[List[Tuple[float, float]], dict, str]:
+        request: RouteRequest,
+        on_candidate: Optional[Callable[[float, List[Tuple[float, float]], float, float], None]] = None,
+        elevation_memo: Optional[dict] = None
+    ) -> Tuple[List[Tuple[float, float]], dict, List[float], str]:
         """
         Génère un parcours complet
 
+        Le GPX n'est pas généré ici : voir build_gpx, appelé uniquement si
+        le client le demande. La géométrie renvoyée est simplifiée (voir
+        _simplify_route) ; la distance est celle calculée par le backend de
+        routing sur le tracé complet.
+
+        Un parcours déjà généré pour une requête quasi identique (départ
+        proche, distance dans la tolérance, mêmes préférences) est renvoyé
+        directement, sauf si request.force_refresh. Si le backend de routing
+        est indisponible (disjoncteur ouvert), la recherche de candidats est
+        sautée : parcours similaire en cache (même avec force_refresh) ou
+        parcours de repli.
+
         Args:
             start_lat: Latitude du point de départ
             start_lon: Longitude du point de départ
             request: Paramètres de la requête
+            on_candidate: Appelé avec (direction, coordonnées simplifiées, score,
+                distance en km) dès qu'un candidat est scoré, pour une
+                diffusion progressive
+            elevation_memo: Mémo des élévations à réutiliser (ex: partagé
+                entre les parcours d'un lot)
 
         Returns:
-            Tuple (coordonnées, métriques, gpx)
+            Tuple (coordonnées simplifiées, métriques, profil d'élévation,
+            origine du parcours : "generated", "cached" ou "fallback")
         """
-        # Générer plusieurs candidats de parcours dans différentes directions
-        best_route = None
-        best_score = float('inf')
+        started = time.perf_counter()
+        current_span().set_attributes(target_km=request.distance_km, route_type=request.route_type.value)
+        if self.result_store is not None and not request.force_refresh:
+            cached = self.result_store.find(start_lat, start_lon, request)
+            if cached is not None:
+                logger.info("Parcours similaire déjà généré, réutilisé")
+                self._record_generation(request, "cached", started, cached[1])
+                return (*cached, "cached")
 
+        # Générer plusieurs candidats de parcours dans différentes directions
         # Choisir la méthode de génération selon le type de parcours
         if request.route_type == RouteType.LOOP:
             logger.info("Génération d'un parcours en boucle")
-            # Essayer 8 directions différentes pour les boucles
-            for bearing in range(0, 360, 45):
-                route = await self._generate_loop_route(
+
+            generate_loop = (
+                self._generate_graph_loop_route if config.LOOP_STRATEGY == "graph"
+                else self._generate_loop_route
+            )
+
+            def build_candidate(bearing):
+                return generate_loop(
                     start_lat, start_lon, request.distance_km, bearing, request
                 )
-
-                if route:
-                    score = await self._score_route(route, request)
-                    if score < best_score:
-                        best_score = score
-                        best_route = route
         else:  # OUT_AND_BACK ou BOTH (pour l'instant on traite BOTH comme OUT_AND_BACK)
             logger.info("Génération d'un parcours aller-retour")
             # Calculer la distance pour l'aller (la moitié de la distance totale)
             one_way_distance = request.distance_km / 2
 
-            # Essayer 8 directions différentes
-            for bearing in range(0, 360, 45):
-                route = await self._generate_out_and_back_route(
+            def build_candidate(bearing):
+                return self._generate_out_and_back_route(
                     start_lat, start_lon, one_way_distance, bearing, request
                 )
 
-                if route:
-                    score = await self._score_route(route, request)
-                    if score < best_score:
-                        best_score = score
-                        best_route = route
-
-        if not best_route:
+        # Mémo des élévations de la requête (partagé scoring / métriques)
+        if elevation_memo is None:
+            elevation_memo = {}
+
+        # Évaluer les 8 directions en parallèle (les appels externes sont
+        # bornés par les sémaphores de chaque service)
+        bearings = list(range(0, 360, 45))
+
+        tolerance_m = self._simplify_tolerance(request)
+
+        def on_result(index, result):
+            route, score, simplified, distance = result
+            if on_candidate and route:
+                on_candidate(bearings[index], simplified, score, distance)
+
+        if self.routing_backend.available():
+            results = await self._run_candidates(
+                [
+                    self._evaluate_candidate(build_candidate(bearing), bearing, request, elevation_memo)
+                    for bearing in bearings
+                ],
+                time_budget=request.time_budget_s or self.time_budget,
+                acceptable_score=self._acceptable_score(request),
+                on_result=on_result
+            )
+        else:
+            # Backend de routing indisponible (disjoncteur ouvert) : pas de
+            # candidats, un parcours déjà généré à proximité ou le fallback
+            logger.warning("Backend de routing indisponible, candidats ignorés")
+            if self.result_store is not None and request.force_refresh:
+                cached = self.result_store.find(start_lat, start_lon, request)
+                if cached is not None:
+                    self._record_generation(request, "cached", started, cached[1])
+                    return (*cached, "cached")
+            results = []
+
+        # Sélection déterministe : les résultats sont dans l'ordre des directions,
+        # en cas d'égalité la première direction l'emporte
+        best_route = None
+        simplified_route = None
+        best_distance = None
+        best_score = float('inf')
+        for route, score, simplified, distance in results:
+            if route and score < best_score:
+                best_score = score
+                best_route = route
+                simplified_route = simplified
+                best_distance = distance
+        CANDIDATES.observe(sum(1 for route, *_ in results if route), route_type=request.route_type.value)
+
+        fallback = not best_route
+        if fallback:
             # Fallback: route simple en ligne droite
             best_route = await self._generate_simple_route(
                 start_lat, start_lon, request.distance_km
             )
+            simplified_route = self._simplify_route(best_route, tolerance_m)
+            best_distance = calculate_total_distance(best_route)
+
+        # Calculer les métriques (distance routée du tracé complet, élévation
+        # et réponse sur le tracé simplifié, déjà calculé pendant le scoring)
+        metrics, elevations = await self._calculate_route_metrics(
+            best_route, request.distance_km, elevation_memo, simplified_route, best_distance
+        )
+
+        # Un parcours choisi sans élévations n'est pas conservé pour les suivants
+        if self.result_store is not None and not fallback and elevations is not None:
+            self.result_store.add(
+                start_lat, start_lon, request, (simplified_route, metrics, elevations)
+            )
+
+        source = "fallback" if fallback else "generated"
+        self._record_generation(request, source, started, metrics)
+        return simplified_route, metrics, elevations, source
+
+    def _record_generation(self, request: RouteRequest, source: str, started: float, metrics: dict):
+        """
+        Métriques d'un parcours renvoyé (durée, écart à la distance demandée)
+
+        Args:
+            request: Paramètres de la requête
+            source: Origine du parcours (generated, cached ou fallback)
+            started: Début de la génération (time.perf_counter)
+            metrics: Métriques du parcours
+        """
+        route_type = request.route_type.value
+        current_span().set_attributes(
+            source=source, distance_km=metrics["distance_km"], elevation_gain_m=metrics["elevation_gain_m"]
+        )
+        GENERATION_DURATION.observe(time.perf_counter() - started, route_type=route_type, source=source)
+        DISTANCE_ERROR.observe(
+            abs(metrics["distance_km"] - request.distance_km) / request.distance_km,
+            route_type=route_type, source=source
+        )
+
+    async def _run_candidates(
+        self,
+        candidates: List[Awaitable[CandidateResult]],
+        time_budget: float,
+        acceptable_score: float,
+        on_result: Optional[Callable[[int, CandidateResult], None]] = None
+    ) -> List[CandidateResult]:
+        """
+        Exécute les candidats en parallèle avec un budget de temps
+
+        La recherche s'arrête dès qu'un candidat atteint le score acceptable
+        ou quand le budget est écoulé ; les candidats restants sont annulés.
+
+        Args:
+            candidates: Coroutines d'évaluation (génération + score), voir
+                _evaluate_candidate
+            time_budget: Temps maximum en secondes
+            acceptable_score: Score à partir duquel on arrête la recherche
+            on_result: Appelé avec (index, résultat) à chaque candidat terminé
+
+        Returns:
+            Résultats (coordonnées, score, coordonnées simplifiées, distance)
+            des candidats terminés, dans l'ordre des candidats
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_budget
+
+        tasks = [asyncio.create_task(candidate) for candidate in candidates]
+        results = {}
+        pending = set(tasks)
+
+        try:
+            while pending:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    logger.warning(f"Budget de {time_budget:.1f}s écoulé, "
+                                   f"{len(pending)} candidat(s) abandonné(s)")
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=tasks.index):
+                    index = tasks.index(task)
+                    results[index] = self._candidate_result(index, task)
+                    if on_result:
+                        on_result(index, results[index])
+
+                if any(route and score <= acceptable_score for route, score, *_ in results.values()):
+                    if pending:
+                        logger.info(f"Candidat satisfaisant trouvé, "
+                                    f"{len(pending)} candidat(s) annulé(s)")
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return [results[index] for index in sorted(results)]
+
+    @staticmethod
+    def _candidate_result(
+        index: int,
+        task: asyncio.Task
+    ) -> CandidateResult:
+        """
+        Résultat d'un candidat terminé, sans propager son échec
+
+        Un candidat annulé (ex: délai d'un appel partagé) ou en erreur compte
+        comme un candidat sans parcours : les autres candidats restent
+        utilisables.
+
+        Args:
+            index: Rang du candidat
+            task: Tâche terminée du candidat
+
+        Returns:
+            Tuple (coordonnées ou None, score, coordonnées simplifiées ou
+            None, distance ou None)
+        """
+        if task.cancelled():
+            logger.warning(f"Candidat {index} annulé")
+            return None, float('inf'), None, None
+        error = task.exception()
+        if error is not None:
+            logger.warning(f"Échec du candidat {index}: {error!r}")
+            return None, float('inf'), None, None
+        return task.result()
+
+    def _acceptable_score(self, request: RouteRequest) -> float:
+        """
+        Score jugé suffisant pour arrêter la recherche
+
+        Par défaut : écart de distance dans la tolérance (±2%) et dénivelé
+        conforme à la préférence (voir _score_route).
+
+        Args:
+            request: Paramètres de la requête
+
+        Returns:
+            Score seuil
+        """
+        if request.acceptable_score is not None:
+            return request.acceptable_score
+        if self.acceptable_score is not None:
+            return self.acceptable_score
+        return request.distance_km * 0.02 * 10
+
+    def _simplify_tolerance(self, request: RouteRequest) -> float:
+        """Tolérance de simplification de la requête (défaut serveur sinon)"""
+        if request.simplify_tolerance_m is not None:
+            return request.simplify_tolerance_m
+        return config.SIMPLIFY_TOLERANCE_M
+
+    def _simplify_route(
+        self,
+        coordinates: List[Tuple[float, float]],
+        tolerance_m: float
+    ) -> List[Tuple[float, float]]:
+        """
+        Simplifie la géométrie d'un parcours
 
-        # Calculer les métriques
-        metrics = await self._calculate_route_metrics(best_route, request.distance_km)
+        Un aller-retour symétrique est simplifié sur l'aller puis recopié en
+        miroir, pour rester détectable comme tel par le service d'élévation.
 
-        # Générer le GeoJSON
-        geojson = coordinates_to_geojson(best_route)
+        Args:
+            coordinates: Coordonnées complètes du parcours
+            tolerance_m: Écart maximal toléré en mètres
 
-        # Générer le GPX
-        gpx = self._generate_gpx(best_route, request)
+        Returns:
+            Coordonnées simplifiées
+        """
+        half = mirror_index(coordinates)
+        if half is not None:
+            outbound = simplify_coordinates(coordinates[:half + 1], tolerance_m)
+            return outbound + outbound[-2::-1]
+        return simplify_coordinates(coordinates, tolerance_m)
+
+    @traced("candidate")
+    async def _evaluate_candidate(
+        self,
+        candidate: Awaitable[Optional[RoutedCandidate]],
+        bearing: float,
+        request: RouteRequest,
+        elevation_memo: Optional[dict] = None
+    ) -> CandidateResult:
+        """
+        Génère puis score un parcours candidat
 
-        return best_route, metrics, gpx
+        Le tracé simplifié sert au scoring et est renvoyé pour être réutilisé
+        (diffusion du candidat, réponse) sans le recalculer, de même que la
+        distance routée.
+
+        Args:
+            candidate: Coroutine de génération du parcours
+            bearing: Direction du candidat en degrés (traces)
+            request: Paramètres de la requête
+            elevation_memo: Mémo des élévations de la requête
+
+        Returns:
+            Tuple (coordonnées ou None, score, coordonnées simplifiées ou
+            None, distance ou None)
+        """
+        current_span().set_attribute("bearing", bearing)
+        routed = await candidate
+        if not routed:
+            return None, float('inf'), None, None
+
+        route, distance = routed
+        simplified_route = self._simplify_route(route, self._simplify_tolerance(request))
+        score = await self._score_route(route, request, elevation_memo, simplified_route, distance)
+        current_span().set_attributes(
+            point_count=len(route),
+            simplified_point_count=len(simplified_route),
+            distance_km=round(distance, 3),
+            score=round(score, 3)
+        )
+        return route, score, simplified_route, distance
 
     async def _generate_loop_route(
         self,
@@ -103,7 +452,7 @@ class RouteGenerator:
         total_distance: float,
         initial_bearing: float,
         request: RouteRequest
-    ) -> Optional[List[Tuple[float, float]]]:
+    ) -> Optional[RoutedCandidate]:
         """
         Génère un parcours en boucle avec ajustement de distance
 
@@ -118,106 +467,174 @@ class RouteGenerator:
             request: Paramètres de la requête
 
         Returns:
-            Liste de coordonnées ou None
+            Tuple (coordonnées, distance routée en km) ou None
         """
         target_total_distance = total_distance
         tolerance = target_total_distance * 0.02  # ±2%
         max_iterations = 10
 
-        # Facteur initial pour les segments de boucle
-        adjustment_factor = 0.80  # Commencer à 80% car les routes réelles sont plus longues
+        # Facteur initial déduit du ratio de détour de la zone
+        # (les routes réelles sont plus longues que la ligne droite)
+        solver = DistanceSolver(
+            target_total_distance,
+            await self._initial_factor(start_lat, start_lon, "loop", initial_bearing, total_distance, request)
+        )
 
         best_route = None
+        best_distance = None
         best_distance_diff = float('inf')
 
-        for iteration in range(max_iterations):
-            # Créer 3 points intermédiaires pour former une boucle
-            segment_distance = (total_distance * adjustment_factor) / 3
-
-            # Point 1: direction initiale
-            bearing1 = initial_bearing
-            point1_lat, point1_lon = destination_point(start_lat, start_lon, segment_distance, bearing1)
-
-            # Point 2: 120° plus loin (pour former un triangle)
-            bearing2 = (initial_bearing + 120) % 360
-            point2_lat, point2_lon = destination_point(point1_lat, point1_lon, segment_distance, bearing2)
+        with iteration_spans(range(max_iterations), "adjustment_iteration", bearing=initial_bearing) as iterations:
+            for iteration, iteration_span in iterations:
+                adjustment_factor = solver.factor
+                iteration_span.set_attribute("adjustment_factor", round(adjustment_factor, 4))
+
+                # Créer 3 points intermédiaires pour former une boucle
+                segment_distance = (total_distance * adjustment_factor) / 3
+
+                # Point 1: direction initiale
+                bearing1 = initial_bearing
+                point1_lat, point1_lon = destination_point(start_lat, start_lon, segment_distance, bearing1)
+
+                # Point 2: 120° plus loin (pour former un triangle)
+                bearing2 = (initial_bearing + 120) % 360
+                point2_lat, point2_lon = destination_point(point1_lat, point1_lon, segment_distance, bearing2)
+
+                # Point 3: encore 120° pour revenir vers le départ
+                bearing3 = (initial_bearing + 240) % 360
+                point3_lat, point3_lon = destination_point(point2_lat, point2_lon, segment_distance, bearing3)
+
+                # Obtenir les profils de routing
+                profile = self._get_routing_profile(request)
+                edge_filter = self.routing_backend.edge_filter(request.surface_preferences)
+
+                # Un seul appel OSRM : départ -> point1 -> point2 -> point3 -> départ
+                result = await self._get_osrm_multi_route(
+                    [
+                        (start_lat, start_lon),
+                        (point1_lat, point1_lon),
+                        (point2_lat, point2_lon),
+                        (point3_lat, point3_lon),
+                        (start_lat, start_lon)
+                    ],
+                    profile,
+                    edge_filter
+                )
+                if not result:
+                    # Backend indisponible : les itérations suivantes échoueraient aussi
+                    if not self.routing_backend.available():
+                        break
+                    continue
 
-            # Point 3: encore 120° pour revenir vers le départ
-            bearing3 = (initial_bearing + 240) % 360
-            point3_lat, point3_lon = destination_point(point2_lat, point2_lon, segment_distance, bearing3)
+                full_route, leg_distances = result
 
-            # Obtenir les profils de routing
-            profile = self._get_routing_profile(request)
+                # Distance réelle : somme des étapes calculées par OSRM
+                actual_distance = sum(leg_distances)
+                distance_diff = abs(actual_distance - target_total_distance)
 
-            # Segment 1: départ -> point1
-            seg1 = await self._get_osrm_route(start_lat, start_lon, point1_lat, point1_lon, profile)
-            if not seg1:
-                continue
+                # Calculer le facteur suivant à partir des essais précédents
+                progressed = solver.observe(actual_distance)
 
-            # Segment 2: point1 -> point2
-            seg2 = await self._get_osrm_route(point1_lat, point1_lon, point2_lat, point2_lon, profile)
-            if not seg2:
-                continue
+                # Vérifier que la boucle se ferme bien (tolérance 50m)
+                final_point = full_route[-1]
+                distance_to_start = haversine_distance(
+                    start_lat, start_lon, final_point[0], final_point[1]
+                )
+                iteration_span.set_attributes(
+                    actual_km=round(actual_distance, 3),
+                    closure_m=round(distance_to_start * 1000),
+                    point_count=len(full_route)
+                )
 
-            # Segment 3: point2 -> point3
-            seg3 = await self._get_osrm_route(point2_lat, point2_lon, point3_lat, point3_lon, profile)
-            if not seg3:
-                continue
+                # Logger
+                logger.info(f"[Loop {initial_bearing}°] Iteration {iteration + 1}: factor={adjustment_factor:.3f}, "
+                           f"target={target_total_distance:.2f}km, actual={actual_distance:.2f}km, "
+                           f"diff={distance_diff:.2f}km, closure={distance_to_start*1000:.0f}m")
 
-            # Segment 4: point3 -> retour au départ
-            seg4 = await self._get_osrm_route(point3_lat, point3_lon, start_lat, start_lon, profile)
-            if not seg4:
-                continue
+                # Pénalité si la boucle ne se ferme pas bien
+                if distance_to_start > 0.05:  # Plus de 50m d'écart
+                    logger.warning(f"[Loop {initial_bearing}°] Boucle mal fermée: {distance_to_start*1000:.0f}m")
+                    # On continue quand même mais avec une pénalité
+                    distance_diff += distance_to_start * 10  # Pénalité
 
-            # Combiner tous les segments en évitant les doublons
-            full_route = seg1 + seg2[1:] + seg3[1:] + seg4[1:]
+                # Garder la meilleure route
+                if distance_diff < best_distance_diff:
+                    best_distance_diff = distance_diff
+                    best_route = full_route
+                    best_distance = actual_distance
 
-            # Calculer la distance réelle
-            actual_distance = calculate_total_distance(full_route)
-            distance_diff = abs(actual_distance - target_total_distance)
+                # Vérifier si on est dans la tolérance
+                if distance_diff <= tolerance and distance_to_start <= 0.05:
+                    logger.info(f"OK [Loop {initial_bearing}°] Boucle cible atteinte en {iteration + 1} iteration(s)")
+                    self._record_solver(solver, start_lat, start_lon, "loop", initial_bearing, converged=True)
+                    return full_route, actual_distance
 
-            # Vérifier que la boucle se ferme bien (tolérance 50m)
-            final_point = full_route[-1]
-            distance_to_start = haversine_distance(
-                start_lat, start_lon, final_point[0], final_point[1]
-            )
+                # Arrêter si le facteur ne peut plus évoluer (borne atteinte)
+                if not progressed:
+                    break
 
-            # Logger
-            logger.info(f"[Loop {initial_bearing}°] Iteration {iteration + 1}: factor={adjustment_factor:.3f}, "
-                       f"target={target_total_distance:.2f}km, actual={actual_distance:.2f}km, "
-                       f"diff={distance_diff:.2f}km, closure={distance_to_start*1000:.0f}m")
+        self._record_solver(solver, start_lat, start_lon, "loop", initial_bearing, converged=False)
 
-            # Pénalité si la boucle ne se ferme pas bien
-            if distance_to_start > 0.05:  # Plus de 50m d'écart
-                logger.warning(f"[Loop {initial_bearing}°] Boucle mal fermée: {distance_to_start*1000:.0f}m")
-                # On continue quand même mais avec une pénalité
-                distance_diff += distance_to_start * 10  # Pénalité
+        # Retourner la meilleure route trouvée
+        if best_route:
+            logger.warning(f"WARNING [Loop {initial_bearing}°] Boucle cible non atteinte apres {solver.iterations} iterations. "
+                          f"Meilleur resultat: ecart de {best_distance_diff:.2f}km")
+            return best_route, best_distance
 
-            # Garder la meilleure route
-            if distance_diff < best_distance_diff:
-                best_distance_diff = distance_diff
-                best_route = full_route
+        return None
 
-            # Vérifier si on est dans la tolérance
-            if distance_diff <= tolerance and distance_to_start <= 0.05:
-                logger.info(f"OK [Loop {initial_bearing}°] Boucle cible atteinte en {iteration + 1} iteration(s)")
-                return full_route
+    async def _generate_graph_loop_route(
+        self,
+        start_lat: float,
+        start_lon: float,
+        total_distance: float,
+        initial_bearing: float,
+        request: RouteRequest
+    ) -> Optional[RoutedCandidate]:
+        """
+        Génère un parcours en boucle directement sur le graphe routier
 
-            # Ajuster le facteur
-            if actual_distance > target_total_distance:
-                adjustment_factor *= 0.95
-            else:
-                adjustment_factor *= 1.05
+        Les boucles sont calculées une seule fois par point de départ (voir
+        RoadGraph.find_loops) ; chaque direction candidate retient la
+        meilleure boucle de son secteur. Sans graphe local, repli sur la
+        méthode du triangle.
 
-            adjustment_factor = max(0.5, min(1.2, adjustment_factor))
+        Args:
+            start_lat: Latitude de départ
+            start_lon: Longitude de départ
+            total_distance: Distance totale cible (en km)
+            initial_bearing: Direction du secteur en degrés
+            request: Paramètres de la requête
 
-        # Retourner la meilleure route trouvée
-        if best_route:
-            logger.warning(f"WARNING [Loop {initial_bearing}°] Boucle cible non atteinte apres {max_iterations} iterations. "
-                          f"Meilleur resultat: ecart de {best_distance_diff:.2f}km")
-            return best_route
+        Returns:
+            Tuple (coordonnées, longueur de la boucle en km) ou None
+        """
+        edge_filter = self.routing_backend.edge_filter(request.surface_preferences)
+        loops = await self.routing_backend.find_loops(
+            start_lat, start_lon, total_distance, edge_filter
+        )
+        if loops is None:
+            return await self._generate_loop_route(
+                start_lat, start_lon, total_distance, initial_bearing, request
+            )
 
-        return None
+        # Secteur de ±22.5° autour de la direction (8 directions candidates)
+        in_sector = [
+            loop for loop in loops
+            if abs((loop.bearing - initial_bearing + 180) % 360 - 180) < 22.5
+        ]
+        if not in_sector:
+            return None
+
+        loop = min(in_sector, key=lambda candidate: candidate.score)
+        converged = abs(loop.length_km - total_distance) <= total_distance * 0.02
+        self.solver_telemetry.record(1, converged)
+        SOLVER_ITERATIONS.observe(
+            1, kind="graph_loop", bearing=int(initial_bearing), converged=str(converged).lower()
+        )
+        logger.info(f"[Graph loop {initial_bearing}°] target={total_distance:.2f}km, "
+                    f"actual={loop.length_km:.2f}km, overlap={loop.overlap_km:.2f}km")
+        return loop.coordinates, loop.length_km
 
     async def _generate_out_and_back_route(
         self,
@@ -226,7 +643,7 @@ class RouteGenerator:
         one_way_distance: float,
         bearing: float,
         request: RouteRequest
-    ) -> Optional[List[Tuple[float, float]]]:
+    ) -> Optional[RoutedCandidate]:
         """
         Génère un parcours aller-retour dans une direction donnée avec ajustement de distance
 
@@ -238,82 +655,168 @@ class RouteGenerator:
             request: Paramètres de la requête
 
         Returns:
-            Liste de coordonnées ou None
+            Tuple (coordonnées, distance routée en km) ou None
         """
         # Algorithme itératif pour atteindre la distance cible avec précision ±2%
         target_total_distance = request.distance_km
         tolerance = target_total_distance * 0.02  # ±2%
         max_iterations = 10
 
-        # Facteur initial : commencer avec 85% de la distance demandée
-        # (car les routes réelles sont plus longues que la ligne droite)
-        adjustment_factor = 0.85
+        # Facteur initial : point de demi-tour choisi dans l'index de
+        # joignabilité, sinon ratio de détour observé dans la zone
+        solver = DistanceSolver(
+            target_total_distance,
+            await self._initial_factor(start_lat, start_lon, "out_and_back", bearing, one_way_distance, request)
+        )
 
         best_route = None
+        best_distance = None
         best_distance_diff = float('inf')
 
-        for iteration in range(max_iterations):
-            # Calculer la distance ajustée pour cet essai
-            adjusted_one_way = one_way_distance * adjustment_factor
+        with iteration_spans(range(max_iterations), "adjustment_iteration", bearing=bearing) as iterations:
+            for iteration, iteration_span in iterations:
+                adjustment_factor = solver.factor
+                iteration_span.set_attribute("adjustment_factor", round(adjustment_factor, 4))
 
-            # Calculer le point de destination
-            dest_lat, dest_lon = destination_point(start_lat, start_lon, adjusted_one_way, bearing)
+                # Calculer la distance ajustée pour cet essai
+                adjusted_one_way = one_way_distance * adjustment_factor
 
-            # Construire les profils de routing selon les préférences
-            profile = self._get_routing_profile(request)
+                # Calculer le point de destination
+                dest_lat, dest_lon = destination_point(start_lat, start_lon, adjusted_one_way, bearing)
 
-            # Appeler OSRM pour l'aller
-            outbound_coords = await self._get_osrm_route(
-                start_lat, start_lon, dest_lat, dest_lon, profile
-            )
+                # Construire les profils de routing selon les préférences
+                profile = self._get_routing_profile(request)
+                edge_filter = self.routing_backend.edge_filter(request.surface_preferences)
+
+                # Appeler OSRM pour l'aller
+                outbound = await self._get_osrm_route(
+                    start_lat, start_lon, dest_lat, dest_lon, profile, edge_filter
+                )
+
+                if not outbound:
+                    if not self.routing_backend.available():
+                        break
+                    continue
+                outbound_coords, outbound_distance = outbound
 
-            if not outbound_coords:
-                continue
+                # Pour le retour, inverser le trajet
+                inbound_coords = list(reversed(outbound_coords))
 
-            # Pour le retour, inverser le trajet
-            inbound_coords = list(reversed(outbound_coords))
+                # Combiner aller + retour
+                full_route = outbound_coords + inbound_coords[1:]  # Éviter de dupliquer le point de retournement
 
-            # Combiner aller + retour
-            full_route = outbound_coords + inbound_coords[1:]  # Éviter de dupliquer le point de retournement
+                # Distance réelle : l'aller calculé par OSRM, parcouru deux fois
+                actual_distance = outbound_distance * 2
+                distance_diff = abs(actual_distance - target_total_distance)
+                iteration_span.set_attributes(actual_km=round(actual_distance, 3), point_count=len(full_route))
 
-            # Calculer la distance réelle du parcours complet
-            actual_distance = calculate_total_distance(full_route)
-            distance_diff = abs(actual_distance - target_total_distance)
+                # Calculer le facteur suivant à partir des essais précédents
+                progressed = solver.observe(actual_distance)
 
-            # Logger pour debugging
-            logger.info(f"[Bearing {bearing}°] Iteration {iteration + 1}: factor={adjustment_factor:.3f}, "
-                       f"target={target_total_distance:.2f}km, actual={actual_distance:.2f}km, "
-                       f"diff={distance_diff:.2f}km")
+                # Logger pour debugging
+                logger.info(f"[Bearing {bearing}°] Iteration {iteration + 1}: factor={adjustment_factor:.3f}, "
+                           f"target={target_total_distance:.2f}km, actual={actual_distance:.2f}km, "
+                           f"diff={distance_diff:.2f}km")
 
-            # Garder la meilleure route trouvée
-            if distance_diff < best_distance_diff:
-                best_distance_diff = distance_diff
-                best_route = full_route
+                # Garder la meilleure route trouvée
+                if distance_diff < best_distance_diff:
+                    best_distance_diff = distance_diff
+                    best_route = full_route
+                    best_distance = actual_distance
 
-            # Vérifier si on est dans la tolérance
-            if distance_diff <= tolerance:
-                logger.info(f"OK [Bearing {bearing}°] Distance cible atteinte en {iteration + 1} iteration(s)")
-                return full_route
+                # Vérifier si on est dans la tolérance
+                if distance_diff <= tolerance:
+                    logger.info(f"OK [Bearing {bearing}°] Distance cible atteinte en {iteration + 1} iteration(s)")
+                    self._record_solver(solver, start_lat, start_lon, "out_and_back", bearing, converged=True)
+                    return full_route, actual_distance
 
-            # Ajuster le facteur pour la prochaine itération
-            if actual_distance > target_total_distance:
-                # Route trop longue, réduire la distance
-                adjustment_factor *= 0.95
-            else:
-                # Route trop courte, augmenter la distance
-                adjustment_factor *= 1.05
+                # Arrêter si le facteur ne peut plus évoluer (borne atteinte)
+                if not progressed:
+                    break
 
-            # Sécurité : ne pas dépasser des valeurs extrêmes
-            adjustment_factor = max(0.5, min(1.2, adjustment_factor))
+        self._record_solver(solver, start_lat, start_lon, "out_and_back", bearing, converged=False)
 
         # Si on n'a pas atteint la tolérance, retourner la meilleure route trouvée
         if best_route:
-            logger.warning(f"WARNING [Bearing {bearing}°] Distance cible non atteinte apres {max_iterations} iterations. "
+            logger.warning(f"WARNING [Bearing {bearing}°] Distance cible non atteinte apres {solver.iterations} iterations. "
                           f"Meilleur resultat: ecart de {best_distance_diff:.2f}km")
-            return best_route
+            return best_route, best_distance
 
         return None
 
+    async def _initial_factor(
+        self,
+        start_lat: float,
+        start_lon: float,
+        kind: str,
+        bearing: float,
+        distance_km: float,
+        request: RouteRequest
+    ) -> float:
+        """
+        Facteur d'ajustement du premier essai
+
+        Avec l'index de joignabilité : pour un aller-retour, rayon du point
+        situé à distance_km de route dans la direction ; pour une boucle,
+        inverse du ratio de détour mesuré dans les directions du triangle.
+        Sinon, inverse du ratio de détour appris dans la zone (DetourPrior).
+
+        Args:
+            start_lat, start_lon: Point de départ
+            kind: Type de parcours ("loop" ou "out_and_back")
+            bearing: Direction du candidat en degrés
+            distance_km: Distance de l'aller (aller-retour) ou distance totale (boucle)
+            request: Paramètres de la requête
+
+        Returns:
+            Facteur initial
+        """
+        if self.reachability is not None:
+            cell = await self.reachability.get(
+                start_lat, start_lon,
+                self._get_routing_profile(request),
+                self.routing_backend.edge_filter(request.surface_preferences)
+            )
+            if cell is not None:
+                if kind == "out_and_back":
+                    radius = cell.turnaround_radius(bearing, distance_km)
+                    if radius is not None:
+                        return radius / distance_km
+                else:
+                    ratio = cell.detour_ratio(
+                        [bearing, bearing + 120, bearing + 240], distance_km / 3
+                    )
+                    if ratio is not None:
+                        return 1.0 / ratio
+
+        return 1.0 / self.detour_prior.get(start_lat, start_lon, kind)
+
+    def _record_solver(
+        self,
+        solver: DistanceSolver,
+        start_lat: float,
+        start_lon: float,
+        kind: str,
+        bearing: float,
+        converged: bool
+    ):
+        """
+        Met à jour le prior de détour de la zone et la télémétrie du solveur
+
+        Args:
+            solver: Solveur du candidat terminé
+            start_lat, start_lon: Point de départ
+            kind: Type de parcours ("loop" ou "out_and_back")
+            bearing: Direction du candidat en degrés
+            converged: True si la distance cible a été atteinte
+        """
+        if solver.detour_ratio is not None:
+            self.detour_prior.update(start_lat, start_lon, kind, solver.detour_ratio)
+        self.solver_telemetry.record(solver.iterations, converged)
+        SOLVER_ITERATIONS.observe(
+            solver.iterations, kind=kind, bearing=int(bearing), converged=str(converged).lower()
+        )
+
     async def _generate_simple_route(
         self,
         start_lat: float,
@@ -363,47 +866,73 @@ class RouteGenerator:
         start_lon: float,
         end_lat: float,
         end_lon: float,
-        profile: str = "foot"
-    ) -> Optional[List[Tuple[float, float]]]:
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[RoutedCandidate]:
         """
-        Appelle OSRM pour obtenir un itinéraire
+        Calcule un itinéraire via le backend de routing
 
         Args:
             start_lat, start_lon: Point de départ
             end_lat, end_lon: Point d'arrivée
             profile: Profil de routing (foot, bike, car)
+            edge_filter: Classes de voies à éviter
 
         Returns:
-            Liste de coordonnées ou None
+            Tuple (coordonnées, distance en km) ou None
         """
-        url = f"{self.osrm_base_url}/route/v1/{profile}/{start_lon},{start_lat};{end_lon},{end_lat}"
-        params = {
-            "overview": "full",
-            "geometries": "geojson"
-        }
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, params=params, timeout=15.0)
-                response.raise_for_status()
-
-                data = response.json()
-
-                if data["code"] != "Ok" or not data.get("routes"):
-                    return None
-
-                # Extraire les coordonnées de la géométrie
-                geometry = data["routes"][0]["geometry"]
-                coordinates = geometry["coordinates"]
-
-                # Convertir de [lon, lat] à (lat, lon)
-                route_coords = [(lat, lon) for lon, lat in coordinates]
+        result = await self._get_osrm_multi_route(
+            [(start_lat, start_lon), (end_lat, end_lon)], profile, edge_filter
+        )
+        if not result:
+            return None
+        route_coords, leg_distances = result
+        return route_coords, sum(leg_distances)
+
+    @traced("routing_segment")
+    async def _get_osrm_multi_route(
+        self,
+        waypoints: List[Tuple[float, float]],
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[Tuple[List[Tuple[float, float]], List[float]]]:
+        """
+        Calcule un itinéraire passant par plusieurs points (un seul appel au backend)
 
-                return route_coords
+        Args:
+            waypoints: Points de passage (lat, lon), dans l'ordre
+            profile: Profil de routing (foot, bike, car)
+            edge_filter: Classes de voies à éviter (voir RoutingBackend.edge_filter)
 
-            except Exception as e:
-                print(f"Erreur OSRM: {e}")
-                return None
+        Returns:
+            Tuple (coordonnées, distances de chaque étape en km) ou None
+        """
+        # Arrondir les points pour que les itinéraires voisins partagent le cache
+        waypoints = [snap_to_grid(lat, lon, self.segment_grid_deg) for lat, lon in waypoints]
+
+        cache_key = (
+            self.routing_backend.name, profile, *edge_filter,
+            *[value for point in waypoints for value in point]
+        )
+        cached = await self.segment_cache.get(cache_key)
+        current_span().set_attributes(
+            backend=self.routing_backend.name, waypoints=len(waypoints), cache_hit=cached is not None
+        )
+        if cached is not None:
+            current_span().set_attribute("point_count", len(cached["coordinates"]))
+            return [tuple(point) for point in cached["coordinates"]], cached["legs"]
+
+        result = await self.routing_backend.route(waypoints, profile, edge_filter)
+        if result is None:
+            current_span().set_attribute("failed", True)
+            return None
+
+        route_coords, leg_distances = result
+        current_span().set_attribute("point_count", len(route_coords))
+        await self.segment_cache.set(
+            cache_key, {"coordinates": route_coords, "legs": leg_distances}
+        )
+        return route_coords, leg_distances
 
     def _get_routing_profile(self, request: RouteRequest) -> str:
         """
@@ -419,10 +948,14 @@ class RouteGenerator:
         # En production, on pourrait ajouter "bike" pour le vélo
         return "foot"
 
+    @traced("score")
     async def _score_route(
         self,
         coordinates: List[Tuple[float, float]],
-        request: RouteRequest
+        request: RouteRequest,
+        elevation_memo: Optional[dict] = None,
+        elevation_coordinates: Optional[List[Tuple[float, float]]] = None,
+        distance_km: Optional[float] = None
     ) -> float:
         """
         Calcule un score pour évaluer la qualité d'un parcours
@@ -431,6 +964,11 @@ class RouteGenerator:
         Args:
             coordinates: Coordonnées du parcours
             request: Paramètres de la requête
+            elevation_memo: Mémo des élévations de la requête
+            elevation_coordinates: Géométrie (simplifiée) utilisée pour
+                l'élévation, par défaut coordinates
+            distance_km: Distance routée du parcours, par défaut mesurée
+                sur coordinates
 
         Returns:
             Score (plus bas = meilleur)
@@ -438,56 +976,80 @@ class RouteGenerator:
         score = 0.0
 
         # 1. Pénalité pour écart de distance
-        actual_distance = calculate_total_distance(coordinates)
+        actual_distance = distance_km if distance_km is not None else calculate_total_distance(coordinates)
         distance_diff = abs(actual_distance - request.distance_km)
         score += distance_diff * 10  # Forte pénalité pour écart de distance
 
         # 2. Pénalité pour dénivelé non conforme
-        elevations = await self.elevation_service.get_elevations(coordinates)
+        elevations = await self.elevation_service.get_elevations(
+            elevation_coordinates or coordinates, elevation_memo
+        )
         elevation_gain, _ = self.elevation_service.calculate_elevation_metrics(elevations)
 
-        if not self.elevation_service.matches_elevation_preference(
+        # Élévations inconnues : critère ignoré plutôt que jugé sur un profil plat
+        if elevation_gain is not None and not self.elevation_service.matches_elevation_preference(
             elevation_gain, actual_distance, request.elevation_preference.value
         ):
             score += 50  # Pénalité si le dénivelé ne correspond pas
 
+        current_span().set_attributes(
+            point_count=len(coordinates),
+            elevation_point_count=len(elevations) if elevations is not None else 0,
+            elevation_gain_m=round(elevation_gain) if elevation_gain is not None else None,
+            score=round(score, 3)
+        )
         return score
 
     async def _calculate_route_metrics(
         self,
         coordinates: List[Tuple[float, float]],
-        target_distance: float
-    ) -> dict:
+        target_distance: float,
+        elevation_memo: Optional[dict] = None,
+        elevation_coordinates: Optional[List[Tuple[float, float]]] = None,
+        distance_km: Optional[float] = None
+    ) -> Tuple[dict, Optional[List[float]]]:
         """
         Calcule les métriques du parcours
 
         Args:
-            coordinates: Coordonnées du parcours
+            coordinates: Coordonnées du parcours (distance)
             target_distance: Distance cible
+            elevation_memo: Mémo des élévations de la requête
+            elevation_coordinates: Géométrie (simplifiée) utilisée pour
+                l'élévation, par défaut coordinates
+            distance_km: Distance routée du parcours, par défaut mesurée
+                sur coordinates
 
         Returns:
-            Dictionnaire de métriques
+            Tuple (dictionnaire de métriques, profil d'élévation de
+            elevation_coordinates) ; dénivelés et profil à None si les
+            élévations sont inconnues
         """
-        actual_distance = calculate_total_distance(coordinates)
+        actual_distance = distance_km if distance_km is not None else calculate_total_distance(coordinates)
 
         # Récupérer les élévations
-        elevations = await self.elevation_service.get_elevations(coordinates)
+        elevations = await self.elevation_service.get_elevations(
+            elevation_coordinates or coordinates, elevation_memo
+        )
         elevation_gain, elevation_loss = self.elevation_service.calculate_elevation_metrics(elevations)
 
         # Estimer la durée (hypothèse: 5 min/km en course)
         estimated_duration = int(actual_distance * 5)
 
-        return {
+        metrics = {
             "distance_km": round(actual_distance, 2),
-            "elevation_gain_m": round(elevation_gain, 1),
-            "elevation_loss_m": round(elevation_loss, 1),
+            "elevation_gain_m": round(elevation_gain, 1) if elevation_gain is not None else None,
+            "elevation_loss_m": round(elevation_loss, 1) if elevation_loss is not None else None,
             "estimated_duration_min": estimated_duration
         }
+        return metrics, elevations
 
-    def _generate_gpx(
+    @traced("serialize_gpx")
+    def build_gpx(
         self,
         coordinates: List[Tuple[float, float]],
-        request: RouteRequest
+        request: RouteRequest,
+        elevations: Optional[List[float]] = None
     ) -> str:
         """
         Génère un fichier GPX à partir des coordonnées
@@ -495,27 +1057,16 @@ class RouteGenerator:
         Args:
             coordinates: Liste de coordonnées
             request: Paramètres de la requête
+            elevations: Profil d'élévation (balises <ele> si GPX_INCLUDE_ELEVATION)
 
         Returns:
             Contenu GPX au format string
         """
-        gpx = gpxpy.gpx.GPX()
-
-        # Métadonnées
-        gpx.name = f"Parcours {request.training_type.value} - {request.distance_km}km"
-        gpx.description = f"Généré par Strava+Coach - Dénivelé: {request.elevation_preference.value}"
-        gpx.creator = "Strava+Coach POC"
-
-        # Créer un track
-        gpx_track = gpxpy.gpx.GPXTrack()
-        gpx.tracks.append(gpx_track)
-
-        # Créer un segment
-        gpx_segment = gpxpy.gpx.GPXTrackSegment()
-        gpx_track.segments.append(gpx_segment)
-
-        # Ajouter les points
-        for lat, lon in coordinates:
-            gpx_segment.points.append(gpxpy.gpx.GPXTrackPoint(lat, lon))
-
-        return gpx.to_xml()
+        current_span().set_attribute("point_count", len(coordinates))
+        return write_gpx(
+            coordinates,
+            name=f"Parcours {request.training_type.value} - {request.distance_km}km",
+            description=f"Généré par Strava+Coach - Dénivelé: {request.elevation_preference.value}",
+            creator="Strava+Coach POC",
+            elevations=elevations if config.GPX_INCLUDE_ELEVATION else None
+        )
@@ -0,0 +1,408 @@
+import abc
+import asyncio
+import math
+import os
+import logging
+from typing import List, Optional, Tuple
+
+import config
+from models import SurfacePreferences
+from services.http_client import HttpClientPool
+from services.road_graph import GraphLoop, RoadGraph, excluded_classes_mask
+from utils.cache import LRUCache
+from utils.circuit_breaker import CircuitOpenError
+from utils.concurrency import SingleFlight
+from utils.geo_helpers import haversine_distance
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+# Résultat d'un calcul d'itinéraire : (coordonnées, distance de chaque étape en km)
+RouteResult = Tuple[List[Tuple[float, float]], List[float]]
+
+
+class RoutingBackend(abc.ABC):
+    """
+    Interface des moteurs de routing utilisés par RouteGenerator
+
+    Un backend calcule un itinéraire passant par une liste de points, dans
+    l'ordre, et renvoie la géométrie complète et la distance de chaque étape.
+    """
+
+    name = ""
+
+    # Pool HTTP partagé (backends distants uniquement)
+    http_pool: Optional[HttpClientPool] = None
+
+    @abc.abstractmethod
+    async def route(
+        self,
+        waypoints: List[Tuple[float, float]],
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[RouteResult]:
+        """
+        Calcule un itinéraire
+
+        Args:
+            waypoints: Points de passage (lat, lon), dans l'ordre
+            profile: Profil de routing (foot, bike, car)
+            edge_filter: Classes de voies à éviter (voir edge_filter)
+
+        Returns:
+            Tuple (coordonnées, distances de chaque étape en km) ou None
+        """
+
+    async def distances(
+        self,
+        origin: Tuple[float, float],
+        destinations: List[Tuple[float, float]],
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[List[Optional[float]]]:
+        """
+        Distances routières d'un point vers plusieurs destinations
+
+        Args:
+            origin: Point de départ (lat, lon)
+            destinations: Points d'arrivée (lat, lon)
+            profile: Profil de routing (foot, bike, car)
+            edge_filter: Classes de voies à éviter
+
+        Returns:
+            Distance en km de chaque destination (None si inatteignable), ou
+            None si le calcul a échoué
+        """
+        return None
+
+    async def find_loops(
+        self,
+        start_lat: float,
+        start_lon: float,
+        distance_km: float,
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[List[GraphLoop]]:
+        """
+        Boucles de la distance demandée, calculées directement sur le graphe
+
+        Args:
+            start_lat, start_lon: Point de départ
+            distance_km: Distance cible
+            edge_filter: Classes de voies à éviter
+
+        Returns:
+            Boucles triées par score, ou None si le backend ne sait pas les
+            calculer (pas de graphe local)
+        """
+        return None
+
+    def edge_filter(self, surface_preferences: Optional[SurfacePreferences]) -> Tuple[str, ...]:
+        """
+        Classes de voies à éviter selon les préférences de surface
+
+        Les backends qui ne savent pas filtrer les voies renvoient () (ce qui
+        évite aussi de fragmenter le cache des segments).
+
+        Args:
+            surface_preferences: Préférences de la requête
+
+        Returns:
+            Noms des classes exclues (champs de SurfacePreferences à False)
+        """
+        return ()
+
+    def available(self) -> bool:
+        """
+        Indique si le backend peut répondre maintenant
+
+        Returns:
+            False si le backend est indisponible (disjoncteur ouvert) : les
+            appels échoueraient immédiatement
+        """
+        return True
+
+    def stats(self) -> dict:
+        """Statistiques du backend"""
+        return {"backend": self.name}
+
+
+class OSRMRoutingBackend(RoutingBackend):
+    """Instance OSRM distante (API HTTP /route/v1)"""
+
+    name = "osrm"
+
+    def __init__(
+        self,
+        http_pool: Optional[HttpClientPool] = None,
+        max_concurrency: int = config.OSRM_MAX_CONCURRENCY,
+        base_url: str = config.OSRM_BASE_URL
+    ):
+        self.http_pool = http_pool or HttpClientPool()
+        self.base_url = base_url
+        # Limite le nombre d'appels OSRM simultanés (tous candidats confondus)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    def available(self) -> bool:
+        return self.http_pool.is_available("osrm")
+
+    async def route(
+        self,
+        waypoints: List[Tuple[float, float]],
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[RouteResult]:
+        locations = ";".join(f"{lon},{lat}" for lat, lon in waypoints)
+        url = f"{self.base_url}/route/v1/{profile}/{locations}"
+        params = {
+            "overview": "full",
+            "geometries": "geojson"
+        }
+
+        # OSRM indisponible : inutile d'attendre le sémaphore
+        if not self.available():
+            return None
+
+        async with self.semaphore:
+            try:
+                response = await self.http_pool.get("osrm", url, params=params)
+                response.raise_for_status()
+
+                data = response.json()
+
+                if data["code"] != "Ok" or not data.get("routes"):
+                    return None
+
+                # Extraire les coordonnées de la géométrie
+                route = data["routes"][0]
+                coordinates = route["geometry"]["coordinates"]
+
+                # Convertir de [lon, lat] à (lat, lon)
+                route_coords = [(lat, lon) for lon, lat in coordinates]
+
+                # Distance routière de chaque étape (m -> km)
+                leg_distances = [leg["distance"] / 1000 for leg in route["legs"]]
+
+            except CircuitOpenError:
+                return None
+            except Exception as e:
+                logger.warning(f"Erreur OSRM: {e}")
+                return None
+
+        return route_coords, leg_distances
+
+    async def distances(
+        self,
+        origin: Tuple[float, float],
+        destinations: List[Tuple[float, float]],
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[List[Optional[float]]]:
+        # Service "table" : une ligne (l'origine) vers toutes les destinations
+        locations = ";".join(f"{lon},{lat}" for lat, lon in [origin, *destinations])
+        url = f"{self.base_url}/table/v1/{profile}/{locations}"
+        params = {
+            "sources": "0",
+            "annotations": "distance"
+        }
+
+        # OSRM indisponible : inutile d'attendre le sémaphore
+        if not self.available():
+            return None
+
+        async with self.semaphore:
+            try:
+                response = await self.http_pool.get("osrm", url, params=params)
+                response.raise_for_status()
+
+                data = response.json()
+                if data["code"] != "Ok":
+                    return None
+
+                row = data["distances"][0][1:]
+                return [None if value is None else value / 1000 for value in row]
+
+            except CircuitOpenError:
+                return None
+            except Exception as e:
+                logger.warning(f"Erreur OSRM (table): {e}")
+                return None
+
+
+class LocalRoutingBackend(RoutingBackend):
+    """
+    Routing en mémoire sur un graphe construit à partir d'un extrait OSM
+
+    Le graphe est lu en mémoire mappée depuis graph_path ; s'il n'existe pas
+    encore, il est construit à partir de osm_path puis sauvegardé. Les calculs
+    (A* bidirectionnel) sont exécutés dans un thread pour ne pas bloquer la
+    boucle d'événements.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        graph_path: str = config.ROUTING_GRAPH_PATH,
+        osm_path: str = config.ROUTING_OSM_EXTRACT
+    ):
+        if os.path.exists(graph_path):
+            self.graph = RoadGraph.load(graph_path)
+        elif osm_path:
+            logger.info(f"Construction du graphe routier depuis {osm_path}")
+            self.graph = RoadGraph.from_osm(osm_path)
+            self.graph.save(graph_path)
+        else:
+            raise ValueError(
+                f"Graphe routier absent ({graph_path}) et aucun extrait OSM configuré"
+            )
+
+        # Boucles par point de départ : calculées une fois pour toutes les
+        # directions candidates d'une requête (jusqu'au bout et conservées
+        # même si la requête qui les a demandées abandonne)
+        self.loop_cache = LRUCache(max_entries=256, ttl=600)
+        self.loop_single_flight = SingleFlight(detached=True)
+
+    async def route(
+        self,
+        waypoints: List[Tuple[float, float]],
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[RouteResult]:
+        if profile != self.graph.profile:
+            logger.warning(f"Profil {profile} absent du graphe local ({self.graph.profile})")
+            return None
+        return await asyncio.to_thread(
+            self._route, waypoints, excluded_classes_mask(edge_filter)
+        )
+
+    async def find_loops(
+        self,
+        start_lat: float,
+        start_lon: float,
+        distance_km: float,
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[List[GraphLoop]]:
+        source = self.graph.nearest_node(start_lat, start_lon)
+        if source is None:
+            return []
+
+        key = (source, round(distance_km, 3), edge_filter)
+        loops = self.loop_cache.get(key)
+        if loops is None:
+            loops = await self.loop_single_flight.do(
+                key, lambda: self._find_and_store_loops(key, source, distance_km, edge_filter)
+            )
+        return loops
+
+    async def _find_and_store_loops(
+        self,
+        key: tuple,
+        source: int,
+        distance_km: float,
+        edge_filter: Tuple[str, ...]
+    ) -> List[GraphLoop]:
+        """Calcule les boucles depuis source (hors boucle d'événements) et les met en cache"""
+        loops = await asyncio.to_thread(
+            self.graph.find_loops,
+            source,
+            distance_km * 1000,
+            excluded_classes_mask(edge_filter),
+            config.LOOP_OVERLAP_PENALTY
+        )
+        self.loop_cache.set(key, loops)
+        return loops
+
+    async def distances(
+        self,
+        origin: Tuple[float, float],
+        destinations: List[Tuple[float, float]],
+        profile: str = "foot",
+        edge_filter: Tuple[str, ...] = ()
+    ) -> Optional[List[Optional[float]]]:
+        if profile != self.graph.profile:
+            return None
+        return await asyncio.to_thread(
+            self._distances, origin, destinations, excluded_classes_mask(edge_filter)
+        )
+
+    def _distances(
+        self,
+        origin: Tuple[float, float],
+        destinations: List[Tuple[float, float]],
+        excluded: int
+    ) -> Optional[List[Optional[float]]]:
+        """Calcul synchrone (voir distances) : un seul arbre des plus courts chemins"""
+        source = self.graph.nearest_node(*origin)
+        if source is None:
+            return None
+
+        targets = [self.graph.nearest_node(lat, lon) for lat, lon in destinations]
+        # Borne de l'arbre : 3 fois la plus grande distance à vol d'oiseau
+        max_distance_m = 3000 * max(
+            (haversine_distance(*origin, lat, lon) for lat, lon in destinations), default=0.0
+        )
+        distances, _, _ = self.graph.shortest_path_tree(source, max_distance_m, excluded)
+
+        return [
+            None if target is None or not math.isfinite(distances[target])
+            else float(distances[target]) / 1000
+            for target in targets
+        ]
+
+    def _route(self, waypoints: List[Tuple[float, float]], excluded: int) -> Optional[RouteResult]:
+        """Calcul synchrone (voir route)"""
+        nodes = [self.graph.nearest_node(lat, lon) for lat, lon in waypoints]
+        if None in nodes:
+            return None
+
+        route_coords = []
+        leg_distances = []
+        for source, target in zip(nodes[:-1], nodes[1:]):
+            result = self.graph.shortest_path(source, target, excluded)
+            if result is None and excluded:
+                # Les préférences de surface ne doivent pas rendre l'étape impossible
+                result = self.graph.shortest_path(source, target)
+            if result is None:
+                return None
+
+            path, length_m = result
+            leg_coords = [self.graph.coordinates(node) for node in path]
+            route_coords.extend(leg_coords[1:] if route_coords else leg_coords)
+            leg_distances.append(length_m / 1000)
+
+        if len(route_coords) < 2:
+            route_coords = route_coords * 2
+        return route_coords, leg_distances
+
+    def edge_filter(self, surface_preferences: Optional[SurfacePreferences]) -> Tuple[str, ...]:
+        if surface_preferences is None:
+            return ()
+        return tuple(
+            name for name, allowed in surface_preferences.model_dump().items() if not allowed
+        )
+
+    def stats(self) -> dict:
+        return {"backend": self.name, **self.graph.stats()}
+
+
+def create_routing_backend(
+    name: str = config.ROUTING_BACKEND,
+    http_pool: Optional[HttpClientPool] = None,
+    osrm_max_concurrency: int = config.OSRM_MAX_CONCURRENCY
+) -> RoutingBackend:
+    """
+    Instancie le backend de routing configuré
+
+    Args:
+        name: "osrm" (API distante) ou "local" (graphe OSM en mémoire)
+        http_pool: Pool HTTP partagé
+        osrm_max_concurrency: Appels OSRM simultanés maximum
+
+    Returns:
+        Backend de routing
+    """
+    if name == "osrm":
+        return OSRMRoutingBackend(http_pool, osrm_max_concurrency)
+    if name == "local":
+        return LocalRoutingBackend()
+    raise ValueError(f"Backend de routing inconnu: {name}")
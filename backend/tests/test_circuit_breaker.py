@@ -0,0 +1,86 @@
+import time
+
+from utils.circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures_and_rejects():
+    breaker = CircuitBreaker("osrm", consecutive_failures=3, open_duration=30.0)
+
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    assert breaker.allow_request()
+    breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open and breaker.retry_after() > 29
+    assert not breaker.allow_request()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_opens_on_error_rate_once_window_is_large_enough():
+    breaker = CircuitBreaker("osrm", min_calls=4, error_rate_threshold=0.5, consecutive_failures=10)
+
+    for success in (True, False, True):
+        breaker.record(success, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED  # 3 appels < min_calls
+
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("osrm", consecutive_failures=2, slow_call_s=1.0)
+
+    breaker.record(True, 1.5)
+    breaker.record(True, 2.0)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["slow_calls"] == 2
+
+
+def open_breaker(open_duration=0.02):
+    breaker = CircuitBreaker("osrm", consecutive_failures=1, open_duration=open_duration)
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(open_duration * 2)
+    return breaker
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = open_breaker()
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Appel de test en cours : les autres appels sont refusés
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+    breaker.record(True, 0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["window_calls"] == 0
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_failed_probe_reopens():
+    breaker = open_breaker()
+
+    assert breaker.allow_request()
+    breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 2
+    assert not breaker.allow_request()
+
+
+def test_released_probe_frees_the_slot():
+    breaker = open_breaker()
+
+    assert breaker.allow_request()
+    breaker.release()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
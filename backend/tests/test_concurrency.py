@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from utils.concurrency import AsyncTokenBucket, SingleFlight
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    async def scenario():
+        single_flight = SingleFlight()
+        runs = 0
+
+        async def compute():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "résultat"
+
+        results = await asyncio.gather(*(single_flight.do("clé", compute) for _ in range(5)))
+        return single_flight, runs, results
+
+    single_flight, runs, results = asyncio.run(scenario())
+    assert runs == 1
+    assert results == ["résultat"] * 5
+    assert single_flight.stats() == {"in_flight": 0, "calls": 1, "coalesced": 4}
+
+
+def test_single_flight_leader_cancellation_does_not_reach_followers():
+    async def scenario():
+        single_flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return 42
+
+        leader = asyncio.create_task(single_flight.do("clé", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(single_flight.do("clé", compute))
+        await asyncio.sleep(0)
+
+        # Délai dépassé pour la première requête seulement
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == 42
+
+
+def test_single_flight_cancels_work_without_waiters():
+    async def scenario():
+        single_flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def compute():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.create_task(single_flight.do("clé", compute))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return single_flight.stats()["in_flight"]
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_single_flight_shares_exceptions():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("échec")
+
+        return await asyncio.gather(
+            single_flight.do("clé", compute), single_flight.do("clé", compute), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_token_bucket_spaces_calls_at_rate():
+    async def scenario():
+        bucket = AsyncTokenBucket(rate=20.0)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        times = []
+
+        async def call():
+            await bucket.acquire()
+            times.append(loop.time() - started)
+
+        await asyncio.gather(*(call() for _ in range(4)))
+        return bucket, times
+
+    bucket, times = asyncio.run(scenario())
+
+    assert times[0] < 0.03
+    # Un jeton toutes les 50 ms (à la précision de l'horloge près)
+    assert all(later - earlier >= 0.045 for earlier, later in zip(times, times[1:]))
+    stats = bucket.stats()
+    assert stats["acquired"] == 4
+    # Le premier appelant obtient le jeton disponible sans attendre
+    assert stats["peak_queue_depth"] == 3 and stats["queue_depth"] == 0
+
+
+def test_token_bucket_allows_burst_up_to_capacity():
+    async def scenario():
+        bucket = AsyncTokenBucket(rate=5.0, capacity=3.0)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(3):
+            async with bucket:
+                pass
+        burst = loop.time() - started
+        await bucket.acquire()
+        return burst, loop.time() - started
+
+    burst, total = asyncio.run(scenario())
+
+    assert burst < 0.05
+    assert total >= 0.15
+
+
+def test_token_bucket_cancelled_waiter_leaves_queue():
+    async def scenario():
+        bucket = AsyncTokenBucket(rate=1.0)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return bucket.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["queue_depth"] == 0
+    assert stats["acquired"] == 1
@@ -0,0 +1,17 @@
+import config
+
+
+def test_optional_float_keeps_zero(monkeypatch):
+    monkeypatch.setenv("ROUTE_ACCEPTABLE_SCORE", "0")
+    assert config._env_optional_float("ROUTE_ACCEPTABLE_SCORE") == 0.0
+
+    monkeypatch.setenv("ROUTE_ACCEPTABLE_SCORE", "2.5")
+    assert config._env_optional_float("ROUTE_ACCEPTABLE_SCORE") == 2.5
+
+
+def test_optional_float_empty_is_unset(monkeypatch):
+    monkeypatch.setenv("ROUTE_ACCEPTABLE_SCORE", " ")
+    assert config._env_optional_float("ROUTE_ACCEPTABLE_SCORE") is None
+
+    monkeypatch.delenv("ROUTE_ACCEPTABLE_SCORE")
+    assert config._env_optional_float("ROUTE_ACCEPTABLE_SCORE") is None
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from services.dem import SRTM_VOID, SRTMTileStore
+
+SIZE = 11
+
+
+def write_tile(directory, name, grid):
+    grid.astype(">i2").tofile(str(directory / name))
+
+
+@pytest.fixture
+def store(tmp_path):
+    rows, cols = np.mgrid[0:SIZE, 0:SIZE]
+    # Ligne 0 = bord nord de la tuile
+    write_tile(tmp_path, "N48E002.hgt", 100 * rows + cols)
+    voids = np.full((SIZE, SIZE), 50)
+    voids[5, 5] = SRTM_VOID
+    write_tile(tmp_path, "N48E003.hgt", voids)
+    return SRTMTileStore(str(tmp_path), max_open_tiles=1)
+
+
+def test_bilinear_interpolation(store):
+    step = 1 / (SIZE - 1)
+    # Nœuds de la grille : valeurs exactes (coin nord-ouest, coin sud-est)
+    assert store.lookup([(49.0 - 1e-9, 2.0)]) == pytest.approx([0.0], abs=1e-3)
+    assert store.lookup([(48.0, 3.0 - 1e-9)]) == pytest.approx([1010.0], abs=1e-3)
+    # Milieu d'une maille : moyenne des 4 voisins
+    lat = 49.0 - 2.5 * step
+    lon = 2.0 + 3.5 * step
+    assert store.lookup([(lat, lon)]) == pytest.approx([100 * 2.5 + 3.5])
+
+
+def test_void_and_missing_tiles_are_unknown(store):
+    step = 1 / (SIZE - 1)
+    near_void = (49.0 - 5.5 * step, 3.0 + 5.5 * step)
+    far_from_void = (49.0 - 1.5 * step, 3.0 + 1.5 * step)
+
+    assert store.lookup([near_void, far_from_void, (10.5, 10.5)]) == [None, pytest.approx(50.0), None]
+
+
+def test_tile_lru_evicts_and_remembers_missing_tiles(store):
+    store.lookup([(48.5, 2.5)])
+    store.lookup([(48.5, 3.5)])
+    store.lookup([(48.5, 2.5)])
+    assert store.stats()["evictions"] == 2
+    assert store.stats()["entries"] == 1
+
+    store.lookup([(10.5, 10.5)])
+    hits = store.stats()["hits"]
+    assert store.lookup([(10.5, 10.5)]) == [None]
+    assert store.stats()["hits"] == hits + 1
@@ -0,0 +1,72 @@
+import pytest
+
+from services.distance_solver import DetourPrior, DistanceSolver
+
+
+def test_first_step_is_proportional_to_observed_detour():
+    solver = DistanceSolver(10.0, 0.8)
+
+    assert solver.observe(12.0)
+
+    assert solver.factor == pytest.approx(0.8 * 10.0 / 12.0)
+    assert solver.detour_ratio == pytest.approx(12.0 / 8.0)
+
+
+def test_secant_solves_an_affine_detour_model():
+    # Distance = 15 x facteur + 1 : la sécante tombe juste au 3e essai
+    solver = DistanceSolver(10.0, 0.8)
+
+    for _ in range(2):
+        solver.observe(15 * solver.factor + 1)
+
+    assert solver.factor == pytest.approx(0.6)
+    assert 15 * solver.factor + 1 == pytest.approx(10.0)
+    assert solver.iterations == 2
+
+
+def test_secant_outside_bracket_falls_back_to_false_position():
+    solver = DistanceSolver(10.0, 0.5)
+    solver.observe(8.0)  # trop court
+    solver.observe(12.0)  # trop long : encadrement [0.5, 0.625]
+    assert solver.factor == pytest.approx(0.5625)
+
+    # Essai bruité : la sécante des deux derniers essais sortirait de l'encadrement
+    solver.observe(11.9)
+
+    low_factor, low_actual, high_factor, high_actual = 0.5, 8.0, 0.5625, 11.9
+    expected = low_factor + (10.0 - low_actual) * (high_factor - low_factor) / (high_actual - low_actual)
+    assert solver.factor == pytest.approx(expected)
+    assert low_factor < solver.factor < high_factor
+
+
+def test_factor_is_clamped_and_stalls_at_bound():
+    solver = DistanceSolver(10.0, 2.0, min_factor=0.3, max_factor=1.2)
+    assert solver.factor == 1.2
+
+    # Parcours beaucoup trop court : le facteur voudrait dépasser la borne
+    assert not solver.observe(2.0)
+    assert solver.factor == 1.2
+
+    solver = DistanceSolver(10.0, 0.5, min_factor=0.3)
+    solver.observe(100.0)
+    assert solver.factor == 0.3
+
+
+def test_empty_route_grows_factor():
+    solver = DistanceSolver(10.0, 0.5)
+
+    assert solver.observe(0.0)
+
+    assert solver.factor == pytest.approx(0.75)
+
+
+def test_detour_prior_smooths_per_cell_and_kind():
+    prior = DetourPrior(default_ratio=1.3, smoothing=0.5)
+
+    prior.update(48.85, 2.35, "loop", 1.5)
+    prior.update(48.851, 2.351, "loop", 2.5)
+    prior.update(48.85, 2.35, "loop", float("nan"))
+
+    assert prior.get(48.85, 2.35, "loop") == pytest.approx(2.0)
+    assert prior.get(48.85, 2.35, "out_and_back") == 1.3
+    assert prior.get(45.0, 5.0, "loop") == 1.3
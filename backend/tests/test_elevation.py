@@ -0,0 +1,121 @@
+import asyncio
+import math
+
+import numpy as np
+import pytest
+
+import config
+from services.elevation import ElevationService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(config, "ELEVATION_CACHE_GRID_DEG", 0.0001)
+    service = ElevationService(backend="open-elevation")
+    service.requested = []
+
+    async def fetch_elevations(points):
+        service.requested.extend(points)
+        # Élévation fonction exacte des coordonnées demandées
+        return [lat * 1000 + lon for lat, lon in points]
+
+    service._fetch_elevations = fetch_elevations
+    return service
+
+
+def test_grid_cell_value_does_not_depend_on_first_point(service):
+    first = [(48.85001, 2.35004), (48.85102, 2.35198)]
+    second = [(48.84996, 2.34997), (48.85098, 2.35203)]
+
+    async def lookup(order):
+        service.point_cache.clear()
+        return [await service._lookup_points(points, {}) for points in order]
+
+    a_then_b = asyncio.run(lookup([first, second]))
+    b_then_a = asyncio.run(lookup([second, first]))
+
+    assert a_then_b[0] == a_then_b[1] == b_then_a[0] == b_then_a[1]
+    assert all(point in {(48.85, 2.35), (48.851, 2.352)} for point in service.requested)
+
+
+def test_lookup_fetches_each_grid_point_once(service):
+    points = [(48.85001, 2.35004), (48.84999, 2.34996), (48.851, 2.352)]
+    memo = {}
+
+    elevations = asyncio.run(service._lookup_points(points, memo))
+
+    assert service.requested == [(48.85, 2.35), (48.851, 2.352)]
+    assert elevations[0] == elevations[1]
+    assert set(memo) == {(48.85, 2.35), (48.851, 2.352)}
+
+
+def sampling_service(monkeypatch, spacing_m=30.0, max_samples=100):
+    monkeypatch.setattr(config, "ELEVATION_SAMPLE_SPACING_M", spacing_m)
+    monkeypatch.setattr(config, "ELEVATION_MAX_SAMPLES", max_samples)
+    service = ElevationService(backend="open-elevation")
+    service.looked_up = []
+
+    async def lookup_points(points, memo=None):
+        service.looked_up.append(points)
+        # Relief linéaire selon la latitude
+        return [(lat - 48.85) * 10000 for lat, _ in points]
+
+    service._lookup_points = lookup_points
+    return service
+
+
+def test_two_vertex_straight_is_sampled_along_its_length(monkeypatch):
+    service = sampling_service(monkeypatch)
+    # Ligne droite d'environ 10 km vers le nord, stockée avec 2 sommets
+    straight = [(48.85, 2.35), (48.94, 2.35)]
+    dense = [(48.85 + 0.09 * i / 100, 2.35) for i in range(101)]
+
+    elevations = asyncio.run(service.get_elevations(straight))
+    asyncio.run(service.get_elevations(dense))
+
+    assert len(service.looked_up[0]) == len(service.looked_up[1]) == 100
+    assert np.allclose(service.looked_up[0], service.looked_up[1])
+    assert elevations == pytest.approx([0.0, 900.0])
+
+
+def test_sampling_follows_spacing_below_the_cap(monkeypatch):
+    service = sampling_service(monkeypatch, spacing_m=30.0, max_samples=1024)
+    straight = [(48.85, 2.35), (48.94, 2.35)]
+
+    asyncio.run(service.get_elevations(straight))
+
+    samples = service.looked_up[0]
+    assert len(samples) == math.ceil(10007.5 / 30) + 1
+    assert np.allclose([samples[0], samples[-1]], straight)
+
+
+def test_failed_lookup_is_unknown_not_flat(monkeypatch):
+    service = ElevationService(backend="open-elevation")
+
+    async def fetch_elevations(points):
+        return None
+
+    service._fetch_elevations = fetch_elevations
+    loop = [(48.85, 2.35), (48.86, 2.35), (48.86, 2.36), (48.85, 2.35)]
+    out_and_back = [(48.85, 2.35), (48.86, 2.35), (48.85, 2.35)]
+
+    assert asyncio.run(service.get_elevations(loop)) is None
+    assert asyncio.run(service.get_elevations(out_and_back)) is None
+    assert service.calculate_elevation_metrics(None) == (None, None)
+
+
+def test_dem_miss_falls_back_to_the_api(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "SRTM_DIRECTORY", str(tmp_path))
+    service = ElevationService(backend="srtm")
+    requested = []
+
+    async def fetch_elevations(points):
+        requested.extend(points)
+        return [120.0] * len(points)
+
+    service._fetch_elevations = fetch_elevations
+
+    elevations = asyncio.run(service.get_elevations([(48.85, 2.35), (48.851, 2.35)]))
+
+    assert requested
+    assert elevations == [120.0, 120.0]
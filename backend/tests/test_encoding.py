@@ -0,0 +1,119 @@
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.response_cache import ResponseCache
+from utils.encoding import (
+    DEFAULT_FIELDS,
+    build_route_payload,
+    decode_polyline,
+    encode_polyline,
+    flatten_coordinates,
+    resolve_fields,
+)
+
+ROUTE = [(48.85, 2.35), (48.86, 2.35), (48.85, 2.35)]
+METRICS = {"distance_km": 2.2, "elevation_gain_m": 10.0, "elevation_loss_m": 10.0, "estimated_duration_min": 13}
+REQUEST = {"start_location": "Paris", "distance_km": 2.2, "route_type": "loop"}
+
+
+def test_polyline5_matches_reference_encoding():
+    # Exemple de la documentation de l'algorithme "Encoded Polyline"
+    coordinates = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+    assert encode_polyline(coordinates, precision=5) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert np.allclose(decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@", precision=5), coordinates)
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_polyline_round_trip(precision):
+    rng = random.Random(precision)
+    coordinates = [(rng.uniform(-89, 89), rng.uniform(-179, 179)) for _ in range(200)]
+
+    decoded = decode_polyline(encode_polyline(coordinates, precision), precision)
+
+    assert len(decoded) == len(coordinates)
+    assert np.allclose(decoded, coordinates, rtol=0, atol=0.6 * 10 ** -precision)
+
+
+def test_empty_polyline():
+    assert encode_polyline([]) == ""
+    assert decode_polyline("") == []
+
+
+def test_flat_coordinates():
+    assert flatten_coordinates(ROUTE) == [48.85, 2.35, 48.86, 2.35, 48.85, 2.35]
+
+
+def test_resolve_fields_defaults_and_compact_formats():
+    assert resolve_fields(None, None) == resolve_fields(None, "geojson") == set(DEFAULT_FIELDS)
+    assert resolve_fields(None, "polyline6") == {"metrics", "start_address", "polyline"}
+    assert resolve_fields(None, "flat") == {"metrics", "start_address", "coordinates"}
+    assert resolve_fields(" metrics , polyline ,", "polyline5") == {"metrics", "polyline"}
+
+
+@pytest.mark.parametrize("fields, output_format", [("metrics,altitude", None), (None, "kml")])
+def test_resolve_fields_rejects_unknown_values(fields, output_format):
+    with pytest.raises(ValueError):
+        resolve_fields(fields, output_format)
+
+
+def test_gpx_is_only_built_on_request():
+    built = []
+
+    def gpx():
+        built.append(True)
+        return "<gpx/>"
+
+    default = build_route_payload(ROUTE, {}, gpx, "Paris", resolve_fields(None, None))
+    assert "gpx" not in default and "geojson" in default
+    assert built == []
+
+    requested = build_route_payload(ROUTE, {}, gpx, "Paris", resolve_fields("gpx", None))
+    assert requested == {"gpx": "<gpx/>"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "response_cache", ResponseCache())
+    calls = []
+
+    async def geocode(address):
+        return 48.85, 2.35, "Paris, France"
+
+    async def generate_route(start_lat, start_lon, request, on_candidate=None, elevation_memo=None):
+        calls.append(request)
+        return ROUTE, METRICS, [35.0, 40.0, 35.0], "generated"
+
+    monkeypatch.setattr(main.geocoding_service, "geocode", geocode)
+    monkeypatch.setattr(main.route_generator, "generate_route", generate_route)
+    with TestClient(main.app) as test_client:
+        test_client.calls = calls
+        yield test_client
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/generate-route", REQUEST),
+    ("/api/generate-route/stream", REQUEST),
+    ("/api/generate-routes", {"routes": [REQUEST]}),
+])
+@pytest.mark.parametrize("query", ["fields=metrics,altitude", "format=kml"])
+def test_unknown_fields_or_format_are_rejected_with_400(client, path, body, query):
+    response = client.post(f"{path}?{query}", json=body)
+
+    assert response.status_code == 400
+    assert "inconnu" in response.json()["detail"]
+    assert client.calls == []
+
+
+def test_polyline_response_decodes_to_route(client):
+    response = client.post("/api/generate-route?format=polyline5", json=REQUEST)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["polyline_precision"] == 5
+    assert np.allclose(decode_polyline(body["polyline"], 5), ROUTE)
+    assert "geojson" not in body and "waypoints" not in body
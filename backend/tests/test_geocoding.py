@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+import config
+from services.geocoding import GeocodingService, normalize_address
+
+PARIS = (48.8566, 2.3522, "Paris, Île-de-France, France")
+
+
+@pytest.mark.parametrize("address", [
+    "Place de la République, Paris",
+    "  place de la republique   PARIS ",
+    "Place de la République — Paris!",
+])
+def test_normalize_address(address):
+    assert normalize_address(address) == "place de la republique paris"
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(config, "GEOCODE_CACHE_PATH", "")
+    monkeypatch.setattr(config, "GEOCODE_NEGATIVE_CACHE_TTL", 0.05)
+    service = GeocodingService()
+    service.searches = []
+    service.answers = {}
+
+    async def search(address):
+        service.searches.append(address)
+        await asyncio.sleep(0.01)
+        return service.answers.get(normalize_address(address), ())
+
+    service._search = search
+    return service
+
+
+def test_variants_of_an_address_share_the_cache(service):
+    service.answers["place de la republique paris"] = PARIS
+
+    first = asyncio.run(service.geocode("Place de la République, Paris"))
+    second = asyncio.run(service.geocode("place de la republique  PARIS"))
+
+    assert first == second == PARIS
+    assert service.searches == ["Place de la République, Paris"]
+
+
+def test_unknown_address_is_cached_until_negative_ttl(service):
+    assert asyncio.run(service.geocode("Nulle part")) is None
+    assert asyncio.run(service.geocode("nulle part")) is None
+    assert len(service.searches) == 1
+
+    time.sleep(0.06)
+    assert asyncio.run(service.geocode("Nulle part")) is None
+    assert len(service.searches) == 2
+
+
+def test_errors_are_not_cached(service):
+    async def failing_search(address):
+        service.searches.append(address)
+        return None
+
+    service._search = failing_search
+
+    assert asyncio.run(service.geocode("Paris")) is None
+    assert asyncio.run(service.geocode("Paris")) is None
+    assert len(service.searches) == 2
+
+
+def test_concurrent_identical_lookups_call_nominatim_once(service):
+    service.answers["paris"] = PARIS
+
+    async def scenario():
+        return await asyncio.gather(*(service.geocode(address) for address in ("Paris", "paris", "PARIS")))
+
+    assert asyncio.run(scenario()) == [PARIS] * 3
+    assert len(service.searches) == 1
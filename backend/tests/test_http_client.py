@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import pytest
+
+import config
+from services.http_client import HttpClientPool
+from utils.circuit_breaker import CircuitOpenError
+
+URL = "http://osrm.test/route"
+
+
+def pool_with_transport(handler, monkeypatch, primed_calls=config.CIRCUIT_BREAKER_MIN_CALLS):
+    """Pool dont le client osrm répond via handler, disjoncteur amorcé à 10 ms"""
+    monkeypatch.setattr(config, "HTTP_HEDGE_MIN_DELAY", 0.05)
+    pool = HttpClientPool(retries={"osrm": 0})
+    pool.hedge_upstreams = {"osrm"}
+    pool.get_client("osrm")
+    pool._clients["osrm"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    for _ in range(primed_calls):
+        pool.breaker("osrm").record(True, 0.01)
+    return pool
+
+
+def test_slow_get_is_hedged_and_first_response_wins(monkeypatch):
+    calls = []
+    cancelled = []
+
+    async def handler(request):
+        calls.append(len(calls) + 1)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return httpx.Response(200, json={"from": "primary"})
+        return httpx.Response(200, json={"from": "secondary"})
+
+    pool = pool_with_transport(handler, monkeypatch)
+
+    async def scenario():
+        response = await pool.get("osrm", URL)
+        await asyncio.sleep(0)
+        return response
+
+    response = asyncio.run(scenario())
+
+    assert response.json() == {"from": "secondary"}
+    assert calls == [1, 2]
+    assert cancelled == [True]
+    stats = pool.stats()["upstreams"]["osrm"]
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_fast_get_is_not_hedged(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        return httpx.Response(200)
+
+    pool = pool_with_transport(handler, monkeypatch)
+    asyncio.run(pool.get("osrm", URL))
+
+    assert len(calls) == 1
+    assert pool.stats()["upstreams"]["osrm"]["hedged"] == 0
+
+
+def test_no_hedge_without_latency_history(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.1)
+        return httpx.Response(200)
+
+    pool = pool_with_transport(handler, monkeypatch, primed_calls=0)
+    asyncio.run(pool.get("osrm", URL))
+
+    assert len(calls) == 1
+
+
+def test_open_breaker_fails_fast_without_sending(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    pool = pool_with_transport(handler, monkeypatch, primed_calls=0)
+    for _ in range(config.CIRCUIT_BREAKER_CONSECUTIVE_FAILURES):
+        assert asyncio.run(pool.post("osrm", URL)).status_code == 503
+
+    assert not pool.is_available("osrm")
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(pool.post("osrm", URL))
+    assert len(calls) == config.CIRCUIT_BREAKER_CONSECUTIVE_FAILURES
+    assert pool.stats()["upstreams"]["osrm"]["rejected"] == 1
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+
+import main
+from utils.metrics import MetricsRegistry
+
+
+def test_render_counter_gauge_histogram():
+    registry = MetricsRegistry(namespace="test_")
+    registry.counter("requests", "Requêtes", ["route"]).inc(route="/a")
+    registry.gauge("queue", "File").set(3)
+    histogram = registry.histogram("latency_seconds", "Latence", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+
+    text = registry.render()
+
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/a"} 1' in text
+    assert "test_queue 3" in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_latency_seconds_count 2" in text
+
+
+def test_unmatched_routes_are_labelled_other():
+    with TestClient(main.app) as client:
+        client.get("/nexiste/pas/123")
+        client.get("/nexiste/pas/456")
+        text = client.get("/metrics").text
+
+    lines = [line for line in text.splitlines() if line.startswith("routegen_http_request_duration_seconds_count")]
+    assert any('route="other"' in line and 'status="404"' in line for line in lines)
+    assert not any("/nexiste" in line for line in lines)
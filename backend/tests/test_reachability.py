@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from services.reachability import ReachabilityIndex
+from services.routing import RoutingBackend
+
+
+class SlowTableBackend(RoutingBackend):
+    """Backend dont l'appel "table" prend delay secondes"""
+
+    name = "test"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.table_calls = 0
+
+    async def route(self, waypoints, profile="foot", edge_filter=()):
+        return None
+
+    async def distances(self, origin, destinations, profile="foot", edge_filter=()):
+        self.table_calls += 1
+        await asyncio.sleep(self.delay)
+        return [1.3] * len(destinations)
+
+
+def make_index(backend):
+    return ReachabilityIndex(backend, radii_km=(1.0, 2.0), bearing_count=4, precision=6)
+
+
+def test_short_budget_does_not_cancel_build_shared_with_longer_budget():
+    backend = SlowTableBackend(delay=0.05)
+    index = make_index(backend)
+
+    async def scenario():
+        short = asyncio.create_task(asyncio.wait_for(index.get(48.85, 2.35), timeout=0.01))
+        long = asyncio.create_task(asyncio.wait_for(index.get(48.85, 2.35), timeout=1.0))
+        with pytest.raises(asyncio.TimeoutError):
+            await short
+        return await long
+
+    cell = asyncio.run(scenario())
+
+    assert cell is not None
+    assert cell.turnaround_radius(0, 1.3) == pytest.approx(1.0)
+    assert backend.table_calls == 1
+
+
+def test_abandoned_build_is_kept_for_later_requests():
+    backend = SlowTableBackend(delay=0.02)
+    index = make_index(backend)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(index.get(48.85, 2.35), timeout=0.005)
+        # Le calcul se termine sans appelant
+        await asyncio.sleep(0.05)
+        return await index.get(48.85, 2.35)
+
+    assert asyncio.run(scenario()) is not None
+    assert backend.table_calls == 1
@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.response_cache import ResponseCache
+
+ROUTE = [(48.85, 2.35), (48.86, 2.35), (48.85, 2.35)]
+METRICS = {"distance_km": 2.2, "elevation_gain_m": 10.0, "elevation_loss_m": 10.0, "estimated_duration_min": 13}
+REQUEST = {"start_location": "Paris", "distance_km": 2.2, "route_type": "loop"}
+
+
+def test_get_or_create_skips_non_cacheable_responses():
+    async def scenario():
+        cache = ResponseCache()
+        builds = 0
+
+        async def build():
+            nonlocal builds
+            builds += 1
+            return b"{}"
+
+        for _ in range(2):
+            await cache.get_or_create("repli", build, cacheable=lambda: False)
+        for _ in range(2):
+            await cache.get_or_create("routé", build, cacheable=lambda: True)
+        return builds
+
+    assert asyncio.run(scenario()) == 3
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "response_cache", ResponseCache())
+
+    async def geocode(address):
+        return 48.85, 2.35, "Paris, France"
+
+    monkeypatch.setattr(main.geocoding_service, "geocode", geocode)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def generator(monkeypatch, source):
+    calls = []
+
+    async def generate_route(start_lat, start_lon, request, on_candidate=None, elevation_memo=None):
+        calls.append(request.distance_km)
+        return ROUTE, METRICS, [35.0, 40.0, 35.0], source
+
+    monkeypatch.setattr(main.route_generator, "generate_route", generate_route)
+    return calls
+
+
+def test_fallback_route_is_not_cached(client, monkeypatch):
+    calls = generator(monkeypatch, "fallback")
+
+    for _ in range(2):
+        response = client.post("/api/generate-route", json=REQUEST)
+        assert response.status_code == 200
+
+    assert len(calls) == 2
+    assert main.response_cache.cache.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("source", ["generated", "cached"])
+def test_routed_route_is_cached(client, monkeypatch, source):
+    calls = generator(monkeypatch, source)
+
+    first = client.post("/api/generate-route", json=REQUEST)
+    second = client.post("/api/generate-route", json=REQUEST)
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert len(calls) == 1
+
+
+def test_concurrent_identical_stream_requests_share_one_generation(monkeypatch):
+    monkeypatch.setattr(main, "response_cache", ResponseCache())
+
+    async def geocode(address):
+        return 48.85, 2.35, "Paris, France"
+
+    calls = []
+
+    async def generate_route(start_lat, start_lon, request, on_candidate=None, elevation_memo=None):
+        calls.append(request.distance_km)
+        await asyncio.sleep(0.05)
+        on_candidate(0, ROUTE, 0.5, 2.2)
+        return ROUTE, METRICS, [35.0, 40.0, 35.0], "generated"
+
+    monkeypatch.setattr(main.geocoding_service, "geocode", geocode)
+    monkeypatch.setattr(main.route_generator, "generate_route", generate_route)
+
+    async def stream(client):
+        response = await client.post("/api/generate-route/stream", json=REQUEST)
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            concurrent = await asyncio.gather(*(stream(client) for _ in range(5)))
+            later = await stream(client)
+        return concurrent, later
+
+    concurrent, later = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    results = [events[-1] for events in concurrent + [later]]
+    assert all(result["event"] == "result" for result in results)
+    assert all(result == results[0] for result in results)
+    assert results[0]["route"]["metrics"]["distance_km"] == 2.2
+    # Seule la requête qui a lancé la génération reçoit les candidats
+    assert sum(any(event["event"] == "candidate" for event in events) for events in concurrent) == 1
+    assert [event["event"] for event in later] == ["geocode", "result"]
@@ -0,0 +1,49 @@
+import pytest
+
+import config
+from models import RouteRequest
+from services.result_store import RouteResultStore
+from utils.geo_helpers import destination_point
+
+START = (48.85, 2.35)
+
+
+def make_result(distance_km):
+    metrics = {"distance_km": distance_km, "elevation_gain_m": 10.0, "elevation_loss_m": 10.0}
+    return [START, (48.86, 2.35), START], metrics, [35.0, 40.0, 35.0]
+
+
+def request(**overrides):
+    return RouteRequest(**{"start_location": "Paris", "distance_km": 10.0, "route_type": "loop", **overrides})
+
+
+def test_default_start_radius_stays_within_geocoding_noise():
+    assert 10 <= config.RESULT_CACHE_START_RADIUS_M <= 25
+
+
+@pytest.mark.parametrize("bearing", [0, 90, 200, 315])
+def test_find_respects_start_radius(bearing):
+    store = RouteResultStore(start_radius_m=20, distance_tolerance=0.03)
+    store.add(*START, request(), make_result(10.0))
+
+    near = destination_point(*START, 0.015, bearing)
+    far = destination_point(*START, 0.030, bearing)
+
+    assert store.find(*near, request()) is not None
+    assert store.find(*far, request()) is None
+
+
+def test_find_respects_distance_tolerance():
+    store = RouteResultStore(start_radius_m=20, distance_tolerance=0.03)
+    store.add(*START, request(), make_result(10.0))
+
+    assert store.find(*START, request(distance_km=10.25)) is not None
+    assert store.find(*START, request(distance_km=10.5)) is None
+
+
+def test_training_type_does_not_split_variants():
+    store = RouteResultStore(start_radius_m=20, distance_tolerance=0.03)
+    store.add(*START, request(training_type="endurance"), make_result(10.0))
+
+    assert store.find(*START, request(training_type="fractionne")) is not None
+    assert store.find(*START, request(route_type="out_and_back")) is None
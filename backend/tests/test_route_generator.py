@@ -0,0 +1,161 @@
+import asyncio
+import math
+
+import pytest
+
+import config
+from models import RouteRequest
+from services.elevation import ElevationService
+from services.route_generator import RouteGenerator
+from services.routing import RoutingBackend
+
+ROUTE = [(48.85, 2.35), (48.86, 2.35), (48.85, 2.35)]
+
+
+class UnavailableBackend(RoutingBackend):
+    name = "test"
+
+    async def route(self, waypoints, profile="foot", edge_filter=()):
+        return None
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setattr(config, "SEGMENT_CACHE_PATH", "")
+    monkeypatch.setattr(config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "REACHABILITY_INDEX_ENABLED", False)
+    return RouteGenerator(ElevationService(backend="open-elevation"), routing_backend=UnavailableBackend())
+
+
+def test_run_candidates_tolerates_failed_and_cancelled_candidates(generator):
+    async def ok(score):
+        return ROUTE, score, ROUTE, 2.2
+
+    async def failing():
+        raise RuntimeError("routing en panne")
+
+    async def cancelled():
+        # Annulation interne (ex: délai d'un appel partagé), pas celle de la recherche
+        raise asyncio.CancelledError()
+
+    results = asyncio.run(generator._run_candidates(
+        [ok(5.0), failing(), cancelled(), ok(3.0)], time_budget=1.0, acceptable_score=0.0
+    ))
+
+    assert results == [
+        (ROUTE, 5.0, ROUTE, 2.2), (None, math.inf, None, None), (None, math.inf, None, None), (ROUTE, 3.0, ROUTE, 2.2)
+    ]
+
+
+def test_run_candidates_abandons_candidates_after_deadline(generator):
+    cancelled = []
+
+    async def fast():
+        return ROUTE, 5.0, ROUTE, 2.2
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return ROUTE, 1.0, ROUTE, 2.2
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await generator._run_candidates(
+            [slow(), fast(), slow()], time_budget=0.05, acceptable_score=0.0
+        )
+        return results, loop.time() - started
+
+    results, elapsed = asyncio.run(scenario())
+
+    assert results == [(ROUTE, 5.0, ROUTE, 2.2)]
+    assert cancelled == [True, True]
+    assert elapsed < 1.0
+
+
+def test_run_candidates_stops_at_acceptable_score(generator):
+    async def good():
+        return ROUTE, 0.1, ROUTE, 2.2
+
+    async def slow():
+        await asyncio.sleep(10)
+        return ROUTE, 0.0, ROUTE, 2.2
+
+    results = asyncio.run(generator._run_candidates(
+        [slow(), good()], time_budget=5.0, acceptable_score=1.0
+    ))
+
+    assert results == [(ROUTE, 0.1, ROUTE, 2.2)]
+
+
+def test_generate_route_simplifies_each_candidate_once(generator, monkeypatch):
+    simplified_calls = []
+    simplify_route = generator._simplify_route
+
+    def counting_simplify_route(coordinates, tolerance_m):
+        simplified_calls.append(len(coordinates))
+        return simplify_route(coordinates, tolerance_m)
+
+    async def out_and_back(start_lat, start_lon, one_way_distance, bearing, request):
+        return [(48.85, 2.35), (48.85 + bearing * 1e-5, 2.36), (48.85, 2.35)], 1.0
+
+    async def score(coordinates, request, elevation_memo, simplified_route, distance_km):
+        return 1.0 + coordinates[1][0]
+
+    async def route_metrics(coordinates, target_km, elevation_memo, simplified_route, distance_km):
+        return {"distance_km": 1.0, "elevation_gain_m": 0.0, "elevation_loss_m": 0.0}, []
+
+    monkeypatch.setattr(generator, "_simplify_route", counting_simplify_route)
+    monkeypatch.setattr(generator, "_generate_out_and_back_route", out_and_back)
+    monkeypatch.setattr(generator, "_score_route", score)
+    monkeypatch.setattr(generator, "_calculate_route_metrics", route_metrics)
+    generator.routing_backend.available = lambda: True
+
+    streamed = []
+    request = RouteRequest(start_location="Paris", distance_km=1.0, route_type="out_and_back")
+    coordinates, _, _, source = asyncio.run(generator.generate_route(
+        48.85, 2.35, request, on_candidate=lambda *candidate: streamed.append(candidate)
+    ))
+
+    assert source == "generated"
+    assert len(streamed) == 8
+    assert len(simplified_calls) == 8
+    assert coordinates == streamed[0][1]
+
+
+def test_unknown_elevation_is_not_scored_as_flat(generator, monkeypatch):
+    async def unknown(coordinates, memo=None):
+        return None
+
+    monkeypatch.setattr(generator.elevation_service, "get_elevations", unknown)
+    route = [(48.85, 2.35), (48.86, 2.35), (48.85, 2.35)]
+    distance = 2 * 1.11195
+    request = RouteRequest(
+        start_location="Paris", distance_km=distance, route_type="out_and_back", elevation_preference="montagneux"
+    )
+
+    score = asyncio.run(generator._score_route(route, request))
+    metrics, elevations = asyncio.run(generator._calculate_route_metrics(route, distance))
+
+    assert score < 1.0
+    assert elevations is None
+    assert metrics["elevation_gain_m"] is None and metrics["elevation_loss_m"] is None
+
+
+def test_routed_distance_is_used_for_scoring_and_metrics(generator, monkeypatch):
+    async def flat(coordinates, memo=None):
+        return [35.0] * len(coordinates)
+
+    monkeypatch.setattr(generator.elevation_service, "get_elevations", flat)
+    # Tracé à vol d'oiseau de ~2.2 km, distance routée (sur les routes) de 5 km
+    request = RouteRequest(start_location="Paris", distance_km=5.0, route_type="out_and_back")
+
+    assert asyncio.run(generator._score_route(ROUTE, request, distance_km=5.0)) == 0.0
+    assert asyncio.run(generator._score_route(ROUTE, request)) > 20.0
+
+    metrics, _ = asyncio.run(generator._calculate_route_metrics(ROUTE, 5.0, distance_km=5.0))
+    assert metrics["distance_km"] == 5.0
+    assert metrics["estimated_duration_min"] == 25
@@ -0,0 +1,122 @@
+import asyncio
+import math
+import random
+import threading
+import time
+
+import pytest
+
+from services.road_graph import CLASS_NAMES, RoadGraph, excluded_classes_mask
+from services.routing import LocalRoutingBackend
+from utils.geo_helpers import haversine_distance
+
+GRID = 12
+
+
+@pytest.fixture(scope="module")
+def graph():
+    """Grille de GRID x GRID nœuds (~100 m), classes de voies alternées"""
+    rng = random.Random(1)
+    nodes = {
+        1 + i * GRID + j: (48.80 + i * 0.0009 + rng.uniform(-2e-4, 2e-4),
+                           2.30 + j * 0.00137 + rng.uniform(-2e-4, 2e-4))
+        for i in range(GRID) for j in range(GRID)
+    }
+    classes = [CLASS_NAMES.index(name) for name in ("residential", "footway", "path", "primary")]
+    ways = [([1 + i * GRID + j for j in range(GRID)], classes[i % len(classes)], 0) for i in range(GRID)]
+    ways += [([1 + i * GRID + j for i in range(GRID)], classes[(j + 1) % len(classes)], 0) for j in range(GRID)]
+    return RoadGraph.from_ways(nodes, ways)
+
+
+def path_length(graph, path, excluded=0):
+    length = 0.0
+    for u, v in zip(path[:-1], path[1:]):
+        start, end = int(graph.indptr[u]), int(graph.indptr[u + 1])
+        weights = [
+            float(w) for t, w, c in zip(graph.targets[start:end], graph.weights[start:end], graph.classes[start:end])
+            if t == v and not excluded >> int(c) & 1
+        ]
+        assert weights, f"arête {u}->{v} absente ou exclue"
+        length += min(weights)
+    return length
+
+
+@pytest.mark.parametrize("excluded", [0, excluded_classes_mask(["primary"])])
+def test_bidirectional_astar_matches_dijkstra(graph, excluded):
+    rng = random.Random(2)
+    for _ in range(30):
+        source, target = rng.randrange(graph.node_count), rng.randrange(graph.node_count)
+        distances, _, _ = graph.shortest_path_tree(source, math.inf, excluded)
+        result = graph.shortest_path(source, target, excluded)
+
+        if not math.isfinite(distances[target]):
+            assert result is None
+            continue
+        path, length = result
+        assert path[0] == source and path[-1] == target
+        assert length == pytest.approx(distances[target], rel=1e-4)
+        assert path_length(graph, path, excluded) == pytest.approx(length, rel=1e-4)
+
+
+def test_find_loops_are_closed_and_near_target(graph):
+    source = graph.nearest_node(48.805, 2.308)
+    loops = graph.find_loops(source, 2000)
+
+    assert loops
+    assert [loop.score for loop in loops] == sorted(loop.score for loop in loops)
+    for loop in loops:
+        assert loop.coordinates[0] == loop.coordinates[-1] == graph.coordinates(source)
+        geometry_km = sum(
+            haversine_distance(*a, *b) for a, b in zip(loop.coordinates[:-1], loop.coordinates[1:])
+        )
+        assert geometry_km == pytest.approx(loop.length_km, rel=1e-3)
+        assert 0 <= loop.overlap_km <= loop.length_km / 2
+    assert abs(loops[0].length_km - 2.0) < 0.2
+
+
+
+def test_find_loops_closes_through_one_way_edge():
+    # Carré départ -> A -> B -> C -> départ, B -> C à sens unique ; les
+    # identifiants placent C avant B dans la numérotation du graphe
+    start, a, c, b = 1, 2, 3, 4
+    nodes = {start: (48.80, 2.30), a: (48.8036, 2.30), b: (48.8036, 2.3055), c: (48.80, 2.3055)}
+    residential = CLASS_NAMES.index("residential")
+    ways = [([start, a, b], residential, 0), ([b, c], residential, 1), ([c, start], residential, 0)]
+    graph = RoadGraph.from_ways(nodes, ways)
+
+    loops = graph.find_loops(graph.nearest_node(*nodes[start]), 1600)
+
+    assert len(loops) == 1
+    assert [graph.nearest_node(*point) for point in loops[0].coordinates] == [
+        graph.nearest_node(*nodes[node]) for node in (start, a, b, c, start)
+    ]
+    assert loops[0].overlap_km == 0
+
+
+def test_find_loops_survives_cancelled_caller(graph, tmp_path):
+    path = str(tmp_path / "foot.graph")
+    graph.save(path)
+    backend = LocalRoutingBackend(graph_path=path, osm_path="")
+
+    calls = []
+    find_loops = backend.graph.find_loops
+
+    def slow_find_loops(*args):
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return find_loops(*args)
+
+    backend.graph.find_loops = slow_find_loops
+
+    async def scenario():
+        short = asyncio.create_task(asyncio.wait_for(backend.find_loops(48.805, 2.308, 2.0), timeout=0.01))
+        long = asyncio.create_task(asyncio.wait_for(backend.find_loops(48.805, 2.308, 2.0), timeout=2.0))
+        with pytest.raises(asyncio.TimeoutError):
+            await short
+        loops = await long
+        return loops, await backend.find_loops(48.805, 2.308, 2.0)
+
+    loops, cached = asyncio.run(scenario())
+
+    assert loops and cached is loops
+    assert len(calls) == 1
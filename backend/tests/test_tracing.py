@@ -0,0 +1,38 @@
+import pytest
+
+from utils.tracing import TRACER, SpanExporter, current_span, iteration_spans, span
+
+
+class CollectingExporter(SpanExporter):
+    async def export(self, spans):
+        pass
+
+
+@pytest.fixture
+def tracer():
+    TRACER.configure(CollectingExporter())
+    yield TRACER
+    TRACER.configure(None)
+
+
+def test_iteration_spans_are_closed_on_early_return(tracer):
+    def solve():
+        with iteration_spans(range(10), "iteration", kind="test") as iterations:
+            for item, item_span in iterations:
+                if item == 2:
+                    return current_span()
+
+    with span("parent") as parent:
+        last_iteration = solve()
+        # Le span de l'itération interrompue n'est plus le span courant
+        assert current_span() is parent
+
+    ended = [(done.name, done.attributes.get("iteration"), done.parent_id) for done in tracer._queue]
+    assert ended == [
+        ("iteration", 1, parent.span_id),
+        ("iteration", 2, parent.span_id),
+        ("iteration", 3, parent.span_id),
+        ("parent", None, None),
+    ]
+    assert last_iteration.end_ns > 0
+    assert all(done.status == "ok" for done in tracer._queue)
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Cache mémoire LRU avec expiration (TTL)
+
+    La taille est bornée en nombre d'entrées et, optionnellement, en poids
+    total (par exemple le nombre de points GPS stockés).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        max_weight: Optional[int] = None,
+        weigher: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher or (lambda value: 1)
+
+        # clé -> (valeur, date d'expiration, poids)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._weight = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Lit une entrée du cache
+
+        Args:
+            key: Clé recherchée
+            default: Valeur retournée si absente ou expirée
+
+        Returns:
+            Valeur en cache ou default
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at, _ = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Ajoute ou remplace une entrée
+
+        Args:
+            key: Clé
+            value: Valeur à stocker
+            ttl: Durée de vie en secondes (TTL par défaut du cache si None)
+        """
+        if key in self._data:
+            self._remove(key)
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        weight = self.weigher(value)
+
+        self._data[key] = (value, expires_at, weight)
+        self._weight += weight
+        self._evict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        """Vide le cache"""
+        self._data.clear()
+        self._weight = 0
+
+    def stats(self) -> dict:
+        """Statistiques du cache (taille, hits/misses, évictions)"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "weight": self._weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, key: Hashable):
+        _, _, weight = self._data.pop(key)
+        self._weight -= weight
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées si nécessaire"""
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_weight is not None and self._weight > self.max_weight)
+        ):
+            key = next(iter(self._data))
+            self._remove(key)
+            self.evictions += 1
+
+
+class SqliteCache:
+    """
+    Cache persistant sur disque (sqlite), valeurs sérialisées en JSON
+
+    Les accès sont synchrones ; utiliser TieredCache pour un usage asynchrone.
+    """
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Any:
+        """Lit une entrée non expirée (None si absente)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Écrit une entrée (ttl en secondes, None = pas d'expiration)"""
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+
+    def delete(self, key: str):
+        """Supprime une entrée"""
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        """Supprime les entrées expirées"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)
+            )
+
+    def close(self):
+        """Ferme la connexion sqlite"""
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    Cache à deux niveaux : LRU mémoire devant un stockage sqlite optionnel
+
+    Les accès disque sont exécutés dans un thread pour ne pas bloquer la
+    boucle d'événements. Une entrée trouvée sur disque est remontée en mémoire.
+    """
+
+    def __init__(self, memory: LRUCache, persistent: Optional[SqliteCache] = None):
+        self.memory = memory
+        self.persistent = persistent
+        self.persistent_hits = 0
+
+    async def get(self, key: Hashable) -> Any:
+        """Lit une entrée (mémoire puis disque), None si absente"""
+        value = self.memory.get(key)
+        if value is not None or self.persistent is None:
+            return value
+
+        value = await asyncio.to_thread(self.persistent.get, self._storage_key(key))
+        if value is not None:
+            self.persistent_hits += 1
+            self.memory.set(key, value)
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Écrit une entrée dans les deux niveaux"""
+        self.memory.set(key, value, ttl)
+        if self.persistent is not None:
+            ttl = self.memory.ttl if ttl is None else ttl
+            await asyncio.to_thread(self.persistent.set, self._storage_key(key), value, ttl)
+
+    def stats(self) -> dict:
+        """Statistiques des deux niveaux"""
+        stats = self.memory.stats()
+        stats["persistent"] = self.persistent is not None
+        stats["persistent_hits"] = self.persistent_hits
+        return stats
+
+    @staticmethod
+    def _storage_key(key: Hashable) -> str:
+        return key if isinstance(key, str) else json.dumps(key)
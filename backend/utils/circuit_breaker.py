@@ -0,0 +1,211 @@
+import random
+import time
+from collections import deque
+from typing import Optional
+
+
+class CircuitOpenError(Exception):
+    """Appel refusé sans être envoyé : le disjoncteur du service est ouvert"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"service '{name}' indisponible (disjoncteur ouvert, nouvel essai dans {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un service externe
+
+    Les derniers appels (succès/échec et latence) sont conservés sur une
+    fenêtre glissante. Le disjoncteur s'ouvre quand le taux d'échec de la
+    fenêtre dépasse le seuil, ou après plusieurs échecs consécutifs ; les
+    appels trop lents comptent comme des échecs. Ouvert, il refuse les appels
+    pendant open_duration secondes, puis laisse passer un seul appel de test
+    (semi-ouvert) : un succès le referme, un échec le rouvre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 50,
+        min_calls: int = 10,
+        error_rate_threshold: float = 0.5,
+        consecutive_failures: int = 5,
+        open_duration: float = 30.0,
+        slow_call_s: Optional[float] = None
+    ):
+        """
+        Args:
+            name: Nom du service externe
+            window: Nombre d'appels conservés dans la fenêtre glissante
+            min_calls: Appels minimum dans la fenêtre avant d'évaluer le taux d'échec
+            error_rate_threshold: Taux d'échec provoquant l'ouverture
+            consecutive_failures: Échecs consécutifs provoquant l'ouverture
+            open_duration: Durée d'ouverture en secondes avant un appel de test
+            slow_call_s: Latence au-delà de laquelle un appel compte comme un échec
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.consecutive_failures = consecutive_failures
+        self.open_duration = open_duration
+        self.slow_call_s = slow_call_s
+
+        # Fenêtre glissante de (succès, latence en secondes)
+        self._calls = deque(maxlen=window)
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.state = self.CLOSED
+
+        self.successes = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Vrai si un appel serait refusé maintenant (sans consommer l'appel de test)"""
+        if self.state == self.OPEN:
+            return self.retry_after() > 0
+        return self.state == self.HALF_OPEN and self._probe_in_flight
+
+    def retry_after(self) -> float:
+        """Secondes restantes avant l'appel de test (0 si le disjoncteur n'est pas ouvert)"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_duration - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        Décide si un appel peut être envoyé
+
+        Un appel autorisé doit ensuite être terminé par record() ou release().
+
+        Returns:
+            True si l'appel peut être envoyé
+        """
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def record(self, success: bool, latency: float):
+        """
+        Enregistre le résultat d'un appel
+
+        Args:
+            success: Réponse exploitable reçue
+            latency: Durée de l'appel en secondes
+        """
+        if success and self.slow_call_s is not None and latency > self.slow_call_s:
+            self.slow_calls += 1
+            success = False
+
+        if success:
+            self.successes += 1
+            self._consecutive = 0
+        else:
+            self.failures += 1
+            self._consecutive += 1
+
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+            if success:
+                self.state = self.CLOSED
+                self._calls.clear()
+            else:
+                self._open()
+            return
+
+        self._calls.append((success, latency))
+        if self.state == self.CLOSED and self._should_open():
+            self._open()
+
+    def release(self):
+        """Termine un appel autorisé mais abandonné (annulé) sans résultat"""
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def error_rate(self) -> float:
+        """Taux d'échec sur la fenêtre glissante"""
+        if not self._calls:
+            return 0.0
+        return sum(1 for success, _ in self._calls if not success) / len(self._calls)
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        """
+        Quantile de latence des appels réussis de la fenêtre
+
+        Args:
+            quantile: Quantile entre 0 et 1 (ex: 0.95)
+
+        Returns:
+            Latence en secondes, ou None si la fenêtre n'a pas assez d'appels
+        """
+        latencies = sorted(latency for success, latency in self._calls if success)
+        if len(latencies) < self.min_calls:
+            return None
+        return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+    def stats(self) -> dict:
+        """État du disjoncteur, taux d'échec et latences de la fenêtre"""
+        p50 = self.latency_quantile(0.5)
+        p95 = self.latency_quantile(0.95)
+        return {
+            "state": self.OPEN if self.is_open else self.state,
+            "retry_after_s": round(self.retry_after(), 1),
+            "window_calls": len(self._calls),
+            "error_rate": round(self.error_rate(), 3),
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "opened": self.opened
+        }
+
+    def _should_open(self) -> bool:
+        if self._consecutive >= self.consecutive_failures:
+            return True
+        return len(self._calls) >= self.min_calls and self.error_rate() >= self.error_rate_threshold
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.opened += 1
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    Délai avant une nouvelle tentative (backoff exponentiel, gigue complète)
+
+    La gigue aléatoire évite que les appels échoués en même temps soient
+    tous relancés au même instant.
+
+    Args:
+        attempt: Numéro de la nouvelle tentative (1 pour la première relance)
+        base: Délai de base en secondes
+        maximum: Délai maximum en secondes
+
+    Returns:
+        Délai en secondes, tiré uniformément dans [0, min(maximum, base * 2^(attempt-1))]
+    """
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
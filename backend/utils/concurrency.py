@@ -0,0 +1,152 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class AsyncTokenBucket:
+    """
+    Limiteur de débit asynchrone (seau à jetons)
+
+    Les appelants attendent avec asyncio.sleep, sans bloquer la boucle
+    d'événements. Les jetons sont attribués dans l'ordre d'arrivée.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Nombre de jetons ajoutés par seconde
+            capacity: Nombre maximum de jetons accumulés (rafale autorisée)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.acquired = 0
+        self.total_wait_time = 0.0
+
+    async def acquire(self):
+        """Attend qu'un jeton soit disponible puis le consomme"""
+        start = time.monotonic()
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            # Le verrou sérialise les attentes : un seul appelant dort à la fois
+            async with self._lock:
+                self._refill()
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self.waiting -= 1
+
+        self.acquired += 1
+        self.total_wait_time += time.monotonic() - start
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def stats(self) -> dict:
+        """Statistiques du limiteur (profondeur de file, temps d'attente)"""
+        return {
+            "rate_per_s": self.rate,
+            "queue_depth": self.waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "acquired": self.acquired,
+            "avg_wait_s": round(self.total_wait_time / self.acquired, 3) if self.acquired else 0.0
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+
+class _Flight:
+    """Calcul en cours pour une clé : tâche partagée et nombre d'appelants qui l'attendent"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents identiques en un seul appel
+
+    Tant qu'un appel pour une clé est en cours, les appelants suivants
+    attendent son résultat au lieu de relancer le calcul. Le calcul tourne
+    dans une tâche détachée, attendue par chaque appelant (le premier
+    compris) à travers asyncio.shield : l'annulation d'un appelant ne touche
+    pas les autres. Le calcul n'est annulé que lorsqu'il n'a plus aucun
+    appelant, sauf en mode détaché.
+    """
+
+    def __init__(self, detached: bool = False):
+        """
+        Args:
+            detached: Mener le calcul à son terme même sans appelant (fn
+                conserve alors elle-même son résultat, ex: dans un cache)
+        """
+        self.detached = detached
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Exécute fn une seule fois pour tous les appelants concurrents de key
+
+        Args:
+            key: Clé identifiant l'appel
+            fn: Fabrique de la coroutine à exécuter
+
+        Returns:
+            Résultat de fn (partagé entre les appelants)
+        """
+        flight = self._in_flight.get(key)
+        if flight is None:
+            self.calls += 1
+            flight = self._in_flight[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda task: self._done(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done() and not self.detached:
+                # Plus personne n'attend le résultat : abandon du calcul
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _done(self, key: Hashable, flight: _Flight):
+        self._forget(key, flight)
+        if not flight.task.cancelled():
+            # Évite l'avertissement "exception never retrieved" sans attente
+            flight.task.exception()
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        # Un nouveau calcul a pu être lancé pour la clé après un abandon
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """Statistiques de regroupement"""
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,169 @@
+import numpy as np
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from utils.geo_helpers import coordinates_to_geojson
+from utils.tracing import span
+
+# Formats de géométrie supportés
+GEOMETRY_FORMATS = {
+    "geojson": "geojson",  # GeoJSON + liste de waypoints (format historique)
+    "polyline5": "polyline",  # Polyline encodée (précision 1e-5)
+    "polyline6": "polyline",  # Polyline encodée (précision 1e-6, OSRM/Valhalla)
+    "flat": "coordinates",  # Tableau plat [lat0, lon0, lat1, lon1, ...]
+}
+
+# Champs disponibles dans la réponse
+ROUTE_FIELDS = {"geojson", "gpx", "metrics", "waypoints", "start_address", "polyline", "coordinates"}
+
+# Champs renvoyés par défaut (le GPX, volumineux, n'est renvoyé que sur
+# demande : fields=gpx)
+DEFAULT_FIELDS = ["geojson", "metrics", "waypoints", "start_address"]
+
+
+def encode_polyline(coordinates: List[Tuple[float, float]], precision: int = 6) -> str:
+    """
+    Encode des coordonnées au format "Encoded Polyline" de Google
+
+    Args:
+        coordinates: Liste de tuples (lat, lon)
+        precision: Nombre de décimales conservées (5 ou 6)
+
+    Returns:
+        Chaîne encodée
+    """
+    if not coordinates:
+        return ""
+
+    # Deltas entiers entre points successifs (calcul vectorisé)
+    values = np.round(np.asarray(coordinates, dtype=np.float64) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(values, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+
+    chunks = []
+    for value in deltas.tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+
+    return "".join(chunks)
+
+
+def decode_polyline(encoded: str, precision: int = 6) -> List[Tuple[float, float]]:
+    """
+    Décode une chaîne "Encoded Polyline"
+
+    Args:
+        encoded: Chaîne encodée
+        precision: Nombre de décimales utilisé à l'encodage
+
+    Returns:
+        Liste de tuples (lat, lon)
+    """
+    values = []
+    value = shift = 0
+    for char in encoded:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+
+    points = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return [tuple(point) for point in points.tolist()]
+
+
+def flatten_coordinates(coordinates: List[Tuple[float, float]]) -> List[float]:
+    """
+    Aplatit les coordonnées en un tableau [lat0, lon0, lat1, lon1, ...]
+
+    Args:
+        coordinates: Liste de tuples (lat, lon)
+
+    Returns:
+        Liste de réels
+    """
+    return [value for point in coordinates for value in point]
+
+
+def resolve_fields(fields: Optional[str], output_format: Optional[str]) -> Set[str]:
+    """
+    Détermine les champs à renvoyer à partir des paramètres de la requête
+
+    Args:
+        fields: Liste de champs séparés par des virgules (None = défaut)
+        output_format: Format de géométrie (geojson, polyline5, polyline6, flat)
+
+    Returns:
+        Ensemble des champs à renvoyer
+
+    Raises:
+        ValueError: Si un champ ou le format est inconnu
+    """
+    if output_format is not None and output_format not in GEOMETRY_FORMATS:
+        raise ValueError(
+            f"Format inconnu: {output_format} (attendu: {', '.join(GEOMETRY_FORMATS)})"
+        )
+
+    if fields:
+        selected = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = selected - ROUTE_FIELDS
+        if unknown:
+            raise ValueError(
+                f"Champ(s) inconnu(s): {', '.join(sorted(unknown))} "
+                f"(attendu: {', '.join(sorted(ROUTE_FIELDS))})"
+            )
+        return selected
+
+    if output_format in (None, "geojson"):
+        return set(DEFAULT_FIELDS)
+
+    # Format compact : la géométrie n'est transmise qu'une fois
+    return {"metrics", "start_address", GEOMETRY_FORMATS[output_format]}
+
+
+def build_route_payload(
+    coordinates: List[Tuple[float, float]],
+    metrics: dict,
+    gpx: Callable[[], str],
+    start_address: str,
+    fields: Iterable[str] = DEFAULT_FIELDS,
+    output_format: Optional[str] = None
+) -> dict:
+    """
+    Construit la réponse d'un parcours en ne calculant que les champs demandés
+
+    Args:
+        coordinates: Coordonnées du parcours
+        metrics: Métriques du parcours
+        gpx: Fonction générant le contenu GPX (appelée seulement si demandé)
+        start_address: Adresse de départ résolue
+        fields: Champs à inclure
+        output_format: Format de géométrie (précision de la polyline)
+
+    Returns:
+        Dictionnaire sérialisable en JSON
+    """
+    fields = set(fields)
+    payload = {}
+
+    if "geojson" in fields:
+        with span("serialize_geojson", point_count=len(coordinates)):
+            payload["geojson"] = coordinates_to_geojson(coordinates)
+    if "gpx" in fields:
+        payload["gpx"] = gpx()
+    if "metrics" in fields:
+        payload["metrics"] = metrics
+    if "waypoints" in fields:
+        payload["waypoints"] = [{"lat": lat, "lon": lon} for lat, lon in coordinates]
+    if "start_address" in fields:
+        payload["start_address"] = start_address
+    if "polyline" in fields:
+        precision = 5 if output_format == "polyline5" else 6
+        payload["polyline"] = encode_polyline(coordinates, precision)
+        payload["polyline_precision"] = precision
+    if "coordinates" in fields:
+        payload["coordinates"] = flatten_coordinates(coordinates)
+
+    return payload
@@ -1,5 +1,11 @@
 import math
-from typing import List, Tuple
+import numpy as np
+from typing import List, Optional, Tuple, Union
+
+# Rayon de la Terre en km
+EARTH_RADIUS_KM = 6371
+
+ArrayLike = Union[float, np.ndarray]
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -14,7 +20,7 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     Returns:
         Distance en kilomètres
     """
-    R = 6371  # Rayon de la Terre en km
+    R = EARTH_RADIUS_KM
 
     lat1_rad = math.radians(lat1)
     lat2_rad = math.radians(lat2)
@@ -43,13 +49,7 @@ def calculate_total_distance(coordinates: List[Tuple[float, float]]) -> float:
     if len(coordinates) < 2:
         return 0.0
 
-    total_distance = 0.0
-    for i in range(len(coordinates) - 1):
-        lat1, lon1 = coordinates[i]
-        lat2, lon2 = coordinates[i + 1]
-        total_distance += haversine_distance(lat1, lon1, lat2, lon2)
-
-    return total_distance
+    return float(segment_distances(coordinates).sum())
 
 
 def calculate_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -91,7 +91,7 @@ def destination_point(lat: float, lon: float, distance_km: float, bearing: float
     Returns:
         Tuple (latitude, longitude) du point d'arrivée
     """
-    R = 6371  # Rayon de la Terre en km
+    R = EARTH_RADIUS_KM
 
     lat_rad = math.radians(lat)
     lon_rad = math.radians(lon)
@@ -133,3 +133,292 @@ def coordinates_to_geojson(coordinates: List[Tuple[float, float]]) -> dict:
             }
         ]
     }
+
+
+def snap_to_grid(lat: float, lon: float, grid_deg: float) -> Tuple[float, float]:
+    """
+    Arrondit un point GPS sur une grille régulière (en degrés)
+
+    Args:
+        lat, lon: Coordonnées du point
+        grid_deg: Pas de la grille en degrés
+
+    Returns:
+        Tuple (latitude, longitude) arrondi
+    """
+    if grid_deg <= 0:
+        return lat, lon
+    return (
+        round(round(lat / grid_deg) * grid_deg, 7),
+        round(round(lon / grid_deg) * grid_deg, 7)
+    )
+
+
+def mirror_index(coordinates: List[Tuple[float, float]]) -> Optional[int]:
+    """
+    Détecte un aller-retour symétrique (retour = aller inversé)
+
+    Args:
+        coordinates: Liste de tuples (lat, lon)
+
+    Returns:
+        Index du point de demi-tour, ou None si le parcours n'est pas symétrique
+    """
+    n = len(coordinates)
+    if n < 3 or n % 2 == 0:
+        return None
+    half = n // 2
+    if coordinates[:half] != coordinates[:half:-1]:
+        return None
+    return half
+
+
+# Alphabet base 32 des geohash
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 7) -> str:
+    """
+    Geohash d'un point (cellule contenant le point)
+
+    Args:
+        lat, lon: Coordonnées du point
+        precision: Nombre de caractères (7 ≈ cellule de 150 m)
+
+    Returns:
+        Geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # les bits alternent longitude / latitude
+
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+
+    return "".join(chars)
+
+
+def geohash_decode(geohash: str) -> Tuple[float, float]:
+    """
+    Centre de la cellule d'un geohash
+
+    Args:
+        geohash: Geohash
+
+    Returns:
+        Tuple (latitude, longitude) du centre
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+# --- Versions vectorisées (NumPy) ---------------------------------------------
+# Les fonctions scalaires ci-dessus restent disponibles pour les appels point
+# à point ; les versions suivantes traitent des tableaux de coordonnées.
+
+
+def haversine_distances(
+    lats1: ArrayLike,
+    lons1: ArrayLike,
+    lats2: ArrayLike,
+    lons2: ArrayLike
+) -> np.ndarray:
+    """
+    Distances de Haversine entre deux séries de points (en kilomètres)
+
+    Args:
+        lats1, lons1: Coordonnées des premiers points (tableaux ou scalaires)
+        lats2, lons2: Coordonnées des seconds points
+
+    Returns:
+        Tableau des distances en kilomètres
+    """
+    lat1_rad = np.radians(lats1)
+    lat2_rad = np.radians(lats2)
+    delta_lat = lat2_rad - lat1_rad
+    delta_lon = np.radians(np.subtract(lons2, lons1))
+
+    a = np.sin(delta_lat / 2) ** 2 + \
+        np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon / 2) ** 2
+
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def segment_distances(coordinates: Union[List[Tuple[float, float]], np.ndarray]) -> np.ndarray:
+    """
+    Longueur de chaque segment d'un parcours
+
+    Args:
+        coordinates: Liste de tuples (lat, lon) ou tableau (n, 2)
+
+    Returns:
+        Tableau de n-1 distances en kilomètres
+    """
+    points = np.asarray(coordinates, dtype=np.float64)
+    if len(points) < 2:
+        return np.zeros(0)
+    return haversine_distances(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+
+
+def cumulative_distances(coordinates: Union[List[Tuple[float, float]], np.ndarray]) -> np.ndarray:
+    """
+    Distance cumulée depuis le départ pour chaque point du parcours
+
+    Args:
+        coordinates: Liste de tuples (lat, lon) ou tableau (n, 2)
+
+    Returns:
+        Tableau de n distances en kilomètres (le premier vaut 0)
+    """
+    if len(coordinates) == 0:
+        return np.zeros(0)
+    return np.concatenate(([0.0], np.cumsum(segment_distances(coordinates))))
+
+
+def calculate_bearings(
+    lats1: ArrayLike,
+    lons1: ArrayLike,
+    lats2: ArrayLike,
+    lons2: ArrayLike
+) -> np.ndarray:
+    """
+    Caps entre deux séries de points
+
+    Args:
+        lats1, lons1: Coordonnées des premiers points
+        lats2, lons2: Coordonnées des seconds points
+
+    Returns:
+        Tableau des caps en degrés (0-360)
+    """
+    lat1_rad = np.radians(lats1)
+    lat2_rad = np.radians(lats2)
+    delta_lon = np.radians(np.subtract(lons2, lons1))
+
+    x = np.sin(delta_lon) * np.cos(lat2_rad)
+    y = np.cos(lat1_rad) * np.sin(lat2_rad) - \
+        np.sin(lat1_rad) * np.cos(lat2_rad) * np.cos(delta_lon)
+
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+def destination_points(
+    lats: ArrayLike,
+    lons: ArrayLike,
+    distances_km: ArrayLike,
+    bearings: ArrayLike
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Points de destination pour des séries de départs, distances et caps
+
+    Args:
+        lats, lons: Coordonnées des points de départ
+        distances_km: Distances en kilomètres
+        bearings: Caps en degrés
+
+    Returns:
+        Tuple (latitudes, longitudes) des points d'arrivée
+    """
+    lat_rad = np.radians(lats)
+    lon_rad = np.radians(lons)
+    bearing_rad = np.radians(bearings)
+    angular = np.asarray(distances_km, dtype=np.float64) / EARTH_RADIUS_KM
+
+    lat2_rad = np.arcsin(
+        np.sin(lat_rad) * np.cos(angular) +
+        np.cos(lat_rad) * np.sin(angular) * np.cos(bearing_rad)
+    )
+
+    lon2_rad = lon_rad + np.arctan2(
+        np.sin(bearing_rad) * np.sin(angular) * np.cos(lat_rad),
+        np.cos(angular) - np.sin(lat_rad) * np.sin(lat2_rad)
+    )
+
+    return np.degrees(lat2_rad), np.degrees(lon2_rad)
+
+
+def simplify_coordinates(
+    coordinates: List[Tuple[float, float]],
+    tolerance_m: float
+) -> List[Tuple[float, float]]:
+    """
+    Simplifie un tracé (algorithme de Douglas-Peucker)
+
+    Les points sont projetés localement en mètres (projection
+    équirectangulaire) ; les écarts de chaque sous-tracé sont calculés en
+    une seule opération vectorisée. Les points conservés sont renvoyés tels
+    quels (pas d'arrondi), premier et dernier point inclus.
+
+    Args:
+        coordinates: Liste de tuples (lat, lon)
+        tolerance_m: Écart maximal toléré en mètres (0 = pas de simplification)
+
+    Returns:
+        Liste de tuples (lat, lon) simplifiée
+    """
+    n = len(coordinates)
+    if n < 3 or tolerance_m <= 0:
+        return list(coordinates)
+
+    points = np.radians(np.asarray(coordinates, dtype=np.float64))
+    y = points[:, 0] * EARTH_RADIUS_KM * 1000
+    x = points[:, 1] * math.cos(float(np.mean(points[:, 0]))) * EARTH_RADIUS_KM * 1000
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        # Distance des points intermédiaires au segment [first, last]
+        px = x[first + 1:last] - x[first]
+        py = y[first + 1:last] - y[first]
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        length2 = dx * dx + dy * dy
+        if length2 > 0:
+            t = np.clip((px * dx + py * dy) / length2, 0.0, 1.0)
+            px = px - t * dx
+            py = py - t * dy
+        distances = np.hypot(px, py)
+
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance_m:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [coordinates[i] for i in np.flatnonzero(keep)]
@@ -0,0 +1,86 @@
+from typing import Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+GPX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gpx xmlns="http://www.topografix.com/GPX/1/1" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    'xsi:schemaLocation="http://www.topografix.com/GPX/1/1 '
+    'http://www.topografix.com/GPX/1/1/gpx.xsd" '
+    'version="1.1" creator={creator}>\n'
+)
+
+# Nombre de points écrits par morceau
+CHUNK_POINTS = 1000
+
+
+def iter_gpx(
+    coordinates: List[Tuple[float, float]],
+    name: str,
+    description: str,
+    creator: str,
+    elevations: Optional[Sequence[float]] = None
+) -> Iterator[str]:
+    """
+    Écrit un fichier GPX (une trace, un segment) morceau par morceau
+
+    Le XML est produit directement à partir des coordonnées, sans construire
+    d'objet par point (contrairement à gpxpy).
+
+    Args:
+        coordinates: Liste de tuples (lat, lon)
+        name: Nom du parcours
+        description: Description du parcours
+        creator: Application ayant généré le fichier
+        elevations: Élévations en mètres (une par point), balises <ele> si fournies
+
+    Returns:
+        Itérateur sur les morceaux de texte du fichier
+    """
+    yield GPX_HEADER.format(creator=quoteattr(creator))
+    yield (
+        "  <metadata>\n"
+        f"    <name>{escape(name)}</name>\n"
+        f"    <desc>{escape(description)}</desc>\n"
+        "  </metadata>\n"
+        "  <trk>\n"
+        "    <trkseg>\n"
+    )
+
+    if elevations is not None and len(elevations) == len(coordinates):
+        template = '      <trkpt lat="{}" lon="{}">\n        <ele>{}</ele>\n      </trkpt>\n'
+        points = [
+            (lat, lon, round(ele, 1))
+            for (lat, lon), ele in zip(coordinates, elevations)
+        ]
+    else:
+        template = '      <trkpt lat="{}" lon="{}">\n      </trkpt>\n'
+        points = coordinates
+
+    for start in range(0, len(points), CHUNK_POINTS):
+        yield "".join(template.format(*point) for point in points[start:start + CHUNK_POINTS])
+
+    yield "    </trkseg>\n  </trk>\n</gpx>"
+
+
+def write_gpx(
+    coordinates: List[Tuple[float, float]],
+    name: str,
+    description: str,
+    creator: str,
+    elevations: Optional[Sequence[float]] = None
+) -> str:
+    """
+    Génère le contenu GPX complet (voir iter_gpx)
+
+    Args:
+        coordinates: Liste de tuples (lat, lon)
+        name: Nom du parcours
+        description: Description du parcours
+        creator: Application ayant généré le fichier
+        elevations: Élévations en mètres (optionnel)
+
+    Returns:
+        Contenu GPX au format string
+    """
+    return "".join(iter_gpx(coordinates, name, description, creator, elevations))
@@ -0,0 +1,320 @@
+"""
+Métriques au format d'exposition texte Prometheus (sans dépendance externe)
+
+Les métriques sont enregistrées dans un registre (REGISTRY par défaut) et
+exposées par /metrics. L'enregistrement d'une mesure ne coûte qu'un accès
+dictionnaire et quelques additions : les métriques restent actives en
+production. Les valeurs déjà suivies ailleurs (statistiques des caches, du
+pool HTTP) sont lues au moment de la collecte via des collecteurs, sans
+aucun coût sur le chemin des requêtes.
+"""
+import abc
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bornes par défaut des histogrammes de durée (secondes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Échantillon collecté : (suffixe du nom, labels, valeur)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric(abc.ABC):
+    """Métrique nommée, avec des séries par combinaison de valeurs de labels"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[tuple, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Échantillons (suffixe, labels, valeur) de toutes les séries"""
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        """Incrémente la série correspondant aux labels"""
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._series.items():
+            yield "_total", self._labels(key), value
+
+
+class Gauge(_Metric):
+    """Valeur instantanée"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        """Fixe la valeur de la série correspondant aux labels"""
+        self._series[self._key(labels)] = value
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._series.items():
+            yield "", self._labels(key), value
+
+
+class Histogram(_Metric):
+    """Histogramme cumulatif à bornes fixes"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        """Ajoute une observation à la série correspondant aux labels"""
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # Comptes par intervalle (+Inf en dernier), somme des valeurs
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, total) in self._series.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """
+    Registre des métriques de l'application
+
+    Les collecteurs sont des fonctions appelées à chaque collecte, qui
+    renvoient des tuples (nom, type, documentation, échantillons) pour
+    exposer des valeurs suivies ailleurs.
+    """
+
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Déclare (ou retrouve) un compteur"""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Déclare (ou retrouve) une jauge"""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Déclare (ou retrouve) un histogramme"""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        """
+        Ajoute un collecteur appelé à chaque exposition
+
+        Args:
+            collector: Fonction renvoyant des tuples (nom, type, documentation,
+                échantillons), les échantillons étant des tuples (labels, valeur)
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Exposition texte de toutes les métriques (format Prometheus 0.0.4)
+
+        Returns:
+            Texte à renvoyer avec le type CONTENT_TYPE
+        """
+        lines = []
+        for metric in self._metrics.values():
+            self._render_family(lines, metric.name, metric.type, metric.documentation, metric.samples())
+
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                suffix = "_total" if metric_type == "counter" else ""
+                self._render_family(
+                    lines, self.namespace + name, metric_type, documentation,
+                    ((suffix, labels, value) for labels, value in samples)
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric_class, name: str, documentation: str, labelnames, **kwargs):
+        name = self.namespace + name
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = metric_class(name, documentation, labelnames, **kwargs)
+        return metric
+
+    @staticmethod
+    def _render_family(lines: list, name: str, metric_type: str, documentation: str, samples):
+        # Format 0.0.4 : les compteurs sont déclarés sous leur nom suffixé
+        family = name + "_total" if metric_type == "counter" else name
+        lines.append(f"# HELP {family} {documentation}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        for suffix, labels, value in samples:
+            if value is None:
+                continue
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+
+# Type MIME de l'exposition texte Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Registre partagé par toute l'application
+REGISTRY = MetricsRegistry(namespace="routegen_")
+
+
+def cache_samples(caches: Dict[str, Optional[dict]]) -> Iterable[tuple]:
+    """
+    Familles de métriques (hits, misses, ratio, entrées) de plusieurs caches
+
+    Args:
+        caches: Statistiques de chaque cache (format LRUCache.stats), None
+            pour un cache désactivé
+
+    Returns:
+        Tuples (nom, type, documentation, échantillons) pour un collecteur
+    """
+    enabled = {name: stats for name, stats in caches.items() if stats}
+    return [
+        ("cache_hits", "counter", "Lectures de cache réussies",
+         [({"cache": name}, stats["hits"]) for name, stats in enabled.items()]),
+        ("cache_misses", "counter", "Lectures de cache manquées",
+         [({"cache": name}, stats["misses"]) for name, stats in enabled.items()]),
+        ("cache_hit_ratio", "gauge", "Taux de succès des lectures de cache",
+         [({"cache": name}, stats["hit_ratio"]) for name, stats in enabled.items()]),
+        ("cache_entries", "gauge", "Entrées en cache",
+         [({"cache": name}, stats.get("entries", stats.get("slots"))) for name, stats in enabled.items()]),
+    ]
+
+
+# Bornes des histogrammes de taille de réponse (octets)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : durée et taille des réponses HTTP par route
+
+    Le label est le chemin déclaré de la route (ex: /api/generate-route),
+    jamais l'URL brute, pour garder un nombre de séries borné. Les requêtes
+    qui ne correspondent à aucune route (404, ex: scans d'URL) sont
+    regroupées sous le label "other".
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry" = REGISTRY):
+        self.app = app
+        self.duration = registry.histogram(
+            "http_request_duration_seconds", "Durée des requêtes HTTP", ["route", "method", "status"]
+        )
+        self.size = registry.histogram(
+            "http_response_size_bytes", "Taille des corps de réponse HTTP", ["route", "method"],
+            buckets=SIZE_BUCKETS
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Le routeur ajoute la route trouvée au scope partagé
+            route = getattr(scope.get("route"), "path", "other")
+            self.duration.observe(
+                time.perf_counter() - start, route=route, method=scope["method"], status=status
+            )
+            self.size.observe(size, route=route, method=scope["method"])
+
+
+async def monitor_event_loop_lag(interval: float, registry: "MetricsRegistry" = REGISTRY):
+    """
+    Mesure en continu le retard de la boucle d'événements
+
+    La tâche dort interval secondes ; le dépassement du réveil est le temps
+    pendant lequel la boucle était occupée (code bloquant, calcul lourd).
+    À lancer en tâche de fond (annulée à l'arrêt).
+
+    Args:
+        interval: Période de mesure en secondes
+        registry: Registre des métriques
+    """
+    histogram = registry.histogram(
+        "event_loop_lag_seconds", "Retard de la boucle d'événements",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+    )
+    gauge = registry.gauge("event_loop_lag_last_seconds", "Dernier retard mesuré de la boucle d'événements")
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        histogram.observe(lag)
+        gauge.set(lag)
@@ -0,0 +1,434 @@
+"""
+Traces par étape de la génération (spans), sans dépendance externe
+
+Un span mesure une étape (géocodage, candidat, itération, appel de routing,
+élévation, score, sérialisation) et porte des attributs structurés
+(direction, facteur d'ajustement, nombre de points...). Le span courant est
+propagé par contextvars : les tâches asyncio créées dans un span en héritent
+comme parent.
+
+Les spans terminés sont mis en file puis exportés par lots en tâche de
+fond, vers un fichier JSON lines ou un collecteur OTLP/HTTP (JSON). Sans
+exportateur configuré, span() renvoie un span inerte partagé : le coût est
+celui d'un appel de fonction.
+"""
+import abc
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+
+# Configuration du logger
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """Étape mesurée, à utiliser comme gestionnaire de contexte"""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_id", "sampled",
+        "attributes", "start_ns", "end_ns", "status", "error", "_token"
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        attributes: dict
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = "ok"
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        """Ajoute (ou remplace) un attribut"""
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        """Ajoute plusieurs attributs"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Span fermé depuis un autre contexte (générateur finalisé tardivement)
+            pass
+        if exc_type is asyncio.CancelledError:
+            self.status = "cancelled"
+        elif exc_type is not None and exc_type is not GeneratorExit:
+            self.status = "error"
+            self.error = f"{exc_type.__name__}: {exc}"
+        if self.sampled:
+            self.tracer._on_end(self)
+        return False
+
+    def to_dict(self) -> dict:
+        """Représentation JSON lines du span"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """Span inerte (traçage désactivé)"""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(abc.ABC):
+    """Destination des spans terminés (exportés par lots)"""
+
+    @abc.abstractmethod
+    async def export(self, spans: List[Span]):
+        """Exporte un lot de spans terminés"""
+
+    async def aclose(self):
+        pass
+
+
+class JsonLinesExporter(SpanExporter):
+    """Un span par ligne JSON, ajouté à un fichier local"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    async def export(self, spans: List[Span]):
+        lines = "".join(
+            json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans
+        )
+        # Écriture hors de la boucle d'événements
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: str):
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+class OTLPHttpExporter(SpanExporter):
+    """
+    Export vers un collecteur OpenTelemetry (OTLP/HTTP, encodage JSON)
+
+    Compatible avec tout collecteur exposant /v1/traces (OpenTelemetry
+    Collector, Jaeger, Tempo...).
+    """
+
+    # Codes de statut OTLP
+    STATUS_CODES = {"ok": 1, "error": 2, "cancelled": 2}
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def export(self, spans: List[Span]):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": self._attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "routegen"},
+                    "spans": [self._span(span) for span in spans]
+                }]
+            }]
+        }
+        response = await self.client.post(self.url, json=body)
+        response.raise_for_status()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _span(self, span: Span) -> dict:
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1 if span.parent_id else 2,  # INTERNAL, SERVER pour la racine
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": self._attributes(span.attributes),
+            "status": {
+                "code": self.STATUS_CODES[span.status],
+                "message": span.error or ("" if span.status == "ok" else span.status)
+            }
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+    @staticmethod
+    def _attributes(attributes: dict) -> List[dict]:
+        result = []
+        for key, value in attributes.items():
+            if isinstance(value, bool):
+                encoded = {"boolValue": value}
+            elif isinstance(value, int):
+                encoded = {"intValue": str(value)}
+            elif isinstance(value, float):
+                encoded = {"doubleValue": value}
+            else:
+                encoded = {"stringValue": str(value)}
+            result.append({"key": key, "value": encoded})
+        return result
+
+
+class Tracer:
+    """
+    Création, échantillonnage et export des spans
+
+    L'échantillonnage est décidé à la racine de la trace : une trace non
+    échantillonnée ne produit aucun export. Les spans terminés attendent
+    dans une file bornée (les plus anciens sont abandonnés si l'export ne
+    suit pas).
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_ratio: float = 1.0, max_queue: int = 10000):
+        self.configure(exporter, sample_ratio, max_queue)
+
+    def configure(self, exporter: Optional[SpanExporter], sample_ratio: float = 1.0, max_queue: int = 10000):
+        """
+        Active (ou désactive, exporter=None) le traçage
+
+        Args:
+            exporter: Destination des spans
+            sample_ratio: Proportion des traces exportées (0 à 1)
+            max_queue: Nombre maximum de spans en attente d'export
+        """
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.max_queue = max_queue
+        self._queue: List[Span] = []
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, **attributes):
+        """
+        Crée un span enfant du span courant (ou racine d'une nouvelle trace)
+
+        Args:
+            name: Nom de l'étape
+            **attributes: Attributs initiaux
+
+        Returns:
+            Span à utiliser avec "with"
+        """
+        if self.exporter is None:
+            return _NOOP_SPAN
+
+        parent = _current_span.get()
+        if parent is None:
+            return Span(
+                self, name, f"{random.getrandbits(128):032x}", None,
+                random.random() < self.sample_ratio, attributes
+            )
+        return Span(self, name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+
+    def _on_end(self, span: Span):
+        self._queue.append(span)
+        if len(self._queue) > self.max_queue:
+            overflow = len(self._queue) - self.max_queue
+            del self._queue[:overflow]
+            self.dropped += overflow
+
+    async def flush(self):
+        """Exporte les spans en attente"""
+        if not self._queue or self.exporter is None:
+            return
+        spans, self._queue = self._queue, []
+        try:
+            await self.exporter.export(spans)
+            self.exported += len(spans)
+        except Exception as e:
+            self.export_errors += 1
+            self.dropped += len(spans)
+            logger.warning(f"Export des traces impossible: {e}")
+
+    async def run(self, interval: float):
+        """
+        Exporte les spans périodiquement (tâche de fond, annulée à l'arrêt)
+
+        Args:
+            interval: Période d'export en secondes
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def shutdown(self):
+        """Exporte les derniers spans et ferme l'exportateur"""
+        await self.flush()
+        if self.exporter is not None:
+            await self.exporter.aclose()
+
+    def stats(self) -> dict:
+        """Statistiques d'export"""
+        return {
+            "enabled": self.enabled,
+            "exporter": type(self.exporter).__name__ if self.exporter else None,
+            "sample_ratio": self.sample_ratio,
+            "queued": len(self._queue),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "export_errors": self.export_errors
+        }
+
+
+def create_span_exporter(
+    name: str,
+    jsonl_path: str = "",
+    otlp_endpoint: str = "",
+    service_name: str = "routegen"
+) -> Optional[SpanExporter]:
+    """
+    Construit l'exportateur de spans
+
+    Args:
+        name: "none", "jsonl" ou "otlp"
+        jsonl_path: Fichier de sortie (jsonl)
+        otlp_endpoint: URL de base du collecteur (otlp), ex: http://localhost:4318
+        service_name: Nom du service dans les traces (otlp)
+
+    Returns:
+        Exportateur, ou None si le traçage est désactivé
+    """
+    if name == "jsonl":
+        return JsonLinesExporter(jsonl_path)
+    if name == "otlp":
+        return OTLPHttpExporter(otlp_endpoint, service_name)
+    if name != "none":
+        raise ValueError(f"Exportateur de traces inconnu: {name}")
+    return None
+
+
+# Traceur partagé par toute l'application (inactif tant qu'il n'est pas configuré)
+TRACER = Tracer()
+
+
+def span(name: str, **attributes):
+    """Crée un span avec le traceur partagé (voir Tracer.span)"""
+    return TRACER.span(name, **attributes)
+
+
+def current_span():
+    """Span en cours (span inerte s'il n'y en a pas), pour y ajouter des attributs"""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def traced(name: str):
+    """
+    Décorateur : exécute la fonction (synchrone ou coroutine) dans un span
+
+    Les attributs connus seulement pendant l'exécution sont ajoutés avec
+    current_span().set_attributes(...).
+
+    Args:
+        name: Nom de l'étape
+    """
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with TRACER.span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def iteration_spans(iterable: Iterable, name: str, **attributes) -> Iterator[Iterator[Tuple[object, object]]]:
+    """
+    Itère en ouvrant un span par élément (ex: itérations d'un solveur)
+
+    Le span d'un élément reste le span courant pendant le corps de la
+    boucle ; il est fermé au passage à l'élément suivant, et à la sortie
+    du bloc with quelle qu'elle soit (fin, break, return, exception) :
+
+        with iteration_spans(range(10), "iteration") as iterations:
+            for item, item_span in iterations:
+                ...
+
+    Args:
+        iterable: Éléments à parcourir
+        name: Nom de l'étape
+        **attributes: Attributs communs à tous les spans
+
+    Yields:
+        Itérateur de tuples (élément, span de l'élément) ; l'attribut
+        "iteration" vaut le rang de l'élément à partir de 1
+    """
+    iterations = _iterate_spans(iterable, name, attributes)
+    try:
+        yield iterations
+    finally:
+        iterations.close()
+
+
+def _iterate_spans(iterable: Iterable, name: str, attributes: dict) -> Iterator[Tuple[object, object]]:
+    """Générateur de iteration_spans (un span ouvert par élément)"""
+    for index, item in enumerate(iterable):
+        with TRACER.span(name, iteration=index + 1, **attributes) as item_span:
+            yield item, item_span
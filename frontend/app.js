@@ -6,7 +6,7 @@ console.log('API Base URL configurée:', API_BASE_URL);
 // Variables globales
 let map;
 let routeLayer;
-let currentGPX = null;
+let currentRequest = null;  // Requête du parcours affiché (GPX demandé au téléchargement)
 
 // Initialisation de la carte
 function initMap() {
@@ -57,8 +57,9 @@ function displayRoute(geojson, startAddress) {
 // Mettre à jour les métriques
 function updateMetrics(metrics, startAddress) {
     document.getElementById('metricDistance').textContent = metrics.distance_km;
-    document.getElementById('metricElevGain').textContent = metrics.elevation_gain_m;
-    document.getElementById('metricElevLoss').textContent = metrics.elevation_loss_m;
+    // Dénivelés null : élévations indisponibles
+    document.getElementById('metricElevGain').textContent = metrics.elevation_gain_m ?? '-';
+    document.getElementById('metricElevLoss').textContent = metrics.elevation_loss_m ?? '-';
     document.getElementById('metricDuration').textContent = metrics.estimated_duration_min || '-';
     document.getElementById('startAddressInfo').textContent = `Départ: ${startAddress}`;
 
@@ -117,11 +118,11 @@ async function generateRoute(event) {
 
     try {
         // Debug: afficher l'URL utilisée
-        const apiUrl = `${API_BASE_URL}/api/generate-route`;
+        const apiUrl = `${API_BASE_URL}/api/generate-route/stream`;
         console.log('API URL:', apiUrl);
         console.log('Form Data:', formData);
 
-        // Appeler l'API
+        // Appeler l'API (réponse diffusée en NDJSON : un événement JSON par ligne)
         const response = await fetch(apiUrl, {
             method: 'POST',
             headers: {
@@ -135,10 +136,32 @@ async function generateRoute(event) {
             throw new Error(error.detail || 'Erreur lors de la génération du parcours');
         }
 
-        const data = await response.json();
+        let startAddress = '';
+        let bestScore = Infinity;
+        let data = null;
+
+        await readEvents(response, (event) => {
+            if (event.event === 'geocode') {
+                startAddress = event.start_address;
+            } else if (event.event === 'candidate') {
+                // Afficher le meilleur candidat reçu en attendant le résultat final
+                if (event.score < bestScore) {
+                    bestScore = event.score;
+                    displayRoute(event.geojson, startAddress);
+                }
+            } else if (event.event === 'result') {
+                data = event.route;
+            } else if (event.event === 'error') {
+                throw new Error(event.detail);
+            }
+        });
+
+        if (!data) {
+            throw new Error('Erreur lors de la génération du parcours');
+        }
 
-        // Sauvegarder le GPX
-        currentGPX = data.gpx;
+        // Conserver la requête : le GPX n'est demandé qu'au téléchargement
+        currentRequest = formData;
 
         // Afficher la route sur la carte
         displayRoute(data.geojson, data.start_address);
@@ -154,15 +177,61 @@ async function generateRoute(event) {
     }
 }
 
-// Exporter le GPX
-function exportGPX() {
-    if (!currentGPX) {
+// Lire une réponse NDJSON et appeler onEvent pour chaque ligne reçue
+async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+
+        for (const line of lines) {
+            if (line.trim()) {
+                onEvent(JSON.parse(line));
+            }
+        }
+    }
+
+    if (buffer.trim()) {
+        onEvent(JSON.parse(buffer));
+    }
+}
+
+// Exporter le GPX (demandé seul à l'API : le parcours déjà généré est réutilisé)
+async function exportGPX() {
+    if (!currentRequest) {
         showError('Aucun parcours à exporter');
         return;
     }
 
+    let gpx;
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/generate-route?fields=gpx`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(currentRequest)
+        });
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || "Erreur lors de l'export GPX");
+        }
+        gpx = (await response.json()).gpx;
+    } catch (error) {
+        console.error('Erreur:', error);
+        showError(error.message || "Erreur lors de l'export GPX");
+        return;
+    }
+
     // Créer un blob et télécharger
-    const blob = new Blob([currentGPX], { type: 'application/gpx+xml' });
+    const blob = new Blob([gpx], { type: 'application/gpx+xml' });
     const url = window.URL.createObjectURL(blob);
     const a = document.createElement('a');
     a.href = url;